@@ -1,14 +1,36 @@
+import asyncio
+import contextlib
 from typing import Any, Optional
 
-from fastapi import APIRouter, FastAPI
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Body, Depends, FastAPI, Header, Query, Request
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from redis.asyncio import Redis
+from restaurant_app.local_cache import listen_invalidation
 from restaurant_app.service import (
     DishService,
+    ExportData,
     LoadData,
     MenuService,
+    MetricsService,
     SubMenuService,
     TaskXLSX,
 )
+from restaurant_app.task_status import task_status_hub
+from settings.db import (
+    close_cache_pool,
+    close_db_pool,
+    get_cache,
+    get_db,
+    open_cache_pool,
+    open_db_pool,
+)
+from settings.settings import (
+    BULK_MAX_ITEMS,
+    LIST_PAGE_SIZE,
+    LIST_PAGE_SIZE_MAX,
+    cache_redis,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from .schemas import (
     DeleteRestaurantDishSchema,
@@ -22,15 +44,21 @@ from .schemas import (
     NotFoundDish,
     NotFoundMenu,
     NotFoundSubMenu,
+    RequestBulkDeleteSchema,
+    RequestBulkPatchRestaurantDishSchema,
+    RequestBulkPatchRestaurantSubMenuSchema,
     RequestPatchRestaurantDishSchema,
     RequestPatchRestaurantSubMenuSchema,
     RequestPathRestaurantMenuSchema,
     RequestPostRestaurantDishSchema,
     RequestPostRestaurantMenuSchema,
     RequestPostRestaurantSubMenuSchema,
+    ResponseBulkDeleteSchema,
     ResponseCreateXlsxMenu,
+    ResponseCreateXlsxMenuReady,
     ResponseGetStatusTask,
     ResponseGetStatusTaskSucces,
+    ResponseImportData,
     ResponseLoadTestData,
     ResponsePatchRestaurantDishSchema,
     ResponsePatchRestaurantSubMenuSchema,
@@ -38,11 +66,46 @@ from .schemas import (
     ResponsePostRestaurantDishSchema,
     ResponsePostRestaurantMenuSchema,
     ResponsePostRestaurantSubMenu,
+    TreeRestaurantMenuSchema,
 )
 
 app = FastAPI()
 router = APIRouter()
 
+# Параметры страницы списка: следующая страница запрашивается
+# с after_id равным id последнего элемента текущей страницы
+AFTER_ID = Query(0, ge=0, description="id последнего элемента предыдущей страницы")
+LIMIT = Query(
+    LIST_PAGE_SIZE, ge=1, le=LIST_PAGE_SIZE_MAX, description="Размер страницы"
+)
+# ETag из прошлого ответа: если данные не менялись, ответ 304 без тела
+IF_NONE_MATCH = Header(None)
+# Кодировки сжатия, которые принимает клиент
+ACCEPT_ENCODING = Header(None)
+# Тело пакетного запроса: непустой массив не длиннее BULK_MAX_ITEMS
+BULK_BODY = Body(..., min_items=1, max_items=BULK_MAX_ITEMS)
+
+
+@app.on_event("startup")
+async def startup():
+    """Открытие пулов соединений и подписка на инвалидацию локального кеша"""
+    await open_db_pool()
+    await open_cache_pool()
+    app.state.invalidation_listener = asyncio.create_task(
+        listen_invalidation(cache_redis)
+    )
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Отписка от инвалидации и статусов задач и закрытие пулов соединений при остановке"""
+    app.state.invalidation_listener.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await app.state.invalidation_listener
+    await task_status_hub.stop()
+    await close_db_pool()
+    await close_cache_pool()
+
 
 """ОСНОВНОЕ МЕНЮ"""
 
@@ -52,9 +115,31 @@ router = APIRouter()
     response_model=Optional[list[GetRestaurantMenuSchema] | list],
     tags=["Меню"],
 )
-async def get_list_menu():
-    """Получить список основного меню"""
-    return await MenuService.list_menu()
+async def get_list_menu(
+    after_id: int = AFTER_ID,
+    limit: int = LIMIT,
+    if_none_match: str | None = IF_NONE_MATCH,
+    accept_encoding: str | None = ACCEPT_ENCODING,
+    asyn_cache: Redis = Depends(get_cache),
+):
+    """Получить страницу списка основного меню"""
+    return await MenuService.list_menu(
+        asyn_cache, after_id, limit, if_none_match, accept_encoding
+    )
+
+
+@app.get(
+    "/api/v1/menus/tree",
+    response_model=list[TreeRestaurantMenuSchema],
+    tags=["Меню"],
+)
+async def get_menu_tree(
+    if_none_match: str | None = IF_NONE_MATCH,
+    accept_encoding: str | None = ACCEPT_ENCODING,
+    asyn_cache: Redis = Depends(get_cache),
+):
+    """Получить все меню с подменю и блюдами одним ответом"""
+    return await MenuService.menu_tree(asyn_cache, if_none_match, accept_encoding)
 
 
 @app.get(
@@ -62,9 +147,16 @@ async def get_list_menu():
     responses={200: {"model": GetRestaurantMenuSchema}, 404: {"model": NotFoundMenu}},
     tags=["Меню"],
 )
-async def get_menu(menu_id: int):
+async def get_menu(
+    menu_id: int,
+    if_none_match: str | None = IF_NONE_MATCH,
+    accept_encoding: str | None = ACCEPT_ENCODING,
+    asyn_cache: Redis = Depends(get_cache),
+):
     """Получить определенное основное меню"""
-    return await MenuService.get_menu_id(menu_id)
+    return await MenuService.get_menu_id(
+        menu_id, asyn_cache, if_none_match, accept_encoding
+    )
 
 
 @app.post(
@@ -75,9 +167,11 @@ async def get_menu(menu_id: int):
 )
 async def post_menu(
     request_data: RequestPostRestaurantMenuSchema,
+    asyn_cache: Redis = Depends(get_cache),
+    asyn_db: AsyncSession = Depends(get_db),
 ):
     """Создать основное меню"""
-    return await MenuService.create_menu(request_data)
+    return await MenuService.create_menu(request_data, asyn_cache, asyn_db)
 
 
 @app.patch(
@@ -88,9 +182,11 @@ async def post_menu(
 async def patch_menu(
     menu_id: int,
     request_data: RequestPathRestaurantMenuSchema | ErrorSchema | None,
+    asyn_cache: Redis = Depends(get_cache),
+    asyn_db: AsyncSession = Depends(get_db),
 ):
     """Изменить основное меню"""
-    return await MenuService.edit_menu(menu_id, request_data)
+    return await MenuService.edit_menu(menu_id, request_data, asyn_cache, asyn_db)
 
 
 @app.delete(
@@ -100,9 +196,11 @@ async def patch_menu(
 )
 async def delete_menu(
     menu_id: int,
+    asyn_cache: Redis = Depends(get_cache),
+    asyn_db: AsyncSession = Depends(get_db),
 ):
     """Удалить основное меню"""
-    return await MenuService.delete_menu(menu_id)
+    return await MenuService.delete_menu(menu_id, asyn_cache, asyn_db)
 
 
 """ПОДМЕНЮ"""
@@ -113,9 +211,18 @@ async def delete_menu(
     response_model=Optional[list[GetRestaurantSubMenuSchema] | Any],
     tags=["Подменю"],
 )
-async def get_list_submenu(menu_id: int):
-    """Получить список подменю"""
-    return await SubMenuService.list_submenu(menu_id)
+async def get_list_submenu(
+    menu_id: int,
+    after_id: int = AFTER_ID,
+    limit: int = LIMIT,
+    if_none_match: str | None = IF_NONE_MATCH,
+    accept_encoding: str | None = ACCEPT_ENCODING,
+    asyn_cache: Redis = Depends(get_cache),
+):
+    """Получить страницу списка подменю"""
+    return await SubMenuService.list_submenu(
+        menu_id, asyn_cache, after_id, limit, if_none_match, accept_encoding
+    )
 
 
 @app.get(
@@ -124,9 +231,17 @@ async def get_list_submenu(menu_id: int):
     responses={404: {"model": NotFoundSubMenu}},
     tags=["Подменю"],
 )
-async def get_submenu(menu_id: int, sub_menu_id: int):
+async def get_submenu(
+    menu_id: int,
+    sub_menu_id: int,
+    if_none_match: str | None = IF_NONE_MATCH,
+    accept_encoding: str | None = ACCEPT_ENCODING,
+    asyn_cache: Redis = Depends(get_cache),
+):
     """Получить определенное подменю"""
-    return await SubMenuService.get_submenu_id(menu_id, sub_menu_id)
+    return await SubMenuService.get_submenu_id(
+        menu_id, sub_menu_id, asyn_cache, if_none_match, accept_encoding
+    )
 
 
 @app.post(
@@ -135,9 +250,74 @@ async def get_submenu(menu_id: int, sub_menu_id: int):
     response_model=ResponsePostRestaurantSubMenu,
     tags=["Подменю"],
 )
-async def post_sub_menu(menu_id: int, request_data: RequestPostRestaurantSubMenuSchema):
+async def post_sub_menu(
+    menu_id: int,
+    request_data: RequestPostRestaurantSubMenuSchema,
+    asyn_cache: Redis = Depends(get_cache),
+    asyn_db: AsyncSession = Depends(get_db),
+):
     """Создать подменю"""
-    return await SubMenuService.create_submenu(menu_id, request_data)
+    return await SubMenuService.create_submenu(
+        menu_id, request_data, asyn_cache, asyn_db
+    )
+
+
+# Пакетные маршруты объявлены раньше маршрутов с {sub_menu_id}
+
+
+@app.post(
+    "/api/v1/menus/{menu_id}/submenus/bulk",
+    status_code=201,
+    response_model=list[ResponsePostRestaurantSubMenu],
+    responses={404: {"model": NotFoundMenu}},
+    tags=["Подменю"],
+)
+async def post_sub_menus_bulk(
+    menu_id: int,
+    request_data: list[RequestPostRestaurantSubMenuSchema] = BULK_BODY,
+    asyn_cache: Redis = Depends(get_cache),
+    asyn_db: AsyncSession = Depends(get_db),
+):
+    """Создать пакет подменю одним запросом"""
+    return await SubMenuService.create_submenus(
+        menu_id, request_data, asyn_cache, asyn_db
+    )
+
+
+@app.patch(
+    "/api/v1/menus/{menu_id}/submenus/bulk",
+    response_model=list[ResponsePatchRestaurantSubMenuSchema],
+    responses={404: {"model": NotFoundMenu}},
+    tags=["Подменю"],
+)
+async def patch_sub_menus_bulk(
+    menu_id: int,
+    request_data: list[RequestBulkPatchRestaurantSubMenuSchema] = BULK_BODY,
+    asyn_cache: Redis = Depends(get_cache),
+    asyn_db: AsyncSession = Depends(get_db),
+):
+    """Изменить пакет подменю, в ответе только найденные подменю"""
+    return await SubMenuService.edit_submenus(
+        menu_id, request_data, asyn_cache, asyn_db
+    )
+
+
+@app.delete(
+    "/api/v1/menus/{menu_id}/submenus/bulk",
+    response_model=ResponseBulkDeleteSchema,
+    responses={404: {"model": NotFoundMenu}},
+    tags=["Подменю"],
+)
+async def delete_sub_menus_bulk(
+    menu_id: int,
+    request_data: RequestBulkDeleteSchema,
+    asyn_cache: Redis = Depends(get_cache),
+    asyn_db: AsyncSession = Depends(get_db),
+):
+    """Удалить пакет подменю, в ответе id удаленных подменю"""
+    return await SubMenuService.delete_submenus(
+        menu_id, request_data, asyn_cache, asyn_db
+    )
 
 
 @app.patch(
@@ -146,10 +326,16 @@ async def post_sub_menu(menu_id: int, request_data: RequestPostRestaurantSubMenu
     tags=["Подменю"],
 )
 async def patch_sub_menu(
-    menu_id: int, sub_menu_id: int, request_data: RequestPatchRestaurantSubMenuSchema
+    menu_id: int,
+    sub_menu_id: int,
+    request_data: RequestPatchRestaurantSubMenuSchema,
+    asyn_cache: Redis = Depends(get_cache),
+    asyn_db: AsyncSession = Depends(get_db),
 ):
     """Изменить подменю"""
-    return await SubMenuService.edit_submenu(menu_id, sub_menu_id, request_data)
+    return await SubMenuService.edit_submenu(
+        menu_id, sub_menu_id, request_data, asyn_cache, asyn_db
+    )
 
 
 @app.delete(
@@ -157,9 +343,16 @@ async def patch_sub_menu(
     response_model=DeleteRestaurantSubMenuSchema,
     tags=["Подменю"],
 )
-async def delete_sub_menu(menu_id: int, sub_menu_id: int):
+async def delete_sub_menu(
+    menu_id: int,
+    sub_menu_id: int,
+    asyn_cache: Redis = Depends(get_cache),
+    asyn_db: AsyncSession = Depends(get_db),
+):
     """Удалить подменю"""
-    return await SubMenuService.delete_submenu(menu_id, sub_menu_id)
+    return await SubMenuService.delete_submenu(
+        menu_id, sub_menu_id, asyn_cache, asyn_db
+    )
 
 
 """БЛЮДА"""
@@ -170,9 +363,25 @@ async def delete_sub_menu(menu_id: int, sub_menu_id: int):
     response_model=list[GetRestaurantDishSchema],
     tags=["Блюда"],
 )
-async def get_list_dish(menu_id: int, sub_menu_id: int):
-    """Получить список блюд"""
-    return await DishService.list_dish(menu_id, sub_menu_id)
+async def get_list_dish(
+    menu_id: int,
+    sub_menu_id: int,
+    after_id: int = AFTER_ID,
+    limit: int = LIMIT,
+    if_none_match: str | None = IF_NONE_MATCH,
+    accept_encoding: str | None = ACCEPT_ENCODING,
+    asyn_cache: Redis = Depends(get_cache),
+):
+    """Получить страницу списка блюд"""
+    return await DishService.list_dish(
+        menu_id,
+        sub_menu_id,
+        asyn_cache,
+        after_id,
+        limit,
+        if_none_match,
+        accept_encoding,
+    )
 
 
 @app.get(
@@ -185,9 +394,14 @@ async def get_dish(
     menu_id: int,
     sub_menu_id: int,
     dish_id: int,
+    if_none_match: str | None = IF_NONE_MATCH,
+    accept_encoding: str | None = ACCEPT_ENCODING,
+    asyn_cache: Redis = Depends(get_cache),
 ):
     """Получить определенное блюдо"""
-    return await DishService.get_dish_id(menu_id, sub_menu_id, dish_id)
+    return await DishService.get_dish_id(
+        menu_id, sub_menu_id, dish_id, asyn_cache, if_none_match, accept_encoding
+    )
 
 
 @app.post(
@@ -200,9 +414,74 @@ async def post_dish(
     menu_id: int,
     sub_menu_id: int,
     request_data: RequestPostRestaurantDishSchema,
+    asyn_cache: Redis = Depends(get_cache),
+    asyn_db: AsyncSession = Depends(get_db),
 ):
     """Создать блюдо"""
-    return await DishService.create_dish(menu_id, sub_menu_id, request_data)
+    return await DishService.create_dish(
+        menu_id, sub_menu_id, request_data, asyn_cache, asyn_db
+    )
+
+
+# Пакетные маршруты объявлены раньше маршрутов с {dish_id}
+
+
+@app.post(
+    "/api/v1/menus/{menu_id}/submenus/{sub_menu_id}/dishes/bulk",
+    status_code=201,
+    response_model=list[ResponsePostRestaurantDishSchema],
+    responses={404: {"model": NotFoundSubMenu}},
+    tags=["Блюда"],
+)
+async def post_dishes_bulk(
+    menu_id: int,
+    sub_menu_id: int,
+    request_data: list[RequestPostRestaurantDishSchema] = BULK_BODY,
+    asyn_cache: Redis = Depends(get_cache),
+    asyn_db: AsyncSession = Depends(get_db),
+):
+    """Создать пакет блюд одним запросом"""
+    return await DishService.create_dishes(
+        menu_id, sub_menu_id, request_data, asyn_cache, asyn_db
+    )
+
+
+@app.patch(
+    "/api/v1/menus/{menu_id}/submenus/{sub_menu_id}/dishes/bulk",
+    response_model=list[ResponsePatchRestaurantDishSchema],
+    responses={404: {"model": NotFoundSubMenu}},
+    tags=["Блюда"],
+)
+async def patch_dishes_bulk(
+    menu_id: int,
+    sub_menu_id: int,
+    request_data: list[RequestBulkPatchRestaurantDishSchema] = BULK_BODY,
+    asyn_cache: Redis = Depends(get_cache),
+    asyn_db: AsyncSession = Depends(get_db),
+):
+    """Изменить пакет блюд, в ответе только найденные блюда"""
+    return await DishService.edit_dishes(
+        menu_id, sub_menu_id, request_data, asyn_cache, asyn_db
+    )
+
+
+@app.delete(
+    "/api/v1/menus/{menu_id}/submenus/{sub_menu_id}/dishes/bulk",
+    response_model=ResponseBulkDeleteSchema,
+    responses={404: {"model": NotFoundSubMenu}},
+    tags=["Блюда"],
+)
+async def delete_dishes_bulk(
+    menu_id: int,
+    sub_menu_id: int,
+    request_data: RequestBulkDeleteSchema,
+    asyn_cache: Redis = Depends(get_cache),
+    asyn_db: AsyncSession = Depends(get_db),
+):
+    """Удалить пакет блюд, в ответе id удаленных блюд"""
+    return await DishService.delete_dishes(
+        menu_id, sub_menu_id, request_data, asyn_cache, asyn_db
+    )
 
 
 @app.patch(
@@ -215,19 +494,31 @@ async def patch_dish(
     sub_menu_id: int,
     dish_id: int,
     request_data: RequestPatchRestaurantDishSchema,
+    asyn_cache: Redis = Depends(get_cache),
+    asyn_db: AsyncSession = Depends(get_db),
 ):
     """Изменить блюдо"""
-    return await DishService.edit_dish(menu_id, sub_menu_id, dish_id, request_data)
+    return await DishService.edit_dish(
+        menu_id, sub_menu_id, dish_id, request_data, asyn_cache, asyn_db
+    )
 
 
 @app.delete(
     "/api/v1/menus/{menu_id}/submenus/{sub_menu_id}/dishes/{dish_id}",
-    response_model=DeleteRestaurantDishSchema,
+    response_model=Optional[DeleteRestaurantDishSchema | ErrorSchema],
     tags=["Блюда"],
 )
-async def delete_dish(menu_id: int, sub_menu_id: int, dish_id: int):
+async def delete_dish(
+    menu_id: int,
+    sub_menu_id: int,
+    dish_id: int,
+    asyn_cache: Redis = Depends(get_cache),
+    asyn_db: AsyncSession = Depends(get_db),
+):
     """Удалить блюдо"""
-    return await DishService.delete_dish(menu_id, sub_menu_id, dish_id)
+    return await DishService.delete_dish(
+        menu_id, sub_menu_id, dish_id, asyn_cache, asyn_db
+    )
 
 
 """ЗАГРУЗКА ТЕСТОВЫХ ДАННЫХ"""
@@ -238,9 +529,59 @@ async def delete_dish(menu_id: int, sub_menu_id: int, dish_id: int):
     responses={200: {"model": ResponseLoadTestData}, 500: {"model": ErrorSchema}},
     tags=["Получение .xlsx файла"],
 )
-async def load_data_to_db():
+async def load_data_to_db(
+    asyn_cache: Redis = Depends(get_cache), asyn_db: AsyncSession = Depends(get_db)
+):
     """Загрузка тестовых данных"""
-    return await LoadData.test_data_to_db()
+    return await LoadData.test_data_to_db(asyn_cache, asyn_db)
+
+
+@app.post(
+    "/api/v1/import",
+    status_code=201,
+    response_model=ResponseImportData,
+    responses={422: {"model": ErrorSchema}},
+    tags=["Импорт меню"],
+)
+async def import_data_to_db(
+    request: Request,
+    file_format: str = Query("csv", alias="format", regex="^(csv|ndjson)$"),
+    asyn_cache: Redis = Depends(get_cache),
+    asyn_db: AsyncSession = Depends(get_db),
+):
+    """
+    Потоковый импорт меню из тела запроса в формате CSV или NDJSON.
+    Столбцы: menu_title, menu_description, submenu_title, submenu_description,
+    dish_title, dish_description, price
+    """
+    return await LoadData.import_file(
+        request.stream(), file_format, asyn_cache, asyn_db
+    )
+
+
+"""ЭКСПОРТ МЕНЮ"""
+
+
+@app.get(
+    "/api/v1/export.ndjson",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+    tags=["Экспорт меню"],
+)
+async def export_menu_ndjson():
+    """Выгрузка всего меню в NDJSON (строка меню/подменю/блюда на объект)"""
+    return await ExportData.export_file("ndjson")
+
+
+@app.get(
+    "/api/v1/export.csv",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/csv": {}}}},
+    tags=["Экспорт меню"],
+)
+async def export_menu_csv():
+    """Выгрузка всего меню в CSV (строка меню/подменю/блюда на запись)"""
+    return await ExportData.export_file("csv")
 
 
 """ГЕНЕРАЦИЯ/ПОЛУЧЕНИЕ .XLSX МЕНЮ"""
@@ -248,13 +589,16 @@ async def load_data_to_db():
 
 @app.post(
     "/api/v1/create_xlsx",
-    responses={202: {"model": ResponseCreateXlsxMenu}},
+    responses={
+        202: {"model": ResponseCreateXlsxMenu},
+        200: {"model": ResponseCreateXlsxMenuReady},
+    },
     status_code=202,
     tags=["Получение .xlsx файла"],
 )
-async def create_full_menu_to_xlsx():
-    """Запуск задания создания .xlsx"""
-    return await TaskXLSX.generate_xlsx_menu()
+async def create_full_menu_to_xlsx(asyn_cache: Redis = Depends(get_cache)):
+    """Запуск задания создания .xlsx, либо ссылка на готовый файл текущего меню"""
+    return await TaskXLSX.generate_xlsx_menu(asyn_cache)
 
 
 @app.get(
@@ -266,13 +610,31 @@ async def create_full_menu_to_xlsx():
     status_code=200,
     tags=["Получение .xlsx файла"],
 )
-async def get_status_task(task_id: str):
+async def get_status_task(task_id: str, asyn_cache: Redis = Depends(get_cache)):
     """Проверка статуса задачи"""
-    return await TaskXLSX.status_task(task_id)
+    return await TaskXLSX.status_task(task_id, asyn_cache)
 
 
 @app.get(
+    "/api/v1/status/{task_id}/events",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {"text/event-stream": {}},
+            "description": "Поток статусов задачи до SUCCESS или FAILURE",
+        },
+        404: {"model": FileNotFound},
+    },
+    tags=["Получение .xlsx файла"],
+)
+async def get_status_task_events(task_id: str, asyn_cache: Redis = Depends(get_cache)):
+    """Статусы задачи по мере изменения (Server-Sent Events) вместо опроса"""
+    return await TaskXLSX.status_events(task_id, asyn_cache)
+
+
+@app.api_route(
     "/api/v1/download/{task_id}",
+    methods=["GET", "HEAD"],
     status_code=200,
     tags=["Получение .xlsx файла"],
     response_class=FileResponse,
@@ -281,9 +643,36 @@ async def get_status_task(task_id: str):
             "content": {"file": {}},
             "description": "Начнется загрузка xlsx файла",
         },
+        206: {"description": "Часть файла по заголовку Range"},
+        304: {"description": "Файл не изменился (If-None-Match/If-Modified-Since)"},
         404: {"model": FileNotFound},
+        416: {"description": "Диапазон за пределами файла"},
     },
 )
-async def download_xlsx_menu(task_id: str):
-    """Загрузка .xlsx меню"""
-    return await TaskXLSX.download_menu(task_id)
+async def download_xlsx_menu(
+    task_id: str, request: Request, asyn_cache: Redis = Depends(get_cache)
+):
+    """Загрузка .xlsx меню, поддерживаются докачка (Range) и условные запросы"""
+    return await TaskXLSX.download_menu(task_id, request, asyn_cache)
+
+
+"""МЕТРИКИ"""
+
+
+@app.get(
+    "/api/v1/metrics",
+    response_class=PlainTextResponse,
+    tags=["Метрики"],
+)
+async def get_metrics():
+    """Метрики приложения в формате Prometheus"""
+    return await MetricsService.export()
+
+
+@app.get(
+    "/api/v1/metrics/cache_memory",
+    tags=["Метрики"],
+)
+async def get_cache_memory(asyn_cache: Redis = Depends(get_cache)):
+    """Отчет по памяти Redis в разрезе семейств ключей кеша"""
+    return await MetricsService.cache_memory(asyn_cache)
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, conlist
+from settings.settings import BULK_MAX_ITEMS
 
 """СХЕМЫ СВЯЗАННЫЕ С ЗАДАЧАМИ"""
 
@@ -15,6 +16,17 @@ class ResponseLoadTestData(BaseModel):
     detail: str
 
 
+class ResponseImportData(BaseModel):
+    """Схема ответа потокового импорта меню"""
+
+    rows: int
+    menus: int
+    submenus: int
+    dishes: int
+    seconds: float
+    rows_per_sec: int
+
+
 class ResponseGetStatusTask(BaseModel):
     """Схема ответа проверки статуса задачи"""
 
@@ -33,6 +45,13 @@ class ResponseCreateXlsxMenu(BaseModel):
     """ "Схема ответа генерации .xlsx меню"""
 
     detail: str
+    task_id: str
+
+
+class ResponseCreateXlsxMenuReady(ResponseCreateXlsxMenu):
+    """Схема ответа генерации .xlsx меню, если файл текущего меню уже готов"""
+
+    download_link: str
 
 
 """СХЕМЫ ОШИБОК / 404"""  # Схемы ошибок составлены на будущее
@@ -225,3 +244,47 @@ class DeleteRestaurantDishSchema(BaseModel):
 
     status: bool
     message: str
+
+
+"""СХЕМЫ ПАКЕТНЫХ ОПЕРАЦИЙ"""
+
+
+class RequestBulkPatchRestaurantSubMenuSchema(RequestPatchRestaurantSubMenuSchema):
+    """Схема элемента пакетного PATCH запроса подменю"""
+
+    id: int
+
+
+class RequestBulkPatchRestaurantDishSchema(RequestPatchRestaurantDishSchema):
+    """Схема элемента пакетного PATCH запроса блюд"""
+
+    id: int
+
+
+class RequestBulkDeleteSchema(BaseModel):
+    """Схема пакетного DELETE запроса"""
+
+    ids: conlist(int, min_items=1, max_items=BULK_MAX_ITEMS)
+
+
+class ResponseBulkDeleteSchema(BaseModel):
+    """Схема ответа к пакетному DELETE запросу"""
+
+    status: bool
+    message: str
+    ids: list[str]
+
+
+"""СХЕМЫ ДЕРЕВА МЕНЮ"""
+
+
+class TreeRestaurantSubMenuSchema(GetRestaurantSubMenuSchema):
+    """Схема подменю в дереве меню"""
+
+    dishes: list[GetRestaurantDishSchema]
+
+
+class TreeRestaurantMenuSchema(GetRestaurantMenuSchema):
+    """Схема меню в дереве меню"""
+
+    submenus: list[TreeRestaurantSubMenuSchema]
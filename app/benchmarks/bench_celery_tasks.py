@@ -0,0 +1,82 @@
+"""
+Бенчмарк пропускной способности задач генерации .xlsx в процессе воркера.
+Сравнивается запуск каждой задачи в новом event loop с новым соединением
+(asyncio.run и engine_task без пула) и выполнение в event loop и пуле
+соединений процесса воркера (tasks.WorkerRuntime). Задачи выполняются
+в текущем процессе без брокера, на небольшом меню накладные расходы
+на задачу видны лучше всего. Меню создается генератором и удаляется после
+замеров, выгружается весь каталог: запускать на тестовой БД.
+
+Запуск из папки app: python -m benchmarks.bench_celery_tasks --tasks 200
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from restaurant_app.generate_data import generate
+from restaurant_app.models import menus
+from restaurant_app.tasks import start_create_xlsx, worker_runtime
+from settings.settings import db_async_session, engine
+from sqlalchemy import func, select
+
+
+async def setup_data(menu_count: int, sub_menu_count: int, dish_count: int) -> int:
+    """Создание меню, возвращает последний id меню до создания"""
+    async with engine.begin() as conn:
+        last_id = await conn.scalar(select(func.max(menus.c.id))) or 0
+    async with db_async_session() as asyn_db:
+        await generate(asyn_db, menu_count, sub_menu_count, dish_count)
+    await engine.dispose()
+    return last_id
+
+
+async def cleanup(last_id: int) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(menus.delete().where(menus.c.id > last_id))
+    await engine.dispose()
+
+
+def measure(tasks: int) -> float:
+    """Среднее время одной задачи (мс)"""
+    start = time.perf_counter()
+    for num in range(tasks):
+        start_create_xlsx(f"bench_task_{num}")
+    seconds = time.perf_counter() - start
+    for num in range(tasks):
+        os.remove(f"storage/bench_task_{num}.xlsx")
+    return seconds / tasks * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--menus", type=int, default=1)
+    parser.add_argument("--submenus", type=int, default=10)
+    parser.add_argument("--dishes", type=int, default=10)
+    args = parser.parse_args()
+    last_id = asyncio.run(setup_data(args.menus, args.submenus, args.dishes))
+    try:
+        # Прогрев: импорт модулей, кеш подготовленных запросов
+        measure(5)
+        per_task = measure(args.tasks)
+        worker_runtime.start()
+        try:
+            measure(5)
+            persistent = measure(args.tasks)
+        finally:
+            worker_runtime.stop()
+    finally:
+        asyncio.run(cleanup(last_id))
+    print(f"{'mode':>22} {'ms/task':>8} {'tasks/sec':>10}")
+    for mode, ms in (
+        ("asyncio.run, no pool", per_task),
+        ("worker loop and pool", persistent),
+    ):
+        print(f"{mode:>22} {ms:8.2f} {1000 / ms:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
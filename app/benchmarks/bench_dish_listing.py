@@ -0,0 +1,97 @@
+"""
+Бенчмарк списка блюд подменю при росте общего числа блюд в БД.
+Сравнивается прежняя выборка всех блюд (dish.select() без условия)
+и выборка блюд подменю по индексу (sub_menu_id, id).
+Бенчмарк создает свое меню и удаляет его после замеров.
+
+Запуск из папки app: python -m benchmarks.bench_dish_listing --calls 200
+"""
+import argparse
+import asyncio
+import time
+
+from restaurant_app.crud import CrudDish
+from restaurant_app.models import dish, menus, sub_menus
+from settings.settings import db_async_session, engine
+from sqlalchemy import text
+
+DISHES_IN_SUB_MENU = 10
+FILL_QUERY = text(
+    """
+    insert into "RestaurantDish" (sub_menu_id, title, description, price)
+    select :sub_menu_id, 'Bench dish ' || n, 'Bench dish', 1.5
+    from generate_series(1, :count) n
+    """
+)
+
+
+async def measure(calls: int, load) -> float:
+    """Среднее время одного запроса (мкс)"""
+    async with db_async_session() as asyn_db:
+        await load(asyn_db)
+        start = time.perf_counter()
+        for _ in range(calls):
+            await load(asyn_db)
+    return (time.perf_counter() - start) / calls * 1_000_000
+
+
+async def run(calls: int, sizes: list[int]) -> list[tuple[int, float, float]]:
+    async with engine.begin() as conn:
+        menu_id = (
+            await conn.execute(
+                menus.insert().values(title="Bench", description="Bench")
+            )
+        ).inserted_primary_key[0]
+        sub_menu_id, filler_id = [
+            (
+                await conn.execute(
+                    sub_menus.insert().values(
+                        menu_id=menu_id, title="Bench", description="Bench"
+                    )
+                )
+            ).inserted_primary_key[0]
+            for _ in range(2)
+        ]
+        await conn.execute(
+            FILL_QUERY, {"sub_menu_id": sub_menu_id, "count": DISHES_IN_SUB_MENU}
+        )
+
+    async def scoped(asyn_db):
+        return await CrudDish.get_dish_db(menu_id, sub_menu_id, asyn_db)
+
+    async def unscoped(asyn_db):
+        return (await asyn_db.execute(dish.select())).all()
+
+    results = []
+    total = 0
+    try:
+        for size in sizes:
+            async with engine.begin() as conn:
+                await conn.execute(
+                    FILL_QUERY, {"sub_menu_id": filler_id, "count": size - total}
+                )
+                await conn.execute(text('analyze "RestaurantDish"'))
+            total = size
+            results.append(
+                (size, await measure(calls, unscoped), await measure(calls, scoped))
+            )
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(menus.delete().where(menus.c.id == menu_id))
+        await engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    args = parser.parse_args()
+    results = asyncio.run(run(args.calls, sorted(args.sizes)))
+    print(f"{'dishes':>8} {'all dishes, us':>16} {'by sub_menu, us':>16}")
+    for size, unscoped, scoped in results:
+        print(f"{size:>8} {unscoped:16.1f} {scoped:16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,519 @@
+"""
+Нагрузочный бенчмарк HTTP API: RPS и задержка p50/p95/p99 по каждому маршруту.
+
+Сценарии:
+  cold  - чтения с пустым кешем: перед каждым раундом Redis очищается (FLUSHDB),
+          локальный кеш отключен, раунд - все маршруты чтения одного набора id;
+  warm  - чтения прогретого рабочего набора записей;
+  write - смесь записи и чтения (доля записи --write-ratio): циклы
+          создание/изменение/удаление меню, подменю, блюд, пакетные маршруты,
+          импорт и загрузка тестовых данных;
+  metrics - последовательные запросы метрик (отчет по памяти Redis обходит
+          все ключи и в общей смеси искажал бы задержки остальных маршрутов).
+Режимы: inprocess - приложение в этом же процессе через httpx.AsyncClient(app=app),
+uvicorn - отдельный процесс uvicorn (на сценарий свой процесс, кеш процесса пуст).
+Маршруты .xlsx требуют воркер и брокер Celery и в бенчмарк не входят.
+
+Бенчмарк создает свои данные генератором и удаляет все меню, созданные
+за время запуска. Redis очищается: запускать только на тестовых Postgres/Redis.
+
+Запуск из папки app:
+python -m benchmarks.bench_http --mode inprocess --output bench.json
+python -m benchmarks.bench_http --mode uvicorn --compare bench.json
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+import orjson
+from api.v1.apps import app
+from restaurant_app.cache_module import CacheMenu
+from restaurant_app.generate_data import generate
+from restaurant_app.local_cache import local_cache
+from restaurant_app.models import dish, menus, sub_menus
+from settings.settings import cache_redis, db_async_session, engine
+from sqlalchemy import func, select
+
+SCENARIOS = ("cold", "warm", "write", "metrics")
+# Число наборов id в рабочем наборе прогретого сценария
+WARM_SET_SIZE = 20
+UVICORN_PORT = 8765
+UVICORN_START_TIMEOUT = 30
+
+
+class Recorder:
+
+    """Накопитель задержек (сек) и ошибок по маршрутам"""
+
+    def __init__(self) -> None:
+        self.latencies: defaultdict[str, list[float]] = defaultdict(list)
+        self.errors: defaultdict[str, int] = defaultdict(int)
+        self.elapsed = 0.0
+
+    async def request(self, client, route: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[route].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors[route] += 1
+        return response
+
+    def report(self) -> dict:
+        """Итог сценария: RPS считается по времени всего сценария"""
+        endpoints = {
+            route: summary(latencies, self.errors[route], self.elapsed)
+            for route, latencies in sorted(self.latencies.items())
+        }
+        every = [value for values in self.latencies.values() for value in values]
+        return {
+            "elapsed_sec": round(self.elapsed, 3),
+            "total": summary(every, sum(self.errors.values()), self.elapsed),
+            "endpoints": endpoints,
+        }
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """Перцентиль по ближайшему рангу для отсортированного списка"""
+    return values[max(math.ceil(percent / 100 * len(values)) - 1, 0)]
+
+
+def summary(latencies: list[float], errors: int, elapsed: float) -> dict:
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "rps": round(len(values) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(values) / len(values) * 1000, 3),
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+    }
+
+
+def read_requests(menu_id: int, sub_menu_id: int, dish_id: int) -> list[tuple]:
+    """Запросы ко всем маршрутам чтения для одного набора id"""
+    menu_url = f"/api/v1/menus/{menu_id}"
+    sub_menu_url = f"{menu_url}/submenus/{sub_menu_id}"
+    return [
+        (
+            "GET /api/v1/menus",
+            "GET",
+            "/api/v1/menus",
+            {"params": {"after_id": menu_id - 1, "limit": 10}},
+        ),
+        ("GET /api/v1/menus/tree", "GET", "/api/v1/menus/tree", {}),
+        ("GET /api/v1/menus/{menu_id}", "GET", menu_url, {}),
+        (
+            "GET /api/v1/menus/{menu_id}/submenus",
+            "GET",
+            f"{menu_url}/submenus",
+            {"params": {"after_id": sub_menu_id - 1, "limit": 10}},
+        ),
+        ("GET /api/v1/menus/{menu_id}/submenus/{sub_menu_id}", "GET", sub_menu_url, {}),
+        (
+            "GET /api/v1/menus/{menu_id}/submenus/{sub_menu_id}/dishes",
+            "GET",
+            f"{sub_menu_url}/dishes",
+            {"params": {"after_id": dish_id - 1, "limit": 10}},
+        ),
+        (
+            "GET /api/v1/menus/{menu_id}/submenus/{sub_menu_id}/dishes/{dish_id}",
+            "GET",
+            f"{sub_menu_url}/dishes/{dish_id}",
+            {},
+        ),
+    ]
+
+
+METRICS_REQUESTS = [
+    ("GET /api/v1/metrics", "GET", "/api/v1/metrics", {}),
+    ("GET /api/v1/metrics/cache_memory", "GET", "/api/v1/metrics/cache_memory", {}),
+]
+
+
+def dish_body(rng: random.Random) -> dict:
+    return {
+        "title": f"Bench dish {rng.randrange(10**6)}",
+        "description": "Bench dish",
+        "price": round(rng.uniform(10, 1000), 2),
+    }
+
+
+def named_body(rng: random.Random, name: str) -> dict:
+    return {"title": f"Bench {name} {rng.randrange(10**6)}", "description": name}
+
+
+async def write_menu(client, rec: Recorder, rng, data: dict) -> None:
+    """Цикл создание/изменение/удаление меню"""
+    response = await rec.request(
+        client,
+        "POST /api/v1/menus",
+        "POST",
+        "/api/v1/menus",
+        json=named_body(rng, "menu"),
+    )
+    url = f"/api/v1/menus/{response.json()['id']}"
+    route = "/api/v1/menus/{menu_id}"
+    await rec.request(
+        client, f"PATCH {route}", "PATCH", url, json=named_body(rng, "menu")
+    )
+    await rec.request(client, f"DELETE {route}", "DELETE", url)
+
+
+async def write_sub_menu(client, rec: Recorder, rng, data: dict) -> None:
+    """Цикл создание/изменение/удаление подменю"""
+    menu_id = rng.choice(data["menus"])
+    route = "/api/v1/menus/{menu_id}/submenus"
+    url = f"/api/v1/menus/{menu_id}/submenus"
+    response = await rec.request(
+        client, f"POST {route}", "POST", url, json=named_body(rng, "submenu")
+    )
+    url = f"{url}/{response.json()['id']}"
+    route = f"{route}/{{sub_menu_id}}"
+    body = named_body(rng, "submenu")
+    await rec.request(client, f"PATCH {route}", "PATCH", url, json=body)
+    await rec.request(client, f"DELETE {route}", "DELETE", url)
+
+
+async def write_dish(client, rec: Recorder, rng, data: dict) -> None:
+    """Цикл создание/изменение/удаление блюда"""
+    menu_id, sub_menu_id = rng.choice(data["sub_menus"])
+    route = "/api/v1/menus/{menu_id}/submenus/{sub_menu_id}/dishes"
+    url = f"/api/v1/menus/{menu_id}/submenus/{sub_menu_id}/dishes"
+    response = await rec.request(
+        client, f"POST {route}", "POST", url, json=dish_body(rng)
+    )
+    url = f"{url}/{response.json()['id']}"
+    route = f"{route}/{{dish_id}}"
+    await rec.request(client, f"PATCH {route}", "PATCH", url, json=dish_body(rng))
+    await rec.request(client, f"DELETE {route}", "DELETE", url)
+
+
+async def write_bulk(client, rec: Recorder, rng, data: dict) -> None:
+    """Цикл пакетных операций над подменю и блюдами (по 10 записей)"""
+    menu_id, sub_menu_id = rng.choice(data["sub_menus"])
+    for route, url, make_body in (
+        (
+            "/api/v1/menus/{menu_id}/submenus/bulk",
+            f"/api/v1/menus/{menu_id}/submenus/bulk",
+            lambda: named_body(rng, "submenu"),
+        ),
+        (
+            "/api/v1/menus/{menu_id}/submenus/{sub_menu_id}/dishes/bulk",
+            f"/api/v1/menus/{menu_id}/submenus/{sub_menu_id}/dishes/bulk",
+            lambda: dish_body(rng),
+        ),
+    ):
+        body = [make_body() for _ in range(10)]
+        response = await rec.request(client, f"POST {route}", "POST", url, json=body)
+        ids = [int(obj["id"]) for obj in response.json()]
+        body = [{**make_body(), "id": obj_id} for obj_id in ids]
+        await rec.request(client, f"PATCH {route}", "PATCH", url, json=body)
+        await rec.request(client, f"DELETE {route}", "DELETE", url, json={"ids": ids})
+
+
+async def write_import(client, rec: Recorder, rng, data: dict) -> None:
+    """Импорт небольшого меню из CSV и загрузка тестовых данных"""
+    menu_title = f"Bench import {rng.randrange(10**6)}"
+    rows = "".join(
+        f"{menu_title},Import,Sub {num % 3},Import,Dish {num},Import,{num + 0.5}\n"
+        for num in range(30)
+    )
+    header = ",".join(
+        (
+            "menu_title",
+            "menu_description",
+            "submenu_title",
+            "submenu_description",
+            "dish_title",
+            "dish_description",
+            "price",
+        )
+    )
+    await rec.request(
+        client,
+        "POST /api/v1/import",
+        "POST",
+        "/api/v1/import",
+        content=f"{header}\n{rows}".encode(),
+    )
+    await rec.request(client, "GET /api/v1/load_data", "GET", "/api/v1/load_data")
+
+
+# Циклы записи и их веса в смеси
+WRITE_CYCLES = (
+    (write_dish, 6),
+    (write_sub_menu, 3),
+    (write_menu, 2),
+    (write_bulk, 1),
+    (write_import, 1),
+)
+
+
+async def run_cold(client, data: dict, args) -> Recorder:
+    """Раунды чтения после очистки кеша, запросы раунда идут параллельно"""
+    rec = Recorder()
+    enabled, local_cache.enabled = local_cache.enabled, False
+    try:
+        for round_no in range(args.rounds):
+            await cache_redis.flushdb()
+            local_cache.clear()
+            requests = read_requests(*data["dishes"][round_no % len(data["dishes"])])
+            start = time.perf_counter()
+            await asyncio.gather(
+                *(
+                    rec.request(client, route, method, url, **kwargs)
+                    for route, method, url, kwargs in requests
+                )
+            )
+            rec.elapsed += time.perf_counter() - start
+    finally:
+        local_cache.enabled = enabled
+    return rec
+
+
+async def run_workers(client, args, worker) -> Recorder:
+    """Запуск --concurrency воркеров, всего --requests итераций"""
+    rec = Recorder()
+    counter = iter(range(args.requests))
+
+    async def loop(worker_no: int) -> None:
+        rng = random.Random(f"{args.seed}:{worker_no}")
+        for _ in counter:
+            await worker(client, rec, rng)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(loop(num) for num in range(args.concurrency)))
+    rec.elapsed = time.perf_counter() - start
+    return rec
+
+
+async def run_warm(client, data: dict, args) -> Recorder:
+    working_set = [
+        request
+        for ids in data["dishes"][:WARM_SET_SIZE]
+        for request in read_requests(*ids)
+    ]
+    for route, method, url, kwargs in working_set:
+        await client.request(method, url, **kwargs)
+
+    async def read(client, rec, rng):
+        route, method, url, kwargs = rng.choice(working_set)
+        await rec.request(client, route, method, url, **kwargs)
+
+    return await run_workers(client, args, read)
+
+
+async def run_write(client, data: dict, args) -> Recorder:
+    reads = [
+        request
+        for ids in data["dishes"][:WARM_SET_SIZE]
+        for request in read_requests(*ids)
+    ]
+    cycles, weights = zip(*WRITE_CYCLES)
+
+    async def mixed(client, rec, rng):
+        if rng.random() < args.write_ratio:
+            cycle = rng.choices(cycles, weights)[0]
+            await cycle(client, rec, rng, data)
+        else:
+            route, method, url, kwargs = rng.choice(reads)
+            await rec.request(client, route, method, url, **kwargs)
+
+    return await run_workers(client, args, mixed)
+
+
+async def run_metrics(client, data: dict, args) -> Recorder:
+    rec = Recorder()
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for route, method, url, kwargs in METRICS_REQUESTS:
+            await rec.request(client, route, method, url, **kwargs)
+    rec.elapsed = time.perf_counter() - start
+    return rec
+
+
+RUNNERS = {
+    "cold": run_cold,
+    "warm": run_warm,
+    "write": run_write,
+    "metrics": run_metrics,
+}
+
+
+async def setup_data(args) -> tuple[int, dict]:
+    """Генерация данных бенчмарка, возвращает последний id меню до генерации"""
+    async with db_async_session() as asyn_db:
+        last_id = await asyn_db.scalar(select(func.max(menus.c.id))) or 0
+        await generate(asyn_db, args.menus, args.submenus, args.dishes, args.seed)
+        query = (
+            select(menus.c.id, sub_menus.c.id, dish.c.id)
+            .join(sub_menus, sub_menus.c.menu_id == menus.c.id)
+            .join(dish, dish.c.sub_menu_id == sub_menus.c.id)
+            .where(menus.c.id > last_id)
+            .order_by(dish.c.id)
+        )
+        dishes = [tuple(row) for row in (await asyn_db.execute(query)).all()]
+    random.Random(args.seed).shuffle(dishes)
+    data = {
+        "dishes": dishes,
+        "sub_menus": sorted({(menu_id, sub_id) for menu_id, sub_id, _ in dishes}),
+        "menus": sorted({menu_id for menu_id, _, _ in dishes}),
+    }
+    return last_id, data
+
+
+async def cleanup(last_id: int) -> None:
+    """Удаление всех меню, созданных за время бенчмарка"""
+    async with db_async_session() as asyn_db:
+        await asyn_db.execute(menus.delete().where(menus.c.id > last_id))
+        await asyn_db.commit()
+    await CacheMenu.clear_cache(cache_redis)
+
+
+def start_uvicorn(local_cache_enabled: bool) -> subprocess.Popen:
+    env = {**os.environ, "LOCAL_CACHE_ENABLED": str(local_cache_enabled).lower()}
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "api.v1.apps:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(UVICORN_PORT),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+    )
+
+
+async def wait_ready(client) -> None:
+    deadline = time.monotonic() + UVICORN_START_TIMEOUT
+    while True:
+        try:
+            if (await client.get("/api/v1/metrics")).status_code == 200:
+                return
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+        await asyncio.sleep(0.2)
+
+
+async def run_scenario(name: str, data: dict, args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    if args.mode == "inprocess":
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            return (await RUNNERS[name](client, data, args)).report()
+    # Процесс uvicorn на каждый сценарий: в холодном локальный кеш выключен
+    server = start_uvicorn(local_cache_enabled=name != "cold")
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{UVICORN_PORT}", limits=limits, timeout=30
+        ) as client:
+            await wait_ready(client)
+            return (await RUNNERS[name](client, data, args)).report()
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    last_id, data = await setup_data(args)
+    results = {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "params": {
+            key: value for key, value in vars(args).items() if key not in ("output",)
+        },
+        "scenarios": {},
+    }
+    try:
+        for name in args.scenarios:
+            results["scenarios"][name] = await run_scenario(name, data, args)
+    finally:
+        await cleanup(last_id)
+        await engine.dispose()
+    return results
+
+
+def print_results(results: dict, base: dict | None = None) -> None:
+    """Таблица результатов, с --compare - изменение p50/p95 к базовому запуску"""
+    for name, scenario in results["scenarios"].items():
+        print(f"\n[{name}] {scenario['elapsed_sec']} s")
+        print(
+            f"{'route':<72} {'req':>6} {'err':>4} {'rps':>8} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        )
+        base_endpoints = (base or {}).get("scenarios", {}).get(name, {})
+        base_endpoints = base_endpoints.get("endpoints", {})
+        rows = {**scenario["endpoints"], "TOTAL": scenario["total"]}
+        for route, row in rows.items():
+            line = (
+                f"{route:<72} {row['requests']:>6} {row['errors']:>4} "
+                f"{row['rps']:>8} {row['p50_ms']:>8} {row['p95_ms']:>8} "
+                f"{row['p99_ms']:>8}"
+            )
+            old = base_endpoints.get(route)
+            if route == "TOTAL" and base:
+                old = base["scenarios"].get(name, {}).get("total")
+            if old:
+                line += (
+                    f"  p50 {row['p50_ms'] - old['p50_ms']:+.3f}"
+                    f" p95 {row['p95_ms'] - old['p95_ms']:+.3f}"
+                )
+            print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn"), default="inprocess")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--write-ratio", type=float, default=0.5)
+    parser.add_argument("--menus", type=int, default=5)
+    parser.add_argument("--submenus", type=int, default=5)
+    parser.add_argument("--dishes", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="файл для сохранения результатов в JSON")
+    parser.add_argument("--compare", help="JSON прошлого запуска для сравнения")
+    args = parser.parse_args()
+    results = asyncio.run(run(args))
+    base = None
+    if args.compare:
+        with open(args.compare, "rb") as file:
+            base = orjson.loads(file.read())
+    print_results(results, base)
+    if args.output:
+        with open(args.output, "wb") as file:
+            file.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
+
+
+if __name__ == "__main__":
+    main()
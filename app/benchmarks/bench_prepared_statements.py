@@ -0,0 +1,66 @@
+"""
+Микро-бенчмарк запросов меню/подменю: текст запроса с подставленным id
+(как было раньше) против запроса с параметрами.
+Каждый новый текст запроса asyncpg заново подготавливает (parse + plan),
+запрос с параметрами подготавливается один раз на соединение.
+
+Запуск из папки app: python -m benchmarks.bench_prepared_statements --calls 2000
+"""
+import argparse
+import asyncio
+import time
+
+from restaurant_app.crud import (
+    MENU_QUERY,
+    SUB_MENU_QUERY,
+    menu_by_id_query,
+    sub_menu_by_id_query,
+)
+from settings.settings import engine
+from sqlalchemy import text
+
+
+async def measure(conn, calls: int, make_query) -> float:
+    """Среднее время одного запроса (мкс) на calls разных id"""
+    start = time.perf_counter()
+    for num in range(1, calls + 1):
+        await conn.execute(*make_query(num))
+    return (time.perf_counter() - start) / calls * 1_000_000
+
+
+async def run(calls: int) -> dict[str, float]:
+    cases = {
+        "menu_literal": lambda num: (text(MENU_QUERY + f"where rm.id={num}"),),
+        "menu_bound": lambda num: (menu_by_id_query, {"menu_id": num}),
+        "sub_menu_literal": lambda num: (
+            text(SUB_MENU_QUERY.replace(":menu_id", str(num)) + f"and rsm.id={num}"),
+        ),
+        "sub_menu_bound": lambda num: (
+            sub_menu_by_id_query,
+            {"menu_id": num, "sub_menu_id": num},
+        ),
+    }
+    results = {}
+    async with engine.connect() as conn:
+        for name, make_query in cases.items():
+            # Прогрев соединения, кеша запросов SQLAlchemy и asyncpg
+            await measure(conn, 10, make_query)
+            results[name] = await measure(conn, calls, make_query)
+    await engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+    results = asyncio.run(run(args.calls))
+    for name, per_call in results.items():
+        print(f"{name:<18} {per_call:10.1f} us/call")
+    for entity in ("menu", "sub_menu"):
+        saved = results[f"{entity}_literal"] - results[f"{entity}_bound"]
+        print(f"{entity}: prepare/plan overhead per call ~{saved:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Бенчмарк генерации .xlsx файла меню: время и пиковая память (max RSS)
+при росте числа блюд. Сравнивается потоковая выгрузка (серверный курсор и
+xlsxwriter в режиме constant_memory) с прежней: все дерево меню одним
+JSON (json_agg) и обычный Workbook, хранящий все ячейки в памяти.
+Каждая выгрузка идет в отдельном процессе, что бы max RSS не накапливался.
+Данные создаются генератором (100 подменю × 100 блюд в меню) и удаляются
+после замеров. Выгружается весь каталог: запускать на пустой тестовой БД.
+
+Запуск из папки app: python -m benchmarks.bench_xlsx --sizes 100000 1000000
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import uuid
+
+import xlsxwriter
+from restaurant_app.crud import menu_tree_agg
+from restaurant_app.generate_data import generate
+from restaurant_app.models import menus
+from restaurant_app.tasks import create_xlsx
+from settings.settings import db_async_session, engine, engine_task
+from sqlalchemy import func, select
+
+SUB_MENUS_IN_MENU = 100
+DISHES_IN_SUB_MENU = 100
+MODES = ("stream", "tree")
+
+
+async def create_xlsx_tree(unique_name: str) -> None:
+    """Прежняя генерация: дерево меню целиком в памяти, обычный Workbook"""
+    async with engine_task.connect() as conn:
+        tree = (await conn.execute(select(menu_tree_agg()))).scalar()
+    workbook = xlsxwriter.Workbook(f"storage/{unique_name}.xlsx")
+    worksheet = workbook.add_worksheet()
+    row = -1
+    for num_menu, menu in enumerate(tree, 1):
+        row += 1
+        worksheet.write_row(row, 0, (num_menu, menu["title"], menu["description"]))
+        for num_submenu, sub_menu in enumerate(menu["submenus"], 1):
+            row += 1
+            worksheet.write_row(
+                row, 1, (num_submenu, sub_menu["title"], sub_menu["description"])
+            )
+            for num_dish, dish in enumerate(sub_menu["dishes"], 1):
+                row += 1
+                worksheet.write_row(
+                    row,
+                    2,
+                    (
+                        num_dish,
+                        dish["title"],
+                        dish["description"],
+                        f"{round(float(dish['price']), 2):.2f}",
+                    ),
+                )
+    workbook.close()
+
+
+def export(mode: str) -> dict:
+    """Выгрузка в текущем процессе, время (сек), max RSS (МБ) и размер файла"""
+    unique_name = f"bench_{uuid.uuid4()}"
+    writer = create_xlsx if mode == "stream" else create_xlsx_tree
+    start = time.perf_counter()
+    asyncio.run(writer(unique_name))
+    seconds = time.perf_counter() - start
+    path = f"storage/{unique_name}.xlsx"
+    size = os.path.getsize(path)
+    os.remove(path)
+    return {
+        "seconds": round(seconds, 2),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024),
+        "file_mb": round(size / 1024 / 1024, 1),
+    }
+
+
+def run_export(mode: str) -> dict | None:
+    """Выгрузка в отдельном процессе, None - процесс завершился с ошибкой"""
+    process = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_xlsx", "--export", mode],
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode:
+        print(process.stderr.strip().splitlines()[-1], file=sys.stderr)
+        return None
+    return json.loads(process.stdout)
+
+
+async def run(sizes: list[int], modes: list[str]) -> list[tuple[int, str, dict]]:
+    async with engine.begin() as conn:
+        last_id = await conn.scalar(select(func.max(menus.c.id))) or 0
+    results = []
+    menu_count = 0
+    try:
+        for size in sizes:
+            count = max(size // (SUB_MENUS_IN_MENU * DISHES_IN_SUB_MENU), 1)
+            async with db_async_session() as asyn_db:
+                await generate(
+                    asyn_db,
+                    count - menu_count,
+                    SUB_MENUS_IN_MENU,
+                    DISHES_IN_SUB_MENU,
+                    seed=size,
+                )
+            menu_count = count
+            for mode in modes:
+                results.append((size, mode, run_export(mode)))
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(menus.delete().where(menus.c.id > last_id))
+        await engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--export", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.export:
+        print(json.dumps(export(args.export)))
+        return
+    results = asyncio.run(run(sorted(args.sizes), args.modes))
+    print(
+        f"{'dishes':>8} {'mode':>7} {'seconds':>8} {'max RSS, MB':>12} {'file, MB':>9}"
+    )
+    for size, mode, stats in results:
+        if stats is None:
+            print(f"{size:>8} {mode:>7} {'failed':>8}")
+            continue
+        print(
+            f"{size:>8} {mode:>7} {stats['seconds']:8.2f} "
+            f"{stats['max_rss_mb']:12} {stats['file_mb']:9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""CounterColumns
+
+Revision ID: 3f1c9a7d2b64
+Revises: 8ab765c62295
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3f1c9a7d2b64"
+down_revision = "8ab765c62295"
+branch_labels = None
+depends_on = None
+
+# Счетчики поддерживаются триггерами уровня оператора с таблицами переходов:
+# один UPDATE на оператор (в том числе на массовую вставку и каскадное удаление),
+# а не на каждую строку. При каскадном удалении подменю триггер блюд уже не
+# находит подменю, поэтому счетчик блюд меню уменьшает триггер подменю.
+TRIGGERS_SQL = """
+CREATE FUNCTION dish_counters_insert() RETURNS trigger AS $$
+BEGIN
+    UPDATE "RestaurantSubMenu" rsm SET dishes_count = rsm.dishes_count + d.cnt
+    FROM (SELECT sub_menu_id, count(*) AS cnt FROM new_rows GROUP BY sub_menu_id) d
+    WHERE rsm.id = d.sub_menu_id;
+    UPDATE "RestaurantMenu" rm SET dishes_count = rm.dishes_count + d.cnt
+    FROM (SELECT rsm.menu_id, count(*) AS cnt FROM new_rows
+        JOIN "RestaurantSubMenu" rsm ON rsm.id = new_rows.sub_menu_id
+        GROUP BY rsm.menu_id) d
+    WHERE rm.id = d.menu_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION dish_counters_delete() RETURNS trigger AS $$
+BEGIN
+    UPDATE "RestaurantSubMenu" rsm SET dishes_count = rsm.dishes_count - d.cnt
+    FROM (SELECT sub_menu_id, count(*) AS cnt FROM old_rows GROUP BY sub_menu_id) d
+    WHERE rsm.id = d.sub_menu_id;
+    UPDATE "RestaurantMenu" rm SET dishes_count = rm.dishes_count - d.cnt
+    FROM (SELECT rsm.menu_id, count(*) AS cnt FROM old_rows
+        JOIN "RestaurantSubMenu" rsm ON rsm.id = old_rows.sub_menu_id
+        GROUP BY rsm.menu_id) d
+    WHERE rm.id = d.menu_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION sub_menu_counters_insert() RETURNS trigger AS $$
+BEGIN
+    UPDATE "RestaurantMenu" rm
+    SET submenus_count = rm.submenus_count + d.cnt,
+        dishes_count = rm.dishes_count + d.dishes
+    FROM (SELECT menu_id, count(*) AS cnt, sum(dishes_count) AS dishes
+        FROM new_rows GROUP BY menu_id) d
+    WHERE rm.id = d.menu_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION sub_menu_counters_delete() RETURNS trigger AS $$
+BEGIN
+    UPDATE "RestaurantMenu" rm
+    SET submenus_count = rm.submenus_count - d.cnt,
+        dishes_count = rm.dishes_count - d.dishes
+    FROM (SELECT menu_id, count(*) AS cnt, sum(dishes_count) AS dishes
+        FROM old_rows GROUP BY menu_id) d
+    WHERE rm.id = d.menu_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER dish_counters_insert AFTER INSERT ON "RestaurantDish"
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION dish_counters_insert();
+CREATE TRIGGER dish_counters_delete AFTER DELETE ON "RestaurantDish"
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION dish_counters_delete();
+CREATE TRIGGER sub_menu_counters_insert AFTER INSERT ON "RestaurantSubMenu"
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sub_menu_counters_insert();
+CREATE TRIGGER sub_menu_counters_delete AFTER DELETE ON "RestaurantSubMenu"
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sub_menu_counters_delete();
+"""
+
+BACKFILL_SQL = """
+UPDATE "RestaurantSubMenu" rsm SET dishes_count = d.cnt
+FROM (SELECT sub_menu_id, count(*) AS cnt FROM "RestaurantDish" GROUP BY sub_menu_id) d
+WHERE rsm.id = d.sub_menu_id;
+
+UPDATE "RestaurantMenu" rm SET submenus_count = d.cnt, dishes_count = d.dishes
+FROM (SELECT menu_id, count(*) AS cnt, sum(dishes_count) AS dishes
+    FROM "RestaurantSubMenu" GROUP BY menu_id) d
+WHERE rm.id = d.menu_id;
+"""
+
+DROP_TRIGGERS_SQL = """
+DROP TRIGGER sub_menu_counters_delete ON "RestaurantSubMenu";
+DROP TRIGGER sub_menu_counters_insert ON "RestaurantSubMenu";
+DROP TRIGGER dish_counters_delete ON "RestaurantDish";
+DROP TRIGGER dish_counters_insert ON "RestaurantDish";
+DROP FUNCTION sub_menu_counters_delete();
+DROP FUNCTION sub_menu_counters_insert();
+DROP FUNCTION dish_counters_delete();
+DROP FUNCTION dish_counters_insert();
+"""
+
+
+def upgrade() -> None:
+    op.add_column(
+        "RestaurantMenu",
+        sa.Column("submenus_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "RestaurantMenu",
+        sa.Column("dishes_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "RestaurantSubMenu",
+        sa.Column("dishes_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    # Заполнение счетчиков и создание триггеров в одной транзакции миграции
+    op.execute('LOCK TABLE "RestaurantSubMenu", "RestaurantDish" IN SHARE MODE')
+    op.execute(BACKFILL_SQL)
+    op.execute(TRIGGERS_SQL)
+
+
+def downgrade() -> None:
+    op.execute(DROP_TRIGGERS_SQL)
+    op.drop_column("RestaurantSubMenu", "dishes_count")
+    op.drop_column("RestaurantMenu", "dishes_count")
+    op.drop_column("RestaurantMenu", "submenus_count")
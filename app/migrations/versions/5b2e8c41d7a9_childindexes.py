@@ -0,0 +1,36 @@
+"""ChildIndexes
+
+Revision ID: 5b2e8c41d7a9
+Revises: 3f1c9a7d2b64
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5b2e8c41d7a9"
+down_revision = "3f1c9a7d2b64"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Postgres не индексирует внешние ключи сам: без индексов выборка
+    # подменю меню и блюд подменю (и каскадное удаление) читает всю таблицу
+    op.create_index(
+        "ix_RestaurantSubMenu_menu_id_id",
+        "RestaurantSubMenu",
+        ["menu_id", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_RestaurantDish_sub_menu_id_id",
+        "RestaurantDish",
+        ["sub_menu_id", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_RestaurantDish_sub_menu_id_id", table_name="RestaurantDish")
+    op.drop_index("ix_RestaurantSubMenu_menu_id_id", table_name="RestaurantSubMenu")
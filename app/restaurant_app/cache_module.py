@@ -1,4 +1,394 @@
-import json
+import random
+
+import orjson
+from settings.settings import (
+    CACHE_SWR_DISH_MAX_STALE,
+    CACHE_SWR_MENU_MAX_STALE,
+    CACHE_SWR_SUBMENU_MAX_STALE,
+    CACHE_TTL_DISH,
+    CACHE_TTL_JITTER,
+    CACHE_TTL_MENU,
+    CACHE_TTL_SUBMENU,
+    COMPRESSION_MIN_SIZE,
+    LIST_PAGE_SIZE,
+    XLSX_TASK_TTL,
+)
+
+from .compression import compress_variants, encoded_key, encoded_keys
+from .local_cache import local_cache, publish_invalidation
+
+# Признак отсутствия записи в кеше. Пустой список тоже валидный ответ,
+# поэтому промах нельзя обозначать через None или пустое значение
+CACHE_MISS = object()
+
+# Счетчик версий каталога, увеличивается при каждой инвалидации (записи в БД),
+# имя ключа продублировано в скриптах. Начальное значение - время Redis в мс,
+# поэтому после очистки Redis версии не повторяют выданные ранее
+CATALOG_VERSION_KEY = "catalog_version"
+CATALOG_VERSION_LUA = """
+local function catalog_version()
+    if redis.call("exists", "catalog_version") == 0 then
+        local now = redis.call("time")
+        redis.call("set", "catalog_version", now[1] * 1000 + math.floor(now[2] / 1000))
+    end
+    return redis.call("get", "catalog_version")
+end
+"""
+# Время жизни версии записи (мс). Истекшая версия заново берется из текущей
+# версии каталога: каталог с тех пор не менялся, иначе версия была бы новее
+VERSION_TTL = 2 * max(CACHE_TTL_MENU, CACHE_TTL_SUBMENU, CACHE_TTL_DISH) * 1000
+# Ключ дерева всех меню, инвалидируется при любой записи
+TREE_KEY = "menu_tree"
+# Сжатые копии записи хранятся рядом с ней под ключами <ключ>:<кодировка>
+# (compression.ENCODINGS), живут и инвалидируются вместе с записью
+ENCODINGS_LUA = """
+local ENCODINGS = {"br", "zstd", "gzip"}
+local function with_encodings(key)
+    local keys = {key}
+    for _, encoding in ipairs(ENCODINGS) do
+        table.insert(keys, key .. ":" .. encoding)
+    end
+    return keys
+end
+"""
+
+# Инвалидация ключей: с положительным max_stale (мс) запись помечается
+# устаревшей и доживает не дольше max_stale с первого изменения
+# (но не дольше своего TTL), остальные записи удаляются сразу.
+# Вместе со списком инвалидируются все его закешированные страницы
+# (множество pages_<ключ списка>). Каждый ключ получает новую версию каталога
+# (ver_<ключ>, из нее строится ETag), скрипт возвращает эту версию и ключи страниц
+INVALIDATE_SCRIPT = (
+    CATALOG_VERSION_LUA
+    + ENCODINGS_LUA
+    + """
+local function invalidate(key, max_stale)
+    if max_stale > 0 then
+        if redis.call("set", "stale_" .. key, 1, "NX", "PX", max_stale) then
+            for _, copy in ipairs(with_encodings(key)) do
+                local ttl = redis.call("pttl", copy)
+                if ttl == -1 or ttl > max_stale then
+                    redis.call("pexpire", copy, max_stale)
+                end
+            end
+        end
+    else
+        redis.call("del", "stale_" .. key, unpack(with_encodings(key)))
+    end
+end
+catalog_version()
+local version = redis.call("incr", "catalog_version")
+local pages = {}
+for i, key in ipairs(KEYS) do
+    local max_stale = tonumber(ARGV[i])
+    invalidate(key, max_stale)
+    redis.call("set", "ver_" .. key, version, "PX", ARGV[#KEYS + 1])
+    for _, page in ipairs(redis.call("smembers", "pages_" .. key)) do
+        invalidate(page, max_stale)
+        table.insert(pages, page)
+    end
+    if max_stale <= 0 then
+        redis.call("del", "pages_" .. key)
+    end
+end
+return {version, pages}
+"""
+)
+
+# Чтение записи (сжатой копии KEYS[4], если она есть), метки устаревания
+# и версии записи за один запрос. Записи без версии (еще не инвалидировались)
+# получают текущую версию каталога
+READ_SCRIPT = (
+    CATALOG_VERSION_LUA
+    + """
+local body = false
+local encoded = 0
+if KEYS[4] ~= KEYS[1] then
+    body = redis.call("get", KEYS[4])
+    if body then
+        encoded = 1
+    end
+end
+if not body then
+    body = redis.call("get", KEYS[1])
+end
+local stale = redis.call("exists", KEYS[2])
+local version = redis.call("get", KEYS[3])
+if body and not version then
+    version = catalog_version()
+    redis.call("set", KEYS[3], version, "PX", ARGV[1])
+end
+return {body, stale, version, encoded}
+"""
+)
+
+# Запись тела (и его сжатых копий KEYS[4..] = ARGV[7..]), прочитанного из БД
+# при версии ARGV[2] ключа KEYS[2] (версия записи либо версия каталога),
+# версия читается до запроса в БД. Если за время запроса версия изменилась
+# (запись инвалидирована), тело устарело и не сохраняется. Страница списка
+# добавляется в множество ARGV[4] с TTL ARGV[5]. Возвращает признак сохранения
+# и версию записи KEYS[3], запись без версии получает текущую версию каталога
+SET_IF_VERSION_SCRIPT = (
+    CATALOG_VERSION_LUA
+    + """
+if (redis.call("get", KEYS[2]) or "") ~= ARGV[2] then
+    return {0}
+end
+redis.call("set", KEYS[1], ARGV[1], "PX", ARGV[3])
+for i = 4, #KEYS do
+    redis.call("set", KEYS[i], ARGV[i + 3], "PX", ARGV[3])
+end
+redis.call("del", "stale_" .. KEYS[1])
+if ARGV[4] ~= "" then
+    redis.call("sadd", ARGV[4], KEYS[1])
+    redis.call("pexpire", ARGV[4], ARGV[5])
+end
+local version = redis.call("get", KEYS[3])
+if not version then
+    version = catalog_version()
+    redis.call("set", KEYS[3], version, "PX", ARGV[6])
+end
+return {1, version}
+"""
+)
+
+
+class CacheData(bytes):
+
+    """
+    Тело ответа из кеша вместе с версией записи (для ETag), кодировкой,
+    если тело уже сжато, и сжатыми копиями только что сохраненного тела
+    """
+
+    version: bytes | None = None
+    encoding: str | None = None
+    variants: dict[str, bytes] = {}
+
+    @classmethod
+    def with_version(
+        cls, body: bytes, version: bytes | None, encoding: str | None = None
+    ) -> "CacheData":
+        data = cls(body)
+        data.version = version
+        data.encoding = encoding
+        return data
+
+
+class StaleCacheData(CacheData):
+
+    """Тело ответа из кеша, помеченное устаревшим и ожидающее пересчета"""
+
+
+def stale_key(key: str) -> str:
+    """Функция получения ключа метки устаревания записи"""
+    return f"stale_{key}"
+
+
+def pages_key(list_key: str) -> str:
+    """Функция получения ключа множества закешированных страниц списка"""
+    return f"pages_{list_key}"
+
+
+def version_key(key: str) -> str:
+    """
+    Функция получения ключа версии записи. Страницы списка меняются
+    только вместе со списком, поэтому у них общая версия списка.
+    """
+    return f"ver_{key.split('_page_', 1)[0]}"
+
+
+def page_key(list_key: str, after_id: int = 0, limit: int = LIST_PAGE_SIZE) -> str:
+    """
+    Функция получения ключа страницы списка. Первая страница с размером
+    по умолчанию хранится под ключом самого списка.
+    """
+    if not after_id and limit == LIST_PAGE_SIZE:
+        return list_key
+    return f"{list_key}_page_{after_id}_{limit}"
+
+
+def ttl_with_jitter(ttl: int) -> int:
+    """Функция получения TTL (мс) со случайным разбросом CACHE_TTL_JITTER"""
+    return int(ttl * 1000 * random.uniform(1 - CACHE_TTL_JITTER, 1 + CACHE_TTL_JITTER))
+
+
+def key_family(key: str) -> str:
+    """Функция определения семейства ключа кеша для отчета по памяти"""
+    if key.startswith(("lock_", "stale_", "xlsx_", "pages_", "ver_")):
+        return key.split("_", 1)[0]
+    if "_dish" in key:
+        return "dish"
+    if "_sub_menus" in key:
+        return "submenu"
+    if key == "menu" or key.startswith("menu_"):
+        return "menu"
+    return "other"
+
+
+def get_local_data(key: str, encoding: str | None = None) -> CacheData | object:
+    """
+    Функция получения записи из локального кеша: сжатой копии, если она есть,
+    либо тела без сжатия, если оно слишком мало для сжатия
+    """
+    body = local_cache.get(encoded_key(key, encoding), CACHE_MISS)
+    if body is CACHE_MISS and encoding is not None:
+        body = local_cache.get(key, CACHE_MISS)
+        # У большого тела есть сжатая копия, ее берем из Redis
+        if body is not CACHE_MISS and len(body) >= COMPRESSION_MIN_SIZE:
+            return CACHE_MISS
+    return body
+
+
+async def get_cache_data(
+    asyn_cache, key: str, encoding: str | None = None
+) -> CacheData | object:
+    """
+    Функция получения готового тела ответа (сжатого в encoding, если такая
+    копия есть) с версией сначала из локального кеша, затем из Redis за один
+    запрос вместе с меткой устаревания.
+    При промахе возвращает CACHE_MISS, устаревшую запись - как StaleCacheData.
+    """
+    body = get_local_data(key, encoding)
+    if body is not CACHE_MISS:
+        return body
+    body, stale, version, encoded = await asyn_cache.eval(
+        READ_SCRIPT,
+        4,
+        key,
+        stale_key(key),
+        version_key(key),
+        encoded_key(key, encoding),
+        VERSION_TTL,
+    )
+    if body is None:
+        return CACHE_MISS
+    encoding = encoding if encoded else None
+    if stale:
+        # Устаревшую запись не кладем в локальный кеш, что бы сразу
+        # увидеть свежую после фонового пересчета
+        return StaleCacheData.with_version(body, version, encoding)
+    body = CacheData.with_version(body, version, encoding)
+    local_cache.set(encoded_key(key, encoding), body)
+    return body
+
+
+async def get_cache_version(
+    asyn_cache, key: str, encoding: str | None = None
+) -> bytes | None:
+    """
+    Функция получения версии записи без чтения самого тела:
+    из локального кеша, иначе одним GET ключа версии
+    """
+    body = get_local_data(key, encoding)
+    if isinstance(body, CacheData) and body.version:
+        return body.version
+    return await asyn_cache.get(version_key(key))
+
+
+async def get_load_version(asyn_cache, key: str) -> bytes | None:
+    """
+    Функция получения версии записи перед запросом в БД, с ней запись
+    сохраняется через set_cache_data. Читается из Redis, а не из локального
+    кеша: локальная копия могла еще не получить сообщение об инвалидации
+    """
+    return await asyn_cache.get(version_key(key))
+
+
+async def store_if_version(
+    asyn_cache,
+    key: str,
+    guard_key: str,
+    body: bytes,
+    version: bytes | None,
+    ttl: int,
+    list_key: str | None = None,
+) -> CacheData:
+    """
+    Функция сохранения тела и его сжатых копий в Redis (с TTL) и локальный
+    кеш, если версия guard_key не изменилась с version. Иначе тело
+    возвращается без версии (без ETag) и не сохраняется.
+    Ключ страницы списка (list_key) запоминается для инвалидации вместе
+    со списком.
+    """
+    variants = compress_variants(body)
+    pages = ""
+    if list_key and key != list_key:
+        pages = pages_key(list_key)
+    stored, *stored_version = await asyn_cache.eval(
+        SET_IF_VERSION_SCRIPT,
+        3 + len(variants),
+        key,
+        guard_key,
+        version_key(key),
+        *(encoded_key(key, encoding) for encoding in variants),
+        body,
+        version or b"",
+        ttl_with_jitter(ttl),
+        pages,
+        # Множество живет не меньше любой своей страницы
+        int(ttl * 1000 * (1 + CACHE_TTL_JITTER)),
+        VERSION_TTL,
+        *variants.values(),
+    )
+    if not stored:
+        return cache_locally(key, body, variants, None)
+    return cache_locally(key, body, variants, *stored_version)
+
+
+async def set_cache_data(
+    asyn_cache,
+    key: str,
+    body: bytes,
+    ttl: int,
+    version: bytes | None,
+    list_key: str | None = None,
+) -> CacheData:
+    """
+    Функция сохранения готового тела ответа, прочитанного из БД при версии
+    записи version (get_load_version). Запись, инвалидированная за время
+    запроса в БД, не перезаписывается старым телом.
+    """
+    return await store_if_version(
+        asyn_cache, key, version_key(key), body, version, ttl, list_key
+    )
+
+
+def cache_locally(
+    key: str, body: bytes, variants: dict[str, bytes], version: bytes | None
+) -> CacheData:
+    """
+    Функция сохранения только что записанного тела и его сжатых копий
+    в локальный кеш. Без версии запись прочитается из Redis, где версия
+    будет назначена.
+    """
+    data = CacheData.with_version(body, version)
+    data.variants = variants
+    if version is not None:
+        local_cache.set(key, data)
+        for encoding, encoded in variants.items():
+            local_cache.set(
+                encoded_key(key, encoding),
+                CacheData.with_version(encoded, version, encoding),
+            )
+    return data
+
+
+async def invalidate_cache_data(asyn_cache, keys: dict[str, float]) -> None:
+    """
+    Функция инвалидации записей в Redis и локальных кешах всех процессов.
+    keys - ключи и максимальное время (сек) отдачи устаревшей записи.
+    """
+    # Любая запись меняет дерево меню
+    keys = {**keys, TREE_KEY: CacheTree.max_stale}
+    _, pages = await asyn_cache.eval(
+        INVALIDATE_SCRIPT,
+        len(keys),
+        *keys,
+        *(int(max_stale * 1000) for max_stale in keys.values()),
+        VERSION_TTL,
+    )
+    keys = [*keys, *(page.decode() for page in pages)]
+    await publish_invalidation(asyn_cache, *keys, *encoded_keys(*keys))
 
 
 class CacheMenu:
@@ -6,13 +396,19 @@ class CacheMenu:
     """Модуль содержащий методы работы с кешем основного меню"""
 
     menu_404 = {"detail": "menu not found"}
+    max_stale = CACHE_SWR_MENU_MAX_STALE
+    ttl = CACHE_TTL_MENU
 
     @staticmethod
-    async def check_cache(async_cache, menu_id: int | None | None = None) -> bool:
-        """Метод проверки существования запрошенного меню в кеше"""
+    def cache_key(
+        menu_id: int | None | None = None,
+        after_id: int = 0,
+        limit: int = LIST_PAGE_SIZE,
+    ) -> str:
+        """Метод получения ключа кеша страницы списка меню либо определенного меню"""
         if menu_id:
-            return bool(await async_cache.exists(f"menu_{menu_id}"))
-        return bool(await async_cache.exists("menu"))
+            return f"menu_{menu_id}"
+        return page_key("menu", after_id, limit)
 
     @classmethod
     async def set_menu(
@@ -20,30 +416,39 @@ class CacheMenu:
         async_cache,
         response_data: dict | list | None,
         menu_id: int | None | None = None,
-    ) -> dict | list | str | None:
-        """Метод сохранения ответа из БД в кеш для меню"""
+        after_id: int = 0,
+        limit: int = LIST_PAGE_SIZE,
+        version: bytes | None = None,
+    ) -> bytes | str:
+        """
+        Метод сохранения ответа из БД в кеш для меню, возвращает тело ответа.
+        version - версия записи, прочитанная до запроса в БД (get_load_version)
+        """
         if response_data == "NotFound":
             # Что бы не кешировать постоянно NotFound на любой новый
             # не существующий id, будем отдавать шаблон
             return "NotFound"
+        body = orjson.dumps(response_data)
         if response_data:
-            if menu_id:
-                await async_cache.hmset(f"menu_{menu_id}", response_data)
-            else:
-                await async_cache.set("menu", json.dumps(response_data))
-        return response_data
+            body = await set_cache_data(
+                async_cache,
+                cls.cache_key(menu_id, after_id, limit),
+                body,
+                cls.ttl,
+                version,
+                cls.cache_key(menu_id),
+            )
+        return body
 
-    @staticmethod
+    @classmethod
     async def get_menu(
-        async_cache, menu_id: int | None | None = None
-    ) -> dict | list | None:
-        """Метод получения меню из кеша"""
-        if menu_id:
-            return await async_cache.hgetall(f"menu_{menu_id}")
-        return json.loads(await async_cache.get("menu"))
+        cls, async_cache, menu_id: int | None | None = None
+    ) -> bytes | object:
+        """Метод получения меню из кеша за один запрос, при промахе CACHE_MISS"""
+        return await get_cache_data(async_cache, cls.cache_key(menu_id))
 
-    @staticmethod
-    async def clear_cache(asyn_cache, menu_id: int | None | None = None) -> None:
+    @classmethod
+    async def clear_cache(cls, asyn_cache, menu_id: int | None | None = None) -> None:
         """
         Метод очистки кеша меню, если запись изменилась/удалилась/добавилась
         в зависимости от типа операции (удаление, редактирование, создание).
@@ -51,10 +456,16 @@ class CacheMenu:
         if menu_id:
             # Если изменилось/удалилось конкретное меню, то
             # удаляем заготовленный список всех меню и конкретное меню из кеша
-            await asyn_cache.delete("menu", f"menu_{menu_id}")
+            await invalidate_cache_data(
+                asyn_cache,
+                {
+                    cls.cache_key(): cls.max_stale,
+                    cls.cache_key(menu_id): cls.max_stale,
+                },
+            )
         else:
             # Если добавилось новое меню, тогда удаляем только кеш всего списка меню
-            await asyn_cache.delete("menu")
+            await invalidate_cache_data(asyn_cache, {cls.cache_key(): cls.max_stale})
 
 
 """КЕШ ПОДМЕНЮ"""
@@ -65,17 +476,20 @@ class CacheSubMenu:
     """Модуль содержащий методы работы с кешем подменю"""
 
     sub_menu_404 = {"detail": "submenu not found"}
+    max_stale = CACHE_SWR_SUBMENU_MAX_STALE
+    ttl = CACHE_TTL_SUBMENU
 
     @staticmethod
-    async def check_cache(
-        asyn_cache, menu_id: int, sub_menu_id: int | None | None = None
-    ) -> bool:
-        """Метод проверки существования запрошенного подменю в кеше"""
+    def cache_key(
+        menu_id: int,
+        sub_menu_id: int | None | None = None,
+        after_id: int = 0,
+        limit: int = LIST_PAGE_SIZE,
+    ) -> str:
+        """Метод получения ключа кеша страницы списка подменю либо определенного подменю"""
         if sub_menu_id:
-            return bool(
-                await asyn_cache.exists(f"menu_{menu_id}_sub_menus_{sub_menu_id}")
-            )
-        return bool(await asyn_cache.exists(f"menu_{menu_id}_sub_menus"))
+            return f"menu_{menu_id}_sub_menus_{sub_menu_id}"
+        return page_key(f"menu_{menu_id}_sub_menus", after_id, limit)
 
     @classmethod
     async def set_sub_menu(
@@ -84,35 +498,40 @@ class CacheSubMenu:
         response_data: dict,
         menu_id: int,
         sub_menu_id: int | None | None = None,
-    ) -> dict:
-        """Метод сохранения ответа из БД в кеш для подменю"""
+        after_id: int = 0,
+        limit: int = LIST_PAGE_SIZE,
+        version: bytes | None = None,
+    ) -> bytes | str:
+        """
+        Метод сохранения ответа из БД в кеш для подменю, возвращает тело ответа.
+        version - версия записи, прочитанная до запроса в БД (get_load_version)
+        """
         if response_data == "NotFound":
             # Что бы не кешировать постоянно NotFound на любой новый
             # не существующий id, будем отдавать шаблон
             return "NotFound"
+        body = orjson.dumps(response_data)
         if response_data:
-            if sub_menu_id:
-                await asyn_cache.hmset(
-                    f"menu_{menu_id}_sub_menus_{sub_menu_id}", response_data
-                )
-            else:
-                await asyn_cache.set(
-                    f"menu_{menu_id}_sub_menus", json.dumps(response_data)
-                )
-        return response_data
+            body = await set_cache_data(
+                asyn_cache,
+                cls.cache_key(menu_id, sub_menu_id, after_id, limit),
+                body,
+                cls.ttl,
+                version,
+                cls.cache_key(menu_id, sub_menu_id),
+            )
+        return body
 
-    @staticmethod
+    @classmethod
     async def get_sub_menu(
-        asyn_cache, menu_id: int, sub_menu_id: int | None | None = None
-    ) -> dict | list | None:
-        """Метод получения подменю из кеша"""
-        if sub_menu_id:
-            return await asyn_cache.hgetall(f"menu_{menu_id}_sub_menus_{sub_menu_id}")
-        return json.loads(await asyn_cache.get(f"menu_{menu_id}_sub_menus"))
+        cls, asyn_cache, menu_id: int, sub_menu_id: int | None | None = None
+    ) -> bytes | object:
+        """Метод получения подменю из кеша за один запрос, при промахе CACHE_MISS"""
+        return await get_cache_data(asyn_cache, cls.cache_key(menu_id, sub_menu_id))
 
-    @staticmethod
+    @classmethod
     async def clear_cache(
-        asyn_cache, menu_id: int, sub_menu_id: int | None | None = None
+        cls, asyn_cache, menu_id: int, sub_menu_id: int | None | None = None
     ) -> None:
         """
         Метод очистки кеша, если изменилось/удалилось/добавилось подменю.
@@ -120,14 +539,35 @@ class CacheSubMenu:
         или весь кеш основного меню в зависимости
         от типа операции (удаление, редактирование, создание).
         """
-        delete_keys = (
-            "menu",
-            f"menu_{menu_id}",
-            f"menu_{menu_id}_sub_menus",
-        )
+        invalidate_keys = {
+            CacheMenu.cache_key(): CacheMenu.max_stale,
+            CacheMenu.cache_key(menu_id): CacheMenu.max_stale,
+            cls.cache_key(menu_id): cls.max_stale,
+        }
         if sub_menu_id:
-            delete_keys += (f"menu_{menu_id}_sub_menus_{sub_menu_id}",)
-        await asyn_cache.delete(*delete_keys)
+            invalidate_keys[cls.cache_key(menu_id, sub_menu_id)] = cls.max_stale
+        await invalidate_cache_data(asyn_cache, invalidate_keys)
+
+    @classmethod
+    async def clear_cache_bulk(
+        cls, asyn_cache, menu_id: int, sub_menu_ids: list[int] | None = None
+    ) -> None:
+        """
+        Метод очистки кеша после пакетной операции над подменю одного меню.
+        Ключи всех затронутых подменю (и списков их блюд) собираются в один
+        словарь без повторов и инвалидируются одним вызовом скрипта.
+        """
+        invalidate_keys = {
+            CacheMenu.cache_key(): CacheMenu.max_stale,
+            CacheMenu.cache_key(menu_id): CacheMenu.max_stale,
+            cls.cache_key(menu_id): cls.max_stale,
+        }
+        for sub_menu_id in sub_menu_ids or ():
+            invalidate_keys[cls.cache_key(menu_id, sub_menu_id)] = cls.max_stale
+            invalidate_keys[
+                CacheDish.cache_key(menu_id, sub_menu_id)
+            ] = CacheDish.max_stale
+        await invalidate_cache_data(asyn_cache, invalidate_keys)
 
 
 """КЕШ БЛЮД"""
@@ -138,21 +578,21 @@ class CacheDish:
     """Модуль содержащий методы работы с кешем блюд"""
 
     dish_404 = {"detail": "dish not found"}
+    max_stale = CACHE_SWR_DISH_MAX_STALE
+    ttl = CACHE_TTL_DISH
 
     @staticmethod
-    async def check_cache(
-        asyn_cache, menu_id: int, sub_menu_id: int, dish_id: int | None | None = None
-    ) -> bool:
-        """Метод проверки существования запрошенного блюда в кеше"""
+    def cache_key(
+        menu_id: int,
+        sub_menu_id: int,
+        dish_id: int | None | None = None,
+        after_id: int = 0,
+        limit: int = LIST_PAGE_SIZE,
+    ) -> str:
+        """Метод получения ключа кеша страницы списка блюд либо определенного блюда"""
         if dish_id:
-            return bool(
-                await asyn_cache.exists(
-                    f"menu_{menu_id}_sub_menus_{sub_menu_id}_dish_{dish_id}"
-                )
-            )
-        return bool(
-            await asyn_cache.exists(f"menu_{menu_id}_sub_menus_{sub_menu_id}_dish")
-        )
+            return f"menu_{menu_id}_sub_menus_{sub_menu_id}_dish_{dish_id}"
+        return page_key(f"menu_{menu_id}_sub_menus_{sub_menu_id}_dish", after_id, limit)
 
     @classmethod
     async def set_dish(
@@ -162,41 +602,50 @@ class CacheDish:
         menu_id,
         sub_menu_id,
         dish_id: int | None | None = None,
-    ) -> dict | list | str | None:
-        """Метод сохранения ответа из БД в кеш для блюд"""
+        after_id: int = 0,
+        limit: int = LIST_PAGE_SIZE,
+        version: bytes | None = None,
+    ) -> bytes | str:
+        """
+        Метод сохранения ответа из БД в кеш для блюд, возвращает тело ответа.
+        version - версия записи, прочитанная до запроса в БД (get_load_version)
+        """
         if response_data == "NotFound":
             #  Что бы не кешировать постоянно NotFound на любой новый
             #  не существующий id, будем отдавать шаблон
             return "NotFound"
+        body = orjson.dumps(response_data)
         if response_data:
-            if dish_id:
-                await asyn_cache.hmset(
-                    f"menu_{menu_id}_sub_menus_{sub_menu_id}_dish_{dish_id}",
-                    response_data,
-                )
-            else:
-                await asyn_cache.set(
-                    f"menu_{menu_id}_sub_menus_{sub_menu_id}_dish",
-                    json.dumps(response_data),
-                )
-        return response_data
+            body = await set_cache_data(
+                asyn_cache,
+                cls.cache_key(menu_id, sub_menu_id, dish_id, after_id, limit),
+                body,
+                cls.ttl,
+                version,
+                cls.cache_key(menu_id, sub_menu_id, dish_id),
+            )
+        return body
 
-    @staticmethod
+    @classmethod
     async def get_dish(
-        asyn_cache, menu_id: int, sub_menu_id: int, dish_id: int | None | None = None
-    ) -> dict | list | None:
-        """Метод получения блюд из кеша"""
-        if dish_id:
-            return await asyn_cache.hgetall(
-                f"menu_{menu_id}_sub_menus_{sub_menu_id}_dish_{dish_id}"
-            )
-        return json.loads(
-            await asyn_cache.get(f"menu_{menu_id}_sub_menus_{sub_menu_id}_dish")
+        cls,
+        asyn_cache,
+        menu_id: int,
+        sub_menu_id: int,
+        dish_id: int | None | None = None,
+    ) -> bytes | object:
+        """Метод получения блюд из кеша за один запрос, при промахе CACHE_MISS"""
+        return await get_cache_data(
+            asyn_cache, cls.cache_key(menu_id, sub_menu_id, dish_id)
         )
 
-    @staticmethod
+    @classmethod
     async def clear_cache(
-        asyn_cache, menu_id: int, sub_menu_id: int, dish_id: int | None | None = None
+        cls,
+        asyn_cache,
+        menu_id: int,
+        sub_menu_id: int,
+        dish_id: int | None | None = None,
     ) -> None:
         """
         Метод очистки кеша, если изменилось/удалилось/добавилось блюдо.
@@ -204,14 +653,171 @@ class CacheDish:
         или весь кеш подменюменю и основного меню в зависимости
         от типа операции (удаление, редактирование, создание).
         """
-        delete_keys = (
-            "menu",
-            f"menu_{menu_id}",
-            f"menu_{menu_id}_sub_menus",
-            f"menu_{menu_id}_sub_menus_{sub_menu_id}",
-            f"menu_{menu_id}_sub_menus_{sub_menu_id}_dish",
-        )
+        invalidate_keys = {
+            CacheMenu.cache_key(): CacheMenu.max_stale,
+            CacheMenu.cache_key(menu_id): CacheMenu.max_stale,
+            CacheSubMenu.cache_key(menu_id): CacheSubMenu.max_stale,
+            CacheSubMenu.cache_key(menu_id, sub_menu_id): CacheSubMenu.max_stale,
+            cls.cache_key(menu_id, sub_menu_id): cls.max_stale,
+        }
         if dish_id:
-            delete_keys += (f"menu_{menu_id}_sub_menus_{sub_menu_id}_dish_{dish_id}",)
-        await asyn_cache.delete(*delete_keys)
+            invalidate_keys[
+                cls.cache_key(menu_id, sub_menu_id, dish_id)
+            ] = cls.max_stale
+        await invalidate_cache_data(asyn_cache, invalidate_keys)
         return None
+
+    @classmethod
+    async def clear_cache_bulk(
+        cls,
+        asyn_cache,
+        menu_id: int,
+        sub_menu_id: int,
+        dish_ids: list[int] | None = None,
+    ) -> None:
+        """
+        Метод очистки кеша после пакетной операции над блюдами одного подменю.
+        Общие ключи меню и подменю попадают в словарь один раз, вместе с
+        ключами всех затронутых блюд инвалидируются одним вызовом скрипта.
+        """
+        invalidate_keys = {
+            CacheMenu.cache_key(): CacheMenu.max_stale,
+            CacheMenu.cache_key(menu_id): CacheMenu.max_stale,
+            CacheSubMenu.cache_key(menu_id): CacheSubMenu.max_stale,
+            CacheSubMenu.cache_key(menu_id, sub_menu_id): CacheSubMenu.max_stale,
+            cls.cache_key(menu_id, sub_menu_id): cls.max_stale,
+        }
+        for dish_id in dish_ids or ():
+            invalidate_keys[
+                cls.cache_key(menu_id, sub_menu_id, dish_id)
+            ] = cls.max_stale
+        await invalidate_cache_data(asyn_cache, invalidate_keys)
+
+
+"""КЕШ ДЕРЕВА МЕНЮ"""
+
+
+class CacheTree:
+
+    """Модуль содержащий методы работы с кешем дерева всех меню"""
+
+    max_stale = CACHE_SWR_MENU_MAX_STALE
+    ttl = CACHE_TTL_MENU
+
+    @staticmethod
+    def cache_key() -> str:
+        """Метод получения ключа кеша дерева меню"""
+        return TREE_KEY
+
+    @staticmethod
+    async def catalog_version(asyn_cache) -> bytes | None:
+        """Метод получения текущей версии каталога, читается до запроса в БД"""
+        return await asyn_cache.get(CATALOG_VERSION_KEY)
+
+    @classmethod
+    async def set_tree(
+        cls, asyn_cache, body: bytes, version: bytes | None
+    ) -> CacheData | None:
+        """
+        Метод сохранения дерева меню, собранного при версии каталога version.
+        Если каталог успел измениться, дерево не сохраняется (None).
+        """
+        data = await store_if_version(
+            asyn_cache, cls.cache_key(), CATALOG_VERSION_KEY, body, version, cls.ttl
+        )
+        return data if data.version else None
+
+
+"""КЕШ ВЫГРУЗОК .xlsx"""
+
+# Выгрузка привязывается к версии каталога: xlsx_version_<версия> хранит id
+# задачи, построившей (или строящей) файл этой версии, xlsx_<id задачи> - имя
+# файла. Если у текущей версии уже есть задача (кроме ARGV[4] - завершившейся
+# без файла), возвращается она, иначе ARGV[1] закрепляется за версией.
+# Возвращает версию, id задачи и признак, что задачу нужно поставить
+ATTACH_XLSX_SCRIPT = (
+    CATALOG_VERSION_LUA
+    + """
+local version = catalog_version()
+local key = "xlsx_version_" .. version
+local task_id = redis.call("get", key)
+if task_id and task_id ~= ARGV[4] then
+    return {version, task_id, 0}
+end
+redis.call("set", key, ARGV[1], "PX", ARGV[3])
+redis.call("set", KEYS[1], ARGV[2], "PX", ARGV[3])
+return {version, ARGV[1], 1}
+"""
+)
+
+
+# Канал статусов задач генерации .xlsx: воркер сохраняет последний статус
+# задачи в xlsx_status_<id задачи> и публикует его в канал
+XLSX_STATUS_CHANNEL = "xlsx_status"
+# Статусы, после которых задача больше не меняется
+XLSX_READY_STATUSES = ("SUCCESS", "FAILURE")
+
+
+class CacheXLSX:
+
+    """Модуль содержащий методы работы с задачами генерации .xlsx"""
+
+    ttl = XLSX_TASK_TTL
+
+    @staticmethod
+    def status_key(task_id: str) -> str:
+        """Метод получения ключа последнего статуса задачи"""
+        return f"xlsx_status_{task_id}"
+
+    @staticmethod
+    def status_message(task_id: str, status: str, **data) -> bytes:
+        """Метод формирования сообщения о статусе задачи"""
+        return orjson.dumps({"task_id": task_id, "status": status, **data})
+
+    @classmethod
+    async def publish_status(
+        cls, asyn_cache, task_id: str, status: str, **data
+    ) -> None:
+        """Метод сохранения и публикации статуса задачи"""
+        message = cls.status_message(task_id, status, **data)
+        async with asyn_cache.pipeline() as pipe:
+            pipe.set(cls.status_key(task_id), message, ex=cls.ttl)
+            pipe.publish(XLSX_STATUS_CHANNEL, message)
+            await pipe.execute()
+
+    @classmethod
+    async def get_status(cls, asyn_cache, task_id: str) -> dict | None:
+        """Метод получения последнего статуса задачи, None - задача неизвестна"""
+        message = await asyn_cache.get(cls.status_key(task_id))
+        return message and orjson.loads(message)
+
+    @staticmethod
+    def cache_key(task_id: str) -> str:
+        """Метод получения ключа имени файла задачи"""
+        return f"xlsx_{task_id}"
+
+    @classmethod
+    async def attach_task(
+        cls, asyn_cache, task_id: str, name_file: str, replace: str = ""
+    ) -> tuple[str, bool]:
+        """
+        Метод закрепления задачи task_id (файл name_file) за текущей версией
+        каталога. Если у версии уже есть задача, возвращается ее id и False,
+        replace - id прежней задачи, которую нужно заменить
+        """
+        _, attached, created = await asyn_cache.eval(
+            ATTACH_XLSX_SCRIPT,
+            1,
+            cls.cache_key(task_id),
+            task_id,
+            name_file,
+            cls.ttl * 1000,
+            replace,
+        )
+        return attached.decode(), bool(created)
+
+    @classmethod
+    async def name_file(cls, asyn_cache, task_id: str) -> str | None:
+        """Метод получения имени файла задачи"""
+        name_file = await asyn_cache.get(cls.cache_key(task_id))
+        return name_file and name_file.decode()
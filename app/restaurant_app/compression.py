@@ -0,0 +1,73 @@
+import gzip
+
+import brotli
+import zstandard
+from settings.settings import COMPRESSION_ENCODINGS, COMPRESSION_MIN_SIZE
+
+# Все поддерживаемые кодировки, имена продублированы в скриптах cache_module
+ENCODINGS = ("br", "zstd", "gzip")
+
+_zstd = zstandard.ZstdCompressor(level=3)
+COMPRESSORS = {
+    "br": lambda body: brotli.compress(body, quality=5),
+    "zstd": _zstd.compress,
+    "gzip": lambda body: gzip.compress(body, compresslevel=6, mtime=0),
+}
+# Включенные кодировки в порядке предпочтения сервера
+ENABLED_ENCODINGS = [
+    encoding for encoding in COMPRESSION_ENCODINGS if encoding in COMPRESSORS
+]
+
+
+def encoded_key(key: str, encoding: str | None) -> str:
+    """Функция получения ключа сжатой копии записи кеша"""
+    if encoding is None:
+        return key
+    return f"{key}:{encoding}"
+
+
+def encoded_keys(*keys: str) -> list[str]:
+    """Функция получения ключей всех сжатых копий записей"""
+    return [encoded_key(key, encoding) for key in keys for encoding in ENCODINGS]
+
+
+def negotiate(accept_encoding: str | None) -> str | None:
+    """
+    Функция выбора кодировки ответа по заголовку Accept-Encoding.
+    Из принятых клиентом (q > 0) выбирается первая по предпочтению сервера,
+    None - ответ без сжатия.
+    """
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in ENABLED_ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress_variants(body: bytes) -> dict[str, bytes]:
+    """
+    Функция сжатия тела во всех включенных кодировках. Тела меньше
+    COMPRESSION_MIN_SIZE не сжимаются: выигрыш меньше затрат.
+    """
+    if len(body) < COMPRESSION_MIN_SIZE:
+        return {}
+    return {encoding: COMPRESSORS[encoding](body) for encoding in ENABLED_ENCODINGS}
+
+
+def compress_body(body: bytes, encoding: str | None) -> bytes | None:
+    """Функция сжатия одного тела, None - если сжимать не нужно"""
+    if encoding is None or len(body) < COMPRESSION_MIN_SIZE:
+        return None
+    return COMPRESSORS[encoding](body)
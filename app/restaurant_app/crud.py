@@ -3,7 +3,17 @@ from typing import Any
 
 from asyncpg import PostgresError
 from settings.settings import engine
-from sqlalchemy import text
+from sqlalchemy import (
+    Numeric,
+    Text,
+    bindparam,
+    cast,
+    func,
+    literal_column,
+    select,
+    text,
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.exc import IntegrityError
 
 from .models import (
@@ -15,28 +25,215 @@ from .models import (
     sub_menus,
 )
 
+# Запросы принимают id только параметрами: текст запроса не меняется от id,
+# поэтому asyncpg переиспользует подготовленный (prepared) запрос из своего
+# кеша на соединении. Количество подменю и блюд хранится в самих записях
+# (поддерживается триггерами), поэтому чтение меню - выборка по первичному ключу
+MENU_QUERY = """
+    select id, title, description, submenus_count, dishes_count
+    from "RestaurantMenu" rm
+"""
+menu_list_query = text(
+    MENU_QUERY + "where rm.id > :after_id order by rm.id limit :limit"
+)
+menu_by_id_query = text(MENU_QUERY + "where rm.id = :menu_id")
+
+SUB_MENU_QUERY = """
+    select id, title, description, dishes_count
+    from "RestaurantSubMenu" rsm
+    where rsm.menu_id = :menu_id
+"""
+sub_menu_list_query = text(
+    SUB_MENU_QUERY + "and rsm.id > :after_id order by rsm.id limit :limit"
+)
+sub_menu_by_id_query = text(SUB_MENU_QUERY + "and rsm.id = :sub_menu_id")
+
+# Блюда выбираются только из своего подменю, подменю проверяется на
+# принадлежность меню. Запрос идет по индексам (sub_menu_id, id) и
+# (menu_id, id), время не зависит от общего числа блюд в БД.
+# Списки выбираются страницами по курсору: id > after_id по индексу,
+# limit = None (limit null в Postgres) отдает список до конца
+dish_query = (
+    select(dish)
+    .join(sub_menus, sub_menus.c.id == dish.c.sub_menu_id)
+    .where(dish.c.sub_menu_id == bindparam("sub_menu_id"))
+    .where(sub_menus.c.menu_id == bindparam("menu_id"))
+)
+dish_list_query = (
+    dish_query.where(dish.c.id > bindparam("after_id"))
+    .order_by(dish.c.id)
+    .limit(bindparam("limit"))
+)
+dish_by_id_query = dish_query.where(dish.c.id == bindparam("dish_id"))
+
+# Пакетное редактирование: строки передаются массивами по столбцам и
+# разворачиваются unnest, поэтому один UPDATE с 4-5 параметрами при любом
+# числе строк. Изменяются только строки своего родителя
+sub_menu_bulk_update_query = text(
+    """
+    update "RestaurantSubMenu" rsm
+    set title = v.title, description = v.description
+    from unnest(
+        cast(:ids as integer[]),
+        cast(:titles as varchar[]),
+        cast(:descriptions as varchar[])
+    ) as v(id, title, description)
+    where rsm.id = v.id and rsm.menu_id = :menu_id
+    returning rsm.id, rsm.title, rsm.description, rsm.dishes_count
+    """
+)
+dish_bulk_update_query = text(
+    """
+    update "RestaurantDish" rd
+    set title = v.title, description = v.description, price = v.price
+    from unnest(
+        cast(:ids as integer[]),
+        cast(:titles as varchar[]),
+        cast(:descriptions as varchar[]),
+        cast(:prices as float8[])
+    ) as v(id, title, description, price)
+    where rd.id = v.id and rd.sub_menu_id = :sub_menu_id
+    returning rd.id, rd.title, rd.description, rd.price
+    """
+).columns(dish.c.id, dish.c.title, dish.c.description, dish.c.price)
+
+
+def dish_row(obj) -> dict:
+    """Функция приведения строки блюда к телу ответа"""
+    return dict(
+        id=str(obj.id),
+        title=obj.title,
+        description=obj.description,
+        price=str(decimal.Decimal(obj.price).normalize()),
+    )
+
+
+def sub_menu_row(obj) -> dict:
+    """Функция приведения строки подменю к телу ответа"""
+    return dict(
+        id=str(obj.id),
+        title=obj.title,
+        description=obj.description,
+        dishes_count=obj.dishes_count,
+    )
+
+
+def unique_by_id(items) -> list:
+    """Функция удаления повторов id из пакета, остается последний элемент"""
+    return list({item.id: item for item in items}.values())
+
+
+def menu_tree_agg():
+    """
+    Выражение, собирающее все меню с подменю и блюдами в один JSON массив
+    (json_agg/json_build_object), вложенные списки упорядочены по id
+    """
+    rm, rsm, rd = RestaurantMenu, RestaurantSubMenu, RestaurantDish
+    empty = literal_column("'[]'::json")
+    dishes = (
+        select(
+            func.json_agg(
+                aggregate_order_by(
+                    func.json_build_object(
+                        "id",
+                        cast(rd.id, Text),
+                        "title",
+                        rd.title,
+                        "description",
+                        rd.description,
+                        "price",
+                        cast(cast(rd.price, Numeric), Text),
+                    ),
+                    rd.id,
+                )
+            )
+        )
+        .where(rsm.id == rd.sub_menu_id)
+        .scalar_subquery()
+    )
+    sub_menus_agg = (
+        select(
+            func.json_agg(
+                aggregate_order_by(
+                    func.json_build_object(
+                        "id",
+                        cast(rsm.id, Text),
+                        "title",
+                        rsm.title,
+                        "description",
+                        rsm.description,
+                        "dishes_count",
+                        rsm.dishes_count,
+                        "dishes",
+                        func.coalesce(dishes, empty),
+                    ),
+                    rsm.id,
+                )
+            )
+        )
+        .where(rm.id == rsm.menu_id)
+        .scalar_subquery()
+    )
+    return func.coalesce(
+        func.json_agg(
+            aggregate_order_by(
+                func.json_build_object(
+                    "id",
+                    cast(rm.id, Text),
+                    "title",
+                    rm.title,
+                    "description",
+                    rm.description,
+                    "submenus_count",
+                    rm.submenus_count,
+                    "dishes_count",
+                    rm.dishes_count,
+                    "submenus",
+                    func.coalesce(sub_menus_agg, empty),
+                ),
+                rm.id,
+            )
+        ),
+        empty,
+    )
+
+
+# Дерево меню для API (текст JSON, который без разбора и повторной
+# сериализации кладется в кеш)
+menu_tree_text_query = select(cast(menu_tree_agg(), Text))
+
+# Все меню с подменю и блюдами плоскими строками в порядке вывода в .xlsx.
+# Читается серверным курсором, дерево в памяти не собирается. Меню без
+# подменю и подменю без блюд приходят с NULL в полях потомков
+menu_rows_query = text(
+    """
+    select rm.id as menu_id, rm.title as menu_title,
+        rm.description as menu_description,
+        rsm.id as sub_menu_id, rsm.title as sub_menu_title,
+        rsm.description as sub_menu_description,
+        rd.id as dish_id, rd.title as dish_title,
+        rd.description as dish_description, rd.price
+    from "RestaurantMenu" rm
+    left join "RestaurantSubMenu" rsm on rsm.menu_id = rm.id
+    left join "RestaurantDish" rd on rd.sub_menu_id = rsm.id
+    order by rm.id, rsm.id, rd.id
+    """
+).columns(price=dish.c.price.type)
+
 
 class CrudMenu:
     @staticmethod
-    async def get_menu_db(menu_id: int | None = None) -> Any | None | None:
-        """Метод возвращающий весь список меню, либо определенную запись меню по id"""
-        query_str = """
-            select id, title, description, coalesce(sc, 0) as sub_menu_count, coalesce(dc, 0)
-                as dishes_count
-            from "RestaurantMenu" rm
-            left join (select menu_id, count(*) as sc
-                from "RestaurantSubMenu"
-                group by menu_id
-                order by menu_id) rsm on rsm.menu_id = rm.id
-            left join (select menu_id, count(*) as dc
-                from "RestaurantDish" as rd_join
-                join "RestaurantSubMenu" rsm ON rsm.id  = rd_join.sub_menu_id
-                group by menu_id) rd on rd.menu_id = rm.id
-            """
-        if menu_id:
-            query_str += f"\nwhere rm.id={menu_id}"
+    async def get_menu_db(
+        menu_id: int | None = None, after_id: int = 0, limit: int | None = None
+    ) -> Any | None | None:
+        """Метод возвращающий страницу списка меню, либо определенную запись меню по id"""
         async with engine.begin() as conn:
-            query = await conn.execute(text(query_str))
+            if menu_id:
+                query = await conn.execute(menu_by_id_query, {"menu_id": menu_id})
+            else:
+                query = await conn.execute(
+                    menu_list_query, {"after_id": after_id, "limit": limit}
+                )
         data = []
         for obj in query.fetchall():
             data.append(
@@ -56,6 +253,13 @@ class CrudMenu:
             return []
         return "NotFound"
 
+    @staticmethod
+    async def get_menu_tree_db() -> bytes:
+        """Метод получения всего дерева меню одним запросом в виде тела JSON"""
+        async with engine.begin() as conn:
+            tree = await conn.scalar(menu_tree_text_query)
+        return tree.encode()
+
     @staticmethod
     async def create_menu_db(data, asyn_db) -> dict:
         """Метод создания меню"""
@@ -105,22 +309,20 @@ class CrudMenu:
 class CrudSubMenu:
     @staticmethod
     async def get_sub_menu_db(
-        menu_id, sub_menu_id=None
+        menu_id, sub_menu_id=None, after_id: int = 0, limit: int | None = None
     ) -> str | list[dict] | None | None:
-        """Метод получения списка подменю либо определенного меню по id"""
-        query_str = f"""
-            select id, title, description, coalesce(dc, 0) as dishes_count
-            from "RestaurantSubMenu" rsm
-            left join (select sub_menu_id, count(*) as dc
-                from "RestaurantDish"
-                group by sub_menu_id
-                order by sub_menu_id) rd on rd.sub_menu_id = rsm.id
-            where rsm.menu_id = {menu_id}
-        """
-        if sub_menu_id:
-            query_str += f" AND rsm.id={sub_menu_id}"
+        """Метод получения страницы списка подменю либо определенного меню по id"""
         async with engine.begin() as conn:
-            query = await conn.execute(text(query_str))
+            if sub_menu_id:
+                query = await conn.execute(
+                    sub_menu_by_id_query,
+                    {"menu_id": menu_id, "sub_menu_id": sub_menu_id},
+                )
+            else:
+                query = await conn.execute(
+                    sub_menu_list_query,
+                    {"menu_id": menu_id, "after_id": after_id, "limit": limit},
+                )
         data = []
         for obj in query:
             data.append(
@@ -182,35 +384,99 @@ class CrudSubMenu:
             raise exc
         return {"status": True, "message": "The submenu has been deleted"}
 
+    @staticmethod
+    async def create_sub_menus_db(menu_id, items, asyn_db) -> list[dict] | str:
+        """
+        Метод пакетного создания подменю одним многострочным
+        INSERT ... RETURNING в одной транзакции
+        """
+        query = (
+            sub_menus.insert()
+            .returning(
+                sub_menus.c.id,
+                sub_menus.c.title,
+                sub_menus.c.description,
+                sub_menus.c.dishes_count,
+            )
+            .values([dict(**item.dict(), menu_id=menu_id) for item in items])
+        )
+        try:
+            rows = (await asyn_db.execute(query)).all()
+            await asyn_db.commit()
+        except IntegrityError:
+            # Меню не существует (внешний ключ)
+            await asyn_db.rollback()
+            return "NotFound"
+        return [sub_menu_row(obj) for obj in sorted(rows, key=lambda obj: obj.id)]
+
+    @staticmethod
+    async def menu_exists(menu_id, asyn_db) -> bool:
+        """Метод проверки, что меню существует"""
+        query = await asyn_db.execute(menu_by_id_query, {"menu_id": menu_id})
+        return query.first() is not None
+
+    @staticmethod
+    async def edit_sub_menus_db(menu_id, items, asyn_db) -> list[dict] | str:
+        """Метод пакетного редактирования подменю одного меню одним UPDATE"""
+        if not await CrudSubMenu.menu_exists(menu_id, asyn_db):
+            return "NotFound"
+        items = unique_by_id(items)
+        rows = (
+            await asyn_db.execute(
+                sub_menu_bulk_update_query,
+                {
+                    "menu_id": menu_id,
+                    "ids": [item.id for item in items],
+                    "titles": [item.title for item in items],
+                    "descriptions": [item.description for item in items],
+                },
+            )
+        ).all()
+        await asyn_db.commit()
+        return [sub_menu_row(obj) for obj in sorted(rows, key=lambda obj: obj.id)]
+
+    @staticmethod
+    async def delete_sub_menus_db(menu_id, ids, asyn_db) -> list[int] | str:
+        """Метод пакетного удаления подменю одного меню, возвращает удаленные id"""
+        if not await CrudSubMenu.menu_exists(menu_id, asyn_db):
+            return "NotFound"
+        query = (
+            sub_menus.delete()
+            .where(sub_menus.c.menu_id == menu_id)
+            .where(sub_menus.c.id.in_(set(ids)))
+            .returning(sub_menus.c.id)
+        )
+        deleted = (await asyn_db.execute(query)).scalars().all()
+        await asyn_db.commit()
+        return sorted(deleted)
+
 
 """Блюда"""
 
 
 class CrudDish:
     @staticmethod
-    async def get_dish_db(menu_id, sub_menu_id, asyn_db, dish_id=None):
-        """Метод получения списка блюд либо определенного блюда по id"""
-        data = []
-        if not dish_id:
-            for obj in await asyn_db.execute(dish.select()):
-                data.append(
-                    dict(
-                        id=str(obj.id),
-                        title=obj.title,
-                        description=obj.description,
-                        price=str(decimal.Decimal(obj.price).normalize()),
-                    )
-                )
+    async def get_dish_db(
+        menu_id,
+        sub_menu_id,
+        asyn_db,
+        dish_id=None,
+        after_id: int = 0,
+        limit: int | None = None,
+    ):
+        """Метод получения страницы списка блюд либо определенного блюда по id"""
+        params = {"menu_id": menu_id, "sub_menu_id": sub_menu_id}
+        if dish_id:
+            query = await asyn_db.execute(
+                dish_by_id_query, {**params, "dish_id": dish_id}
+            )
         else:
-            query_obj = await asyn_db.execute(dish.select().where(dish.c.id == dish_id))
-            if query_obj:
-                for obj in query_obj:
-                    data = dict(
-                        id=str(obj.id),
-                        title=obj.title,
-                        description=obj.description,
-                        price=str(decimal.Decimal(obj.price).normalize()),
-                    )
+            query = await asyn_db.execute(
+                dish_list_query, {**params, "after_id": after_id, "limit": limit}
+            )
+        data = [dish_row(obj) for obj in query]
+        if data and dish_id:
+            return data[0]
         if data:
             return data
         if not dish_id:
@@ -236,27 +502,117 @@ class CrudDish:
 
     @staticmethod
     async def edit_dish_db(menu_id, sub_menu_id, dish_id, data, asyn_db):
-        """Метод редактирования блюда"""
+        """
+        Метод редактирования блюда. Блюдо изменяется, только если оно
+        принадлежит подменю и меню из URL, иначе NotFound без записи
+        """
+        if not await CrudDish.sub_menu_exists(menu_id, sub_menu_id, asyn_db):
+            return "NotFound"
         query = (
             dish.update()
             .where(dish.c.id == dish_id)
+            .where(dish.c.sub_menu_id == sub_menu_id)
             .values(title=data.title, description=data.description, price=data.price)
+            .returning(dish.c.id, dish.c.title, dish.c.description, dish.c.price)
         )
         try:
-            await asyn_db.execute(query)
+            obj = (await asyn_db.execute(query)).first()
             await asyn_db.commit()
         except PostgresError as exc:
             asyn_db.rollback()
             raise exc
-        return await CrudDish.get_dish_db(None, None, asyn_db, dish_id)
+        if obj is None:
+            return "NotFound"
+        return dish_row(obj)
 
     @staticmethod
     async def delete_dish_db(menu_id, sub_menu_id, dish_id, asyn_db):
-        """Метод удаления блюда"""
+        """
+        Метод удаления блюда. Удаляется только блюдо подменю и меню
+        из URL, иначе NotFound без записи
+        """
+        if not await CrudDish.sub_menu_exists(menu_id, sub_menu_id, asyn_db):
+            return "NotFound"
+        query = (
+            dish.delete()
+            .where(dish.c.id == dish_id)
+            .where(dish.c.sub_menu_id == sub_menu_id)
+            .returning(dish.c.id)
+        )
         try:
-            await asyn_db.execute(dish.delete().where(dish.c.id == dish_id))
+            deleted = (await asyn_db.execute(query)).first()
             await asyn_db.commit()
         except PostgresError as exc:
             asyn_db.rollback()
             raise exc
+        if deleted is None:
+            return "NotFound"
         return {"status": True, "message": "The submenu has been deleted"}
+
+    @staticmethod
+    async def sub_menu_exists(menu_id, sub_menu_id, asyn_db) -> bool:
+        """Метод проверки, что подменю существует и принадлежит меню"""
+        query = await asyn_db.execute(
+            sub_menu_by_id_query, {"menu_id": menu_id, "sub_menu_id": sub_menu_id}
+        )
+        return query.first() is not None
+
+    @staticmethod
+    async def create_dishes_db(
+        menu_id, sub_menu_id, items, asyn_db
+    ) -> list[dict] | str:
+        """
+        Метод пакетного создания блюд подменю одним многострочным
+        INSERT ... RETURNING в одной транзакции с проверкой подменю
+        """
+        if not await CrudDish.sub_menu_exists(menu_id, sub_menu_id, asyn_db):
+            return "NotFound"
+        query = (
+            dish.insert()
+            .returning(dish.c.id, dish.c.title, dish.c.description, dish.c.price)
+            .values([dict(**item.dict(), sub_menu_id=sub_menu_id) for item in items])
+        )
+        try:
+            rows = (await asyn_db.execute(query)).all()
+            await asyn_db.commit()
+        except IntegrityError:
+            # Подменю удалено параллельным запросом после проверки
+            await asyn_db.rollback()
+            return "NotFound"
+        return [dish_row(obj) for obj in sorted(rows, key=lambda obj: obj.id)]
+
+    @staticmethod
+    async def edit_dishes_db(menu_id, sub_menu_id, items, asyn_db) -> list[dict] | str:
+        """Метод пакетного редактирования блюд одного подменю одним UPDATE"""
+        if not await CrudDish.sub_menu_exists(menu_id, sub_menu_id, asyn_db):
+            return "NotFound"
+        items = unique_by_id(items)
+        rows = (
+            await asyn_db.execute(
+                dish_bulk_update_query,
+                {
+                    "sub_menu_id": sub_menu_id,
+                    "ids": [item.id for item in items],
+                    "titles": [item.title for item in items],
+                    "descriptions": [item.description for item in items],
+                    "prices": [item.price for item in items],
+                },
+            )
+        ).all()
+        await asyn_db.commit()
+        return [dish_row(obj) for obj in sorted(rows, key=lambda obj: obj.id)]
+
+    @staticmethod
+    async def delete_dishes_db(menu_id, sub_menu_id, ids, asyn_db) -> list[int] | str:
+        """Метод пакетного удаления блюд одного подменю, возвращает удаленные id"""
+        if not await CrudDish.sub_menu_exists(menu_id, sub_menu_id, asyn_db):
+            return "NotFound"
+        query = (
+            dish.delete()
+            .where(dish.c.sub_menu_id == sub_menu_id)
+            .where(dish.c.id.in_(set(ids)))
+            .returning(dish.c.id)
+        )
+        deleted = (await asyn_db.execute(query)).scalars().all()
+        await asyn_db.commit()
+        return sorted(deleted)
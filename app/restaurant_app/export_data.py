@@ -0,0 +1,73 @@
+"""
+Потоковая выгрузка меню в CSV/NDJSON.
+Строки читаются серверным курсором тем же запросом, что и при генерации
+.xlsx (tasks.get_menu_rows_from_db), и отправляются клиенту частями по
+EXPORT_FETCH_SIZE строк, дерево меню в памяти не собирается. Курсор
+держит соединение из пула API (ограниченного и с метриками) до конца
+ответа. Столбцы - столбцы импорта (import_data.IMPORT_COLUMNS) и id
+записей, поэтому выгрузку можно загрузить обратно через импорт.
+"""
+import csv
+import io
+from collections.abc import AsyncIterable, AsyncIterator
+
+import orjson
+from settings.settings import EXPORT_FETCH_SIZE, engine
+from sqlalchemy.engine import Row
+
+from .import_data import IMPORT_COLUMNS
+from .tasks import get_menu_rows_from_db
+
+EXPORT_COLUMNS = ("menu_id", "submenu_id", "dish_id", *IMPORT_COLUMNS)
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def export_row(row: Row) -> tuple:
+    """
+    Функция приведения строки меню к столбцам выгрузки. Меню без подменю и
+    подменю без блюд выгружаются строкой с пустыми полями потомков
+    """
+    return (
+        str(row.menu_id),
+        row.sub_menu_id and str(row.sub_menu_id),
+        row.dish_id and str(row.dish_id),
+        row.menu_title,
+        row.menu_description,
+        row.sub_menu_title,
+        row.sub_menu_description,
+        row.dish_title,
+        row.dish_description,
+        None if row.price is None else f"{row.price:.2f}",
+    )
+
+
+async def iter_csv(parts: AsyncIterable[list[Row]]) -> AsyncIterator[bytes]:
+    """Функция выдачи CSV с заголовком, по части на пачку строк"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(EXPORT_COLUMNS)
+    # Заголовок отправляется сразу, до первой пачки строк
+    yield buffer.getvalue().encode()
+    async for rows in parts:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(map(export_row, rows))
+        yield buffer.getvalue().encode()
+
+
+async def iter_ndjson(parts: AsyncIterable[list[Row]]) -> AsyncIterator[bytes]:
+    """Функция выдачи NDJSON, по объекту на строку меню"""
+    async for rows in parts:
+        yield b"".join(
+            orjson.dumps(dict(zip(EXPORT_COLUMNS, export_row(row)))) + b"\n"
+            for row in rows
+        )
+
+
+def export_menu(file_format: str) -> AsyncIterator[bytes]:
+    """Функция потоковой выгрузки всего меню в формате file_format"""
+    parts = get_menu_rows_from_db(EXPORT_FETCH_SIZE, engine)
+    return iter_csv(parts) if file_format == "csv" else iter_ndjson(parts)
@@ -0,0 +1,180 @@
+"""
+Отдача файлов выгрузок: условные запросы (ETag/Last-Modified, 304),
+запросы диапазонов (Range/If-Range, 206/416) и отправка без чтения файла
+в память процесса.
+"""
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import quote
+
+import anyio
+from fastapi.responses import Response
+from starlette.types import Receive, Scope, Send
+
+# Расширение ASGI: сервер сам отправляет файл (sendfile), приложение
+# передает только дескриптор, смещение и длину
+ZERO_COPY_EXTENSION = "http.response.zerocopysend"
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Функция сравнения ETag с заголовком If-None-Match (список или *)"""
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+def file_etag(stat_result: os.stat_result) -> str:
+    """
+    Функция получения строгого ETag файла. Файлы выгрузок не изменяются
+    после записи, новый файл - новое имя, поэтому достаточно времени
+    изменения и размера
+    """
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def parse_range(range_header: str, size: int) -> tuple[int, int] | None:
+    """
+    Функция разбора заголовка Range с одним диапазоном байт: возвращает
+    первый и последний байт, (size, size) - диапазон за пределами файла.
+    None - заголовок не поддерживается (несколько диапазонов, ошибка
+    синтаксиса), тогда отдается весь файл
+    """
+    unit, _, ranges = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+    first, sep, last = ranges.strip().partition("-")
+    if not sep or not (first + last).isdigit():
+        return None
+    if not first:
+        # Суффикс: последние N байт
+        length = int(last)
+        if length == 0:
+            return size, size
+        return max(size - length, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        return size, size
+    return start, min(int(last) if last else size - 1, size - 1)
+
+
+def is_modified_since(if_modified_since: str, stat_result: os.stat_result) -> bool:
+    """Функция проверки заголовка If-Modified-Since (точность - секунда)"""
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return True
+    return int(stat_result.st_mtime) > since
+
+
+class RangeFileResponse(Response):
+
+    """
+    Ответ с файлом по заголовкам запроса. Неизмененный файл - 304 без тела,
+    один диапазон байт - 206, диапазон за пределами файла - 416. Тело
+    отправляется сервером через ZERO_COPY_EXTENSION, если сервер его
+    поддерживает, иначе читается частями по chunk_size
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        stat_result: os.stat_result,
+        request_headers,
+        method: str = "GET",
+        filename: str | None = None,
+        media_type: str = "application/octet-stream",
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        self.path = path
+        self.media_type = media_type
+        self.background = None
+        size = stat_result.st_size
+        etag = file_etag(stat_result)
+        last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        self.init_headers(
+            {
+                **(headers or {}),
+                "ETag": etag,
+                "Last-Modified": last_modified,
+                "Accept-Ranges": "bytes",
+            }
+        )
+        if filename is not None:
+            if quote(filename) != filename:
+                disposition = f"attachment; filename*=utf-8''{quote(filename)}"
+            else:
+                disposition = f'attachment; filename="{filename}"'
+            self.headers["Content-Disposition"] = disposition
+        self.status_code = 200
+        self.start, self.end = 0, size - 1
+        self.send_body = method.upper() != "HEAD"
+        if_none_match = request_headers.get("if-none-match")
+        if_modified_since = request_headers.get("if-modified-since")
+        if (if_none_match and etag_matches(if_none_match, etag)) or (
+            if_none_match is None
+            and if_modified_since
+            and not is_modified_since(if_modified_since, stat_result)
+        ):
+            self.status_code = 304
+            self.send_body = False
+            return
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        # Диапазон отдается, только если файл не изменился с прошлой части
+        if range_header and if_range in (None, etag, last_modified):
+            requested = parse_range(range_header, size)
+            if requested == (size, size):
+                self.status_code = 416
+                self.send_body = False
+                self.headers["Content-Range"] = f"bytes */{size}"
+                self.headers["Content-Length"] = "0"
+                return
+            if requested is not None:
+                self.status_code = 206
+                self.start, self.end = requested
+                self.headers["Content-Range"] = f"bytes {self.start}-{self.end}/{size}"
+        self.headers["Content-Length"] = str(self.end - self.start + 1)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        count = self.end - self.start + 1
+        if not self.send_body or count <= 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        if ZERO_COPY_EXTENSION in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send(
+                    {
+                        "type": ZERO_COPY_EXTENSION,
+                        "file": file,
+                        "offset": self.start,
+                        "count": count,
+                    }
+                )
+            return
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            while count > 0:
+                chunk = await file.read(min(self.chunk_size, count))
+                if not chunk:
+                    break
+                count -= len(chunk)
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": chunk,
+                        "more_body": count > 0,
+                    }
+                )
+            if count > 0:
+                # Файл оказался короче, чем при stat - тело закрывается
+                await send({"type": "http.response.body", "body": b""})
@@ -0,0 +1,266 @@
+"""
+Генератор синтетических данных для нагрузочного тестирования.
+Создает N меню × M подменю × K блюд с текстами реалистичной длины и
+логнормальным распределением цен. Вставка идет пачками через
+многострочный INSERT загрузчика тестовых данных (insert_rows), меню и подменю
+получают id заранее (insert_rows_with_ids), что бы потомки привязывались
+к своим родителям, а не к порядку строк в RETURNING.
+Содержимое определяется только seed: каждое меню и подменю получает свой
+генератор случайных чисел (seed, номер меню[, номер подменю]), поэтому данные
+не зависят от размера пачки. id записей задают последовательности БД.
+
+Запуск из папки app:
+python -m restaurant_app.generate_data --menus 10 --submenus 10 --dishes 100 --seed 1
+"""
+import argparse
+import asyncio
+import math
+import random
+import time
+from collections.abc import Iterable, Iterator
+
+from settings.settings import cache_redis, db_async_session
+
+from .cache_module import CacheMenu
+from .load_data import insert_rows, insert_rows_with_ids
+from .models import dish, menus, sub_menus
+
+MENU_WORDS = (
+    "Кухня",
+    "Меню",
+    "Сезонное",
+    "Домашняя",
+    "Авторская",
+    "Европейская",
+    "Азиатская",
+    "Итальянская",
+    "Грузинская",
+    "Постное",
+    "Детское",
+    "Банкетное",
+)
+SUB_MENU_WORDS = (
+    "Супы",
+    "Салаты",
+    "Закуски",
+    "Горячее",
+    "Гарниры",
+    "Десерты",
+    "Напитки",
+    "Выпечка",
+    "Паста",
+    "Гриль",
+    "Завтраки",
+    "Соусы",
+)
+DISH_WORDS = (
+    "суп",
+    "салат",
+    "стейк",
+    "котлета",
+    "паста",
+    "пирог",
+    "рагу",
+    "плов",
+    "омлет",
+    "блины",
+    "ризотто",
+    "шашлык",
+    "курица",
+    "говядина",
+    "лосось",
+    "грибы",
+    "сыр",
+    "томаты",
+    "картофель",
+    "рис",
+    "сливочный",
+    "острый",
+    "домашний",
+    "запеченный",
+    "копченый",
+    "свежий",
+    "с зеленью",
+    "по-деревенски",
+)
+TEXT_WORDS = (
+    "подается",
+    "с",
+    "и",
+    "на",
+    "из",
+    "свежих",
+    "овощей",
+    "соусом",
+    "специями",
+    "зеленью",
+    "ароматными",
+    "травами",
+    "нежный",
+    "хрустящей",
+    "корочкой",
+    "по",
+    "рецепту",
+    "шефа",
+    "фермерских",
+    "продуктов",
+    "порция",
+    "грамм",
+    "приготовлено",
+    "в",
+    "печи",
+    "тонко",
+    "нарезанный",
+    "сливочным",
+    "маслом",
+)
+# Медиана и разброс цен блюд (логнормальное распределение), копейки
+# берутся из типичных для меню окончаний
+PRICE_MEDIAN = 350
+PRICE_SIGMA = 0.7
+PRICE_CENTS = (0, 0, 0, 0, 50, 90, 99)
+PRICE_MAX = 99999
+# Строк в одном INSERT: строки передаются массивами, поэтому размер пачки
+# ограничен только памятью и длительностью оператора
+BATCH_SIZE = 10000
+
+
+def words(rng: random.Random, pool: tuple, min_count: int, max_count: int) -> str:
+    """Функция составления текста из min_count..max_count случайных слов"""
+    return " ".join(rng.choices(pool, k=rng.randint(min_count, max_count)))
+
+
+def price(rng: random.Random) -> float:
+    """Функция получения цены из логнормального распределения"""
+    rubles = rng.lognormvariate(math.log(PRICE_MEDIAN), PRICE_SIGMA)
+    rubles = min(max(round(rubles), 1), PRICE_MAX)
+    return rubles + rng.choice(PRICE_CENTS) / 100
+
+
+def menu_row(seed: int, menu_no: int) -> dict:
+    """Функция генерации меню по номеру"""
+    rng = random.Random(f"{seed}:{menu_no}")
+    return dict(
+        title=f"{words(rng, MENU_WORDS, 1, 3)} {menu_no + 1}".capitalize(),
+        description=words(rng, TEXT_WORDS, 8, 30),
+    )
+
+
+def sub_menu_rows(
+    seed: int, menu_no: int, menu_id: int, count: int
+) -> Iterator[tuple[int, dict]]:
+    """Функция генерации подменю меню, выдает номер подменю и строку"""
+    for sub_menu_no in range(count):
+        rng = random.Random(f"{seed}:{menu_no}:{sub_menu_no}")
+        yield sub_menu_no, dict(
+            menu_id=menu_id,
+            title=f"{rng.choice(SUB_MENU_WORDS)} {sub_menu_no + 1}",
+            description=words(rng, TEXT_WORDS, 5, 20),
+        )
+
+
+def dish_rows(
+    seed: int, menu_no: int, sub_menu_no: int, sub_menu_id: int, count: int
+) -> Iterator[dict]:
+    """Функция генерации блюд подменю"""
+    rng = random.Random(f"{seed}:{menu_no}:{sub_menu_no}:dish")
+    for _ in range(count):
+        yield dict(
+            sub_menu_id=sub_menu_id,
+            title=words(rng, DISH_WORDS, 2, 5).capitalize(),
+            description=words(rng, TEXT_WORDS, 10, 60),
+            price=price(rng),
+        )
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    """Функция разбиения последовательности на пачки по size элементов"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def generate(
+    asyn_db,
+    menu_count: int,
+    sub_menu_count: int,
+    dish_count: int,
+    seed: int = 0,
+    batch_size: int = BATCH_SIZE,
+) -> dict:
+    """
+    Функция генерации menu_count × sub_menu_count × dish_count записей,
+    пачка меню со всеми подменю и блюдами фиксируется отдельной транзакцией
+    """
+    start = time.perf_counter()
+    created = {"menus": 0, "submenus": 0, "dishes": 0}
+    for menu_nos in batched(range(menu_count), batch_size):
+        menu_ids = await insert_rows_with_ids(
+            asyn_db, menus, [menu_row(seed, menu_no) for menu_no in menu_nos]
+        )
+        sub_menu_iter = (
+            (menu_no, sub_menu_no, row)
+            for menu_no, menu_id in zip(menu_nos, menu_ids)
+            for sub_menu_no, row in sub_menu_rows(
+                seed, menu_no, menu_id, sub_menu_count
+            )
+        )
+        dishes: list[dict] = []
+        for sub_menu_batch in batched(sub_menu_iter, batch_size):
+            sub_menu_ids = await insert_rows_with_ids(
+                asyn_db, sub_menus, [row for _, _, row in sub_menu_batch]
+            )
+            for (menu_no, sub_menu_no, _), sub_menu_id in zip(
+                sub_menu_batch, sub_menu_ids
+            ):
+                for row in dish_rows(
+                    seed, menu_no, sub_menu_no, sub_menu_id, dish_count
+                ):
+                    dishes.append(row)
+                    if len(dishes) >= batch_size:
+                        created["dishes"] += len(
+                            await insert_rows(asyn_db, dish, dishes)
+                        )
+                        dishes = []
+            created["submenus"] += len(sub_menu_ids)
+        if dishes:
+            created["dishes"] += len(await insert_rows(asyn_db, dish, dishes))
+        await asyn_db.commit()
+        created["menus"] += len(menu_ids)
+    seconds = time.perf_counter() - start
+    rows = sum(created.values())
+    return {
+        **created,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(rows / seconds) if seconds else 0,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with db_async_session() as asyn_db:
+        stats = await generate(
+            asyn_db, args.menus, args.submenus, args.dishes, args.seed, args.batch
+        )
+    await CacheMenu.clear_cache(cache_redis)
+    print(
+        f"{stats['menus']} menus, {stats['submenus']} submenus, "
+        f"{stats['dishes']} dishes in {stats['seconds']} s "
+        f"({stats['rows_per_sec']} rows/sec)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--menus", type=int, default=10)
+    parser.add_argument("--submenus", type=int, default=10)
+    parser.add_argument("--dishes", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,334 @@
+"""
+Потоковый импорт меню из CSV/NDJSON.
+Файл читается по частям и не собирается в памяти целиком: строки проверяются
+схемами API пачками по IMPORT_CHUNK_SIZE и сразу отправляются через COPY
+(asyncpg copy_records_to_table) во временную таблицу, после чего
+переносятся в меню/подменю/блюда одним запросом в той же транзакции.
+
+Запуск из папки app: python -m restaurant_app.import_data menus.csv
+"""
+import argparse
+import asyncio
+import codecs
+import csv
+import time
+from collections.abc import AsyncIterable, AsyncIterator
+from functools import lru_cache
+
+import orjson
+from api.v1.schemas import (
+    RequestPostRestaurantDishSchema,
+    RequestPostRestaurantMenuSchema,
+    RequestPostRestaurantSubMenuSchema,
+)
+from pydantic import ValidationError
+from settings.settings import IMPORT_CHUNK_SIZE, cache_redis, db_async_session
+from sqlalchemy import text
+
+from .cache_module import CacheMenu
+from .models import dish, menus, sub_menus
+
+# Каждая строка файла - блюдо вместе со своим подменю и меню. Меню различаются
+# по названию, подменю - по названию внутри меню, описание берется из первой
+# строки. Строка без блюда создает только подменю, без подменю - только меню
+IMPORT_COLUMNS = (
+    "menu_title",
+    "menu_description",
+    "submenu_title",
+    "submenu_description",
+    "dish_title",
+    "dish_description",
+    "price",
+)
+IMPORT_FORMATS = ("csv", "ndjson")
+# Длина строковых полей по столбцам моделей. Схемы POST запросов длину
+# не ограничивают, а слишком длинное значение COPY отклонил бы ошибкой БД
+FIELD_MAX_LENGTHS = {
+    "menu_title": menus.c.title.type.length,
+    "menu_description": menus.c.description.type.length,
+    "submenu_title": sub_menus.c.title.type.length,
+    "submenu_description": sub_menus.c.description.type.length,
+    "dish_title": dish.c.title.type.length,
+    "dish_description": dish.c.description.type.length,
+}
+# Количество строк с ошибками в ответе
+MAX_REPORTED_ERRORS = 20
+READ_CHUNK_SIZE = 64 * 1024
+
+# Временная таблица живет до конца транзакции импорта
+CREATE_STAGING_QUERY = text(
+    """
+    create temp table import_rows (
+        row_no integer not null,
+        menu_title varchar(255) not null,
+        menu_description varchar(2048) not null,
+        submenu_title varchar(255),
+        submenu_description varchar(2048),
+        dish_title varchar(255),
+        dish_description varchar(2048),
+        price float8
+    ) on commit drop
+    """
+)
+# Перенос одним оператором: новые записи связываются с родителями через
+# RETURNING вставок, поэтому не зависят от уже существующих в БД записей.
+# Триггеры счетчиков срабатывают один раз на каждую вставку
+MERGE_QUERY = text(
+    """
+    with menu_src as (
+        select menu_title, min(row_no) as first_row,
+            (array_agg(menu_description order by row_no))[1] as description
+        from import_rows group by menu_title
+    ), new_menus as (
+        insert into "RestaurantMenu" (title, description)
+        select menu_title, description from menu_src order by first_row
+        returning id, title
+    ), sub_menu_src as (
+        select menu_title, submenu_title, min(row_no) as first_row,
+            (array_agg(submenu_description order by row_no))[1] as description
+        from import_rows where submenu_title is not null
+        group by menu_title, submenu_title
+    ), new_sub_menus as (
+        insert into "RestaurantSubMenu" (menu_id, title, description)
+        select nm.id, s.submenu_title, s.description
+        from sub_menu_src s join new_menus nm on nm.title = s.menu_title
+        order by s.first_row
+        returning id, menu_id, title
+    ), new_dishes as (
+        insert into "RestaurantDish" (sub_menu_id, title, description, price)
+        select nsm.id, r.dish_title, r.dish_description, r.price
+        from import_rows r
+        join new_menus nm on nm.title = r.menu_title
+        join new_sub_menus nsm
+            on nsm.menu_id = nm.id and nsm.title = r.submenu_title
+        where r.dish_title is not null
+        order by r.row_no
+        returning id
+    )
+    select (select count(*) from new_menus) as menus,
+        (select count(*) from new_sub_menus) as submenus,
+        (select count(*) from new_dishes) as dishes
+    """
+)
+
+
+class ImportDataError(ValueError):
+
+    """Ошибка формата или проверки строк файла импорта"""
+
+    def __init__(self, errors: list[dict]) -> None:
+        super().__init__(errors)
+        self.errors = errors
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """
+    Функция разбиения потока байт UTF-8 на строки, байты не в UTF-8
+    отклоняют файл (ImportDataError)
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    try:
+        async for chunk in chunks:
+            lines = (tail + decoder.decode(chunk)).split("\n")
+            tail = lines.pop()
+            for line in lines:
+                yield line
+        tail += decoder.decode(b"", final=True)
+    except UnicodeDecodeError as exc:
+        raise ImportDataError([{"row": None, "msg": f"invalid utf-8: {exc.reason}"}])
+    if tail:
+        yield tail
+
+
+async def iter_csv(chunks: AsyncIterable[bytes]) -> AsyncIterator[dict]:
+    """
+    Функция чтения записей CSV с заголовком. Поле в кавычках может содержать
+    перевод строки: запись закончена, когда число кавычек в ней четное
+    """
+    header = None
+    pending: list[str] = []
+    async for line in iter_lines(chunks):
+        pending.append(line)
+        record = "\n".join(pending)
+        if record.count('"') % 2:
+            continue
+        pending = []
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        yield dict(zip(header, values))
+    if pending:
+        raise ImportDataError([{"row": None, "msg": "unterminated quoted field"}])
+
+
+async def iter_ndjson(chunks: AsyncIterable[bytes]) -> AsyncIterator[dict]:
+    """Функция чтения записей NDJSON, по одному объекту на строку"""
+    row_no = 0
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        row_no += 1
+        try:
+            row = orjson.loads(line)
+        except orjson.JSONDecodeError as exc:
+            raise ImportDataError([{"row": row_no, "msg": str(exc)}])
+        if not isinstance(row, dict):
+            raise ImportDataError([{"row": row_no, "msg": "row must be an object"}])
+        yield row
+
+
+# Меню и подменю повторяются в каждой строке своих блюд,
+# поэтому их проверка кешируется по значениям полей
+@lru_cache(maxsize=4096)
+def validate_menu(title, description) -> RequestPostRestaurantMenuSchema:
+    return RequestPostRestaurantMenuSchema(title=title, description=description)
+
+
+@lru_cache(maxsize=4096)
+def validate_sub_menu(title, description) -> RequestPostRestaurantSubMenuSchema:
+    return RequestPostRestaurantSubMenuSchema(title=title, description=description)
+
+
+def validate_row(row_no: int, row: dict) -> tuple:
+    """Функция проверки строки схемами POST запросов меню, подменю и блюда"""
+    menu = validate_menu(row.get("menu_title"), row.get("menu_description"))
+    sub_menu = dish = None
+    if row.get("submenu_title"):
+        sub_menu = validate_sub_menu(
+            row["submenu_title"], row.get("submenu_description")
+        )
+    if row.get("dish_title"):
+        if sub_menu is None:
+            raise ValueError("dish requires submenu_title")
+        dish = RequestPostRestaurantDishSchema(
+            title=row["dish_title"],
+            description=row.get("dish_description"),
+            price=row.get("price"),
+        )
+    record = (
+        row_no,
+        menu.title,
+        menu.description,
+        sub_menu and sub_menu.title,
+        sub_menu and sub_menu.description,
+        dish and dish.title,
+        dish and dish.description,
+        dish and dish.price,
+    )
+    for column, value in zip(IMPORT_COLUMNS, record[1:]):
+        max_length = FIELD_MAX_LENGTHS.get(column)
+        if max_length and value is not None and len(value) > max_length:
+            raise ValueError(
+                f"{column}: ensure this value has at most {max_length} characters"
+            )
+    return record
+
+
+def validate_chunk(chunk: list[tuple[int, dict]]) -> list[tuple]:
+    """Функция проверки пачки строк, ошибки собираются по всей пачке"""
+    records, errors = [], []
+    for row_no, row in chunk:
+        try:
+            records.append(validate_row(row_no, row))
+        except ValidationError as exc:
+            errors.extend(
+                {"row": row_no, "msg": f"{'.'.join(map(str, e['loc']))}: {e['msg']}"}
+                for e in exc.errors()
+            )
+        except (TypeError, ValueError) as exc:
+            # TypeError - нехешируемое значение поля (список, объект) в NDJSON
+            errors.append({"row": row_no, "msg": str(exc)})
+    if errors:
+        raise ImportDataError(errors[:MAX_REPORTED_ERRORS])
+    return records
+
+
+class ImportStats:
+
+    """Счетчик прочитанных строк импорта"""
+
+    def __init__(self) -> None:
+        self.rows = 0
+
+
+async def iter_records(
+    rows: AsyncIterable[dict], stats: ImportStats
+) -> AsyncIterator[tuple]:
+    """Функция проверки строк пачками и выдачи записей для COPY"""
+    chunk: list[tuple[int, dict]] = []
+    async for row in rows:
+        stats.rows += 1
+        chunk.append((stats.rows, row))
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            for record in validate_chunk(chunk):
+                yield record
+            chunk = []
+    for record in validate_chunk(chunk):
+        yield record
+
+
+async def import_menu(
+    asyn_db, chunks: AsyncIterable[bytes], file_format: str = "csv"
+) -> dict:
+    """
+    Функция импорта файла в одной транзакции сессии asyn_db,
+    возвращает число созданных записей и скорость загрузки (строк/сек)
+    """
+    start = time.perf_counter()
+    rows = iter_csv(chunks) if file_format == "csv" else iter_ndjson(chunks)
+    stats = ImportStats()
+    conn = await asyn_db.connection()
+    await conn.execute(CREATE_STAGING_QUERY)
+    raw_conn = await conn.get_raw_connection()
+    await raw_conn.driver_connection.copy_records_to_table(
+        "import_rows",
+        records=iter_records(rows, stats),
+        columns=("row_no", *IMPORT_COLUMNS),
+    )
+    created = (await conn.execute(MERGE_QUERY)).one()
+    await asyn_db.commit()
+    seconds = time.perf_counter() - start
+    return {
+        "rows": stats.rows,
+        "menus": created.menus,
+        "submenus": created.submenus,
+        "dishes": created.dishes,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(stats.rows / seconds) if seconds else 0,
+    }
+
+
+async def read_file(path: str) -> AsyncIterator[bytes]:
+    """Функция чтения файла частями по READ_CHUNK_SIZE"""
+    with open(path, "rb") as file:
+        while chunk := file.read(READ_CHUNK_SIZE):
+            yield chunk
+
+
+async def main(path: str, file_format: str) -> None:
+    async with db_async_session() as asyn_db:
+        try:
+            stats = await import_menu(asyn_db, read_file(path), file_format)
+        except ImportDataError as exc:
+            for error in exc.errors:
+                print(f"row {error['row']}: {error['msg']}")
+            raise SystemExit(1)
+    await CacheMenu.clear_cache(cache_redis)
+    print(
+        f"{stats['rows']} rows in {stats['seconds']} s "
+        f"({stats['rows_per_sec']} rows/sec): {stats['menus']} menus, "
+        f"{stats['submenus']} submenus, {stats['dishes']} dishes"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, default=None)
+    args = parser.parse_args()
+    file_format = args.format or ("ndjson" if args.path.endswith("json") else "csv")
+    asyncio.run(main(args.path, file_format))
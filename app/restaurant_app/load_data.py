@@ -1,5 +1,8 @@
+from functools import lru_cache
+
 from asyncpg import PostgresError
-from settings.db import get_db
+from sqlalchemy import bindparam, cast, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.exc import IntegrityError
 
 from .models import dish, menus, sub_menus
@@ -36,30 +39,72 @@ DATA_DISH = [
 ]
 
 
+@lru_cache
+def insert_rows_query(table, columns: tuple[str, ...]):
+    """
+    Запрос вставки строк, переданных массивами по столбцам:
+    INSERT ... SELECT unnest(...) ... RETURNING id. Текст запроса не зависит
+    от числа строк, поэтому компилируется и подготавливается один раз
+    """
+    arrays = (
+        func.unnest(cast(bindparam(name), ARRAY(table.c[name].type)))
+        for name in columns
+    )
+    return table.insert().from_select(columns, select(*arrays)).returning(table.c.id)
+
+
+async def insert_rows(asyn_db, table, rows: list[dict]) -> list[int]:
+    """
+    Функция вставки строк одним многострочным INSERT ... RETURNING id.
+    Порядок id в RETURNING не гарантирован, для привязки потомков к строкам
+    нужен insert_rows_with_ids
+    """
+    columns = tuple(rows[0])
+    params = {name: [row[name] for row in rows] for name in columns}
+    query = insert_rows_query(table, columns)
+    return (await asyn_db.execute(query, params)).scalars().all()
+
+
+@lru_cache
+def allocate_ids_query(table):
+    """Запрос получения новых id из последовательности столбца id таблицы"""
+    sequence = func.pg_get_serial_sequence(f'"{table.name}"', "id")
+    return select(func.nextval(sequence)).select_from(
+        func.generate_series(1, bindparam("count"))
+    )
+
+
+async def insert_rows_with_ids(asyn_db, table, rows: list[dict]) -> list[int]:
+    """
+    Функция вставки строк с заранее выделенными id (отдельный запрос
+    к последовательности таблицы), возвращает id в порядке строк.
+    id растут в порядке строк, как при обычной вставке по одной
+    """
+    query = allocate_ids_query(table)
+    ids = sorted((await asyn_db.execute(query, {"count": len(rows)})).scalars())
+    await insert_rows(
+        asyn_db, table, [dict(id=row_id, **row) for row_id, row in zip(ids, rows)]
+    )
+    return ids
+
+
 class LoadTestData:
     @staticmethod
-    async def to_db() -> bool:
-        gener = get_db()
-        asyn_db = await gener.__anext__()
-        query_load_menu = menus.insert().returning(menus.c.id).values(DATA_MENU)
-        result_menu = (await asyn_db.execute(query_load_menu)).fetchall()
+    async def to_db(asyn_db) -> bool:
+        result_menu = await insert_rows_with_ids(asyn_db, menus, DATA_MENU)
         indx = 0
-        for ids in result_menu:
+        for menu_id in result_menu:
             for _ in range(0, 2):
-                DATA_SUB_MENU[indx].update(menu_id=ids._asdict()["id"])
+                DATA_SUB_MENU[indx].update(menu_id=menu_id)
                 indx += 1
-        query_load_sub_menu = (
-            sub_menus.insert().returning(sub_menus.c.id).values(DATA_SUB_MENU)
-        )
-        result_sub_menu = (await asyn_db.execute(query_load_sub_menu)).fetchall()
+        result_sub_menu = await insert_rows_with_ids(asyn_db, sub_menus, DATA_SUB_MENU)
         indx = 0
-        for ids in result_sub_menu:
+        for sub_menu_id in result_sub_menu:
             for _ in range(0, 2):
-                DATA_DISH[indx].update(sub_menu_id=ids._asdict()["id"])
+                DATA_DISH[indx].update(sub_menu_id=sub_menu_id)
                 indx += 1
-        query_load_dish = dish.insert().values(DATA_DISH)
         try:
-            await asyn_db.execute(query_load_dish)
+            await insert_rows(asyn_db, dish, DATA_DISH)
             await asyn_db.commit()
         except IntegrityError:
             return False
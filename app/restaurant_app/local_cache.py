@@ -0,0 +1,105 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any
+
+from redis.exceptions import RedisError
+from settings.settings import LOCAL_CACHE_ENABLED, LOCAL_CACHE_MAX_SIZE, LOCAL_CACHE_TTL
+
+# Канал Redis, в который публикуются удаленные из кеша ключи
+INVALIDATION_CHANNEL = "cache_invalidation"
+
+
+class LocalCache:
+
+    """
+    Ограниченный по размеру LRU кеш в памяти процесса с TTL на запись.
+    Стоит перед Redis, согласованность между воркерами поддерживается
+    через канал инвалидации, TTL ограничивает устаревание при потере сообщений.
+    """
+
+    def __init__(self, max_size: int, ttl: float, enabled: bool = True) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.enabled = enabled
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Метод получения записи, просроченная запись считается промахом"""
+        if not self.enabled:
+            return default
+        item = self._data.get(key)
+        if item is None or item[0] < time.monotonic():
+            if item is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def set(self, key: str, value: Any) -> None:
+        """Метод сохранения записи, при переполнении вытесняется самая старая"""
+        if not self.enabled:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, *keys: str) -> None:
+        """Метод удаления записей по ключам"""
+        for key in keys:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Метод полной очистки кеша"""
+        self._data.clear()
+
+    def metrics(self) -> dict[str, float]:
+        """Счетчики кеша для экспорта метрик"""
+        return {
+            "local_cache_size": len(self._data),
+            "local_cache_max_size": self.max_size,
+            "local_cache_hits_total": self.hits,
+            "local_cache_misses_total": self.misses,
+            "local_cache_evictions_total": self.evictions,
+        }
+
+
+local_cache = LocalCache(LOCAL_CACHE_MAX_SIZE, LOCAL_CACHE_TTL, LOCAL_CACHE_ENABLED)
+
+
+async def publish_invalidation(asyn_cache, *keys: str) -> None:
+    """Функция оповещения всех процессов об удалении ключей из кеша"""
+    local_cache.delete(*keys)
+    await asyn_cache.publish(INVALIDATION_CHANNEL, json.dumps(keys))
+
+
+async def listen_invalidation(asyn_cache) -> None:
+    """
+    Функция подписки на канал инвалидации, удаляет из локального кеша
+    ключи, удаленные другими процессами. Пока подписки нет (старт или обрыв
+    соединения), сообщения могут теряться, поэтому локальный кеш очищается.
+    """
+    while True:
+        pubsub = asyn_cache.pubsub()
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            local_cache.clear()
+            while True:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+                if message is not None:
+                    local_cache.delete(*json.loads(message["data"]))
+        except RedisError:
+            local_cache.clear()
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.close()
@@ -0,0 +1,60 @@
+from settings.db import cache_pool_metrics, db_pool_metrics
+
+from .cache_module import key_family
+from .local_cache import local_cache
+
+# Количество ключей, обрабатываемых за один SCAN/pipeline при отчете по памяти
+MEMORY_SCAN_BATCH = 500
+
+
+def collect_metrics() -> dict[str, float]:
+    """Сбор всех метрик приложения"""
+    metrics: dict[str, float] = {}
+    metrics.update(db_pool_metrics())
+    metrics.update(cache_pool_metrics())
+    metrics.update(local_cache.metrics())
+    return metrics
+
+
+def to_prometheus(metrics: dict[str, float]) -> str:
+    """Преобразование метрик в текстовый формат Prometheus"""
+    return "".join(f"{name} {value}\n" for name, value in metrics.items())
+
+
+async def cache_memory_usage(asyn_cache) -> dict:
+    """
+    Отчет по памяти Redis: занятая память, лимит и политика вытеснения,
+    количество ключей и байт по семействам ключей кеша. Обходит все ключи,
+    поэтому не входит в метрики, которые собираются на каждый scrape.
+    """
+    families: dict[str, dict[str, int]] = {}
+    keys: list[bytes] = []
+
+    async def measure() -> None:
+        async with asyn_cache.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.memory_usage(key)
+            sizes = await pipe.execute()
+        for key, size in zip(keys, sizes):
+            family = families.setdefault(
+                key_family(key.decode()), {"keys": 0, "bytes": 0}
+            )
+            family["keys"] += 1
+            family["bytes"] += size or 0
+        keys.clear()
+
+    async for key in asyn_cache.scan_iter(count=MEMORY_SCAN_BATCH):
+        keys.append(key)
+        if len(keys) >= MEMORY_SCAN_BATCH:
+            await measure()
+    await measure()
+    memory = await asyn_cache.info("memory")
+    stats = await asyn_cache.info("stats")
+    return {
+        "used_memory": memory["used_memory"],
+        "maxmemory": memory["maxmemory"],
+        "maxmemory_policy": memory["maxmemory_policy"],
+        "evicted_keys": stats["evicted_keys"],
+        "expired_keys": stats["expired_keys"],
+        "families": families,
+    }
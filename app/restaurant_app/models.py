@@ -1,6 +1,6 @@
 from typing import Any
 
-from sqlalchemy import Column, Float, ForeignKey, Integer, String
+from sqlalchemy import Column, Float, ForeignKey, Index, Integer, String
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -12,6 +12,9 @@ class RestaurantMenu(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
     description = Column(String(2048))
+    # Счетчики поддерживаются триггерами БД (миграция 3f1c9a7d2b64)
+    submenus_count = Column(Integer, nullable=False, server_default="0")
+    dishes_count = Column(Integer, nullable=False, server_default="0")
     sub_menu = relationship("RestaurantSubMenu", back_populates="menu")
 
 
@@ -20,12 +23,14 @@ menus = RestaurantMenu.__table__
 
 class RestaurantSubMenu(Base):
     __tablename__ = "RestaurantSubMenu"
+    __table_args__ = (Index("ix_RestaurantSubMenu_menu_id_id", "menu_id", "id"),)
     id = Column(Integer, primary_key=True)
     menu_id = Column(
         Integer, ForeignKey("RestaurantMenu.id", ondelete="CASCADE"), nullable=False
     )
     title = Column(String(255), nullable=False)
     description = Column(String(2048), nullable=False)
+    dishes_count = Column(Integer, nullable=False, server_default="0")
     menu = relationship("RestaurantMenu", back_populates="sub_menu")
     dish = relationship("RestaurantDish", back_populates="sub_menu")
 
@@ -35,6 +40,7 @@ sub_menus = RestaurantSubMenu.__table__
 
 class RestaurantDish(Base):
     __tablename__ = "RestaurantDish"
+    __table_args__ = (Index("ix_RestaurantDish_sub_menu_id_id", "sub_menu_id", "id"),)
     id = Column(Integer, primary_key=True)
     sub_menu_id = Column(
         Integer, ForeignKey("RestaurantSubMenu.id", ondelete="CASCADE"), nullable=False
@@ -1,115 +1,326 @@
+import asyncio
 import os
 from uuid import uuid4
 
-from fastapi.responses import FileResponse, JSONResponse
-from settings.db import get_cache, get_db
-
-from restaurant_app.cache_module import CacheDish, CacheMenu, CacheSubMenu
+import orjson
+from fastapi.responses import (
+    JSONResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
+from redis.exceptions import RedisError
+from restaurant_app.cache_module import (
+    CACHE_MISS,
+    XLSX_READY_STATUSES,
+    CacheData,
+    CacheDish,
+    CacheMenu,
+    CacheSubMenu,
+    CacheTree,
+    CacheXLSX,
+    StaleCacheData,
+    get_cache_data,
+    get_cache_version,
+    get_load_version,
+)
+from restaurant_app.compression import compress_body, negotiate
 from restaurant_app.crud import CrudDish, CrudMenu, CrudSubMenu
-from restaurant_app.tasks import app_celery, start_create_xlsx
-
+from restaurant_app.tasks import start_create_xlsx
+from settings.settings import (
+    DOWNLOAD_ACCEL_REDIRECT,
+    HTTP_CACHE_CONTROL,
+    LIST_PAGE_SIZE,
+    db_async_session,
+)
+
+from .export_data import EXPORT_MEDIA_TYPES, export_menu
+from .file_response import RangeFileResponse, etag_matches
+from .import_data import ImportDataError, import_menu
 from .load_data import LoadTestData
+from .metrics import cache_memory_usage, collect_metrics, to_prometheus
+from .single_flight import refresh_in_background, single_flight
+from .task_status import task_status_hub
 
 BASE_URL = "http://localhost:8000/api/v1"
 
 
+def make_etag(version: bytes, encoding: str | None = None) -> str:
+    """
+    Функция получения строгого ETag из версии записи кеша,
+    у каждой кодировки тела свой ETag
+    """
+    if encoding:
+        return f'"{version.decode()}-{encoding}"'
+    return f'"{version.decode()}"'
+
+
+def json_body_response(body: bytes, encoding: str | None = None) -> Response:
+    """
+    Функция формирования ответа из заранее сериализованного тела.
+    Такой ответ FastAPI отдает как есть, без повторной валидации схемой.
+    Тело отдается в кодировке encoding: готовой копией из кеша, а если ее
+    нет (промах кеша) - сжимается здесь. ETag ставится только свежей записи
+    кеша с известной версией.
+    """
+    headers = {"Cache-Control": HTTP_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    content = body
+    content_encoding = getattr(body, "encoding", None)
+    if content_encoding is None and encoding is not None:
+        encoded = getattr(body, "variants", {}).get(encoding)
+        if encoded is None:
+            encoded = compress_body(body, encoding)
+        if encoded is not None:
+            content, content_encoding = encoded, encoding
+    if content_encoding:
+        headers["Content-Encoding"] = content_encoding
+    if (
+        isinstance(body, CacheData)
+        and not isinstance(body, StaleCacheData)
+        and body.version
+    ):
+        headers["ETag"] = make_etag(body.version, content_encoding)
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
+async def not_modified(
+    asyn_cache, key: str, if_none_match: str | None, encoding: str | None = None
+):
+    """
+    Функция проверки If-None-Match по версии записи, без чтения тела из кеша
+    и без запроса в БД. Подходит ETag и сжатого, и несжатого тела:
+    у них одно содержимое. Возвращает ответ 304 либо None.
+    """
+    if not if_none_match:
+        return None
+    version = await get_cache_version(asyn_cache, key)
+    if version is None:
+        return None
+    for etag in {make_etag(version, encoding), make_etag(version)}:
+        if etag_matches(if_none_match, etag):
+            return Response(
+                status_code=304,
+                headers={
+                    "ETag": etag,
+                    "Cache-Control": HTTP_CACHE_CONTROL,
+                    "Vary": "Accept-Encoding",
+                },
+            )
+    return None
+
+
+async def cached_body(
+    asyn_cache, key: str, loader, encoding: str | None = None
+) -> bytes | str:
+    """
+    Функция получения тела ответа из кеша. При промахе запись пересчитывается
+    один раз на все одновременные запросы, устаревшая запись отдается сразу,
+    а ее пересчет уходит в фон.
+    """
+    body = await get_cache_data(asyn_cache, key, encoding)
+    if body is CACHE_MISS:
+        return await single_flight(asyn_cache, key, loader)
+    if isinstance(body, StaleCacheData):
+        refresh_in_background(asyn_cache, key, loader)
+    return body
+
+
+async def cached_response(
+    asyn_cache,
+    key: str,
+    loader,
+    if_none_match: str | None = None,
+    not_found: dict | None = None,
+    accept_encoding: str | None = None,
+) -> Response:
+    """
+    Функция формирования ответа на чтение: 304 при совпадении ETag,
+    404 с not_found для NotFound, иначе тело из кеша либо из Postgres,
+    сжатое по Accept-Encoding
+    """
+    encoding = negotiate(accept_encoding)
+    response = await not_modified(asyn_cache, key, if_none_match, encoding)
+    if response is not None:
+        return response
+    body = await cached_body(asyn_cache, key, loader, encoding)
+    if body == "NotFound":
+        return JSONResponse(content=not_found, status_code=404)
+    return json_body_response(body, encoding)
+
+
 class MenuService:
     """Логика для меню"""
 
     @staticmethod
-    async def list_menu() -> list[dict]:
-        """Метод получения списка меню либо из кеша либо из Postgres"""
-        gener_cache = get_cache()
-        asyn_cache = await gener_cache.__anext__()
-        if await CacheMenu.check_cache(asyn_cache):
-            return await CacheMenu.get_menu(asyn_cache)
-        response_data = await CrudMenu.get_menu_db()
-        return await CacheMenu.set_menu(asyn_cache, response_data)
+    async def list_menu(
+        asyn_cache,
+        after_id: int = 0,
+        limit: int = LIST_PAGE_SIZE,
+        if_none_match: str | None = None,
+        accept_encoding: str | None = None,
+    ) -> Response:
+        """Метод получения страницы списка меню либо из кеша либо из Postgres"""
+
+        key = CacheMenu.cache_key(None, after_id, limit)
+
+        async def load_menu():
+            version = await get_load_version(asyn_cache, key)
+            response_data = await CrudMenu.get_menu_db(None, after_id, limit)
+            return await CacheMenu.set_menu(
+                asyn_cache, response_data, None, after_id, limit, version
+            )
+
+        return await cached_response(
+            asyn_cache,
+            key,
+            load_menu,
+            if_none_match,
+            accept_encoding=accept_encoding,
+        )
+
+    @staticmethod
+    async def menu_tree(
+        asyn_cache,
+        if_none_match: str | None = None,
+        accept_encoding: str | None = None,
+    ) -> Response:
+        """
+        Метод получения всех меню с подменю и блюдами одним документом
+        из кеша либо одним запросом в Postgres
+        """
+
+        async def load_tree():
+            # Версия читается до запроса: дерево, собранное до записи
+            # в БД, не перезапишет кеш после ее инвалидации
+            version = await CacheTree.catalog_version(asyn_cache)
+            body = await CrudMenu.get_menu_tree_db()
+            return await CacheTree.set_tree(asyn_cache, body, version) or body
+
+        return await cached_response(
+            asyn_cache,
+            CacheTree.cache_key(),
+            load_tree,
+            if_none_match,
+            accept_encoding=accept_encoding,
+        )
 
     @staticmethod
-    async def get_menu_id(menu_id) -> dict:
+    async def get_menu_id(
+        menu_id,
+        asyn_cache,
+        if_none_match: str | None = None,
+        accept_encoding: str | None = None,
+    ) -> Response:
         """Метод получения меню по id либо из кеша либо из Postgres"""
-        gener_cache = get_cache()
-        asyn_cache = await gener_cache.__anext__()
-        if await CacheMenu.check_cache(asyn_cache, menu_id):
-            return await CacheMenu.get_menu(asyn_cache, menu_id)
-        response_data = await CrudMenu.get_menu_db(menu_id)
-        if response_data == "NotFound":
-            return JSONResponse(content={"detail": "menu not found"}, status_code=404)
-        return await CacheMenu.set_menu(asyn_cache, response_data, menu_id)
+
+        key = CacheMenu.cache_key(menu_id)
+
+        async def load_menu():
+            version = await get_load_version(asyn_cache, key)
+            response_data = await CrudMenu.get_menu_db(menu_id)
+            return await CacheMenu.set_menu(
+                asyn_cache, response_data, menu_id, version=version
+            )
+
+        return await cached_response(
+            asyn_cache,
+            key,
+            load_menu,
+            if_none_match,
+            CacheMenu.menu_404,
+            accept_encoding,
+        )
 
     @staticmethod
-    async def create_menu(request_data) -> dict:
+    async def create_menu(request_data, asyn_cache, asyn_db) -> dict:
         """Метод добавления меню в БД и очистки не актуального кеша"""
-        gener_cache = get_cache()
-        gener_db = get_db()
-        asyn_cache = await gener_cache.__anext__()
-        asyn_db = await gener_db.__anext__()
         response_data = await CrudMenu.create_menu_db(request_data, asyn_db)
         await CacheMenu.clear_cache(asyn_cache)
         return response_data
 
     @staticmethod
-    async def edit_menu(menu_id, request_data) -> dict:
+    async def edit_menu(menu_id, request_data, asyn_cache, asyn_db) -> dict:
         """Метод редактирования меню в БД и очистки не актуального кеша"""
-        gener_cache = get_cache()
-        gener_db = get_db()
-        asyn_cache = await gener_cache.__anext__()
-        asyn_db = await gener_db.__anext__()
-        response_data = await CacheMenu.clear_cache(asyn_cache, menu_id)
+        # Кеш очищается после записи в БД, иначе пересчет между очисткой
+        # и записью сохранил бы в кеш старые данные
+        response_data = await CrudMenu.edit_menu_db(menu_id, request_data, asyn_db)
         if response_data == "NotFound":
             return JSONResponse(content={"detail": "menu not found"}, status_code=404)
-        return await CrudMenu.edit_menu_db(menu_id, request_data, asyn_db)
+        await CacheMenu.clear_cache(asyn_cache, menu_id)
+        return response_data
 
     @staticmethod
-    async def delete_menu(menu_id) -> dict:
+    async def delete_menu(menu_id, asyn_cache, asyn_db) -> dict:
         """Метод удаления меню в БД и очистки не актуального кеша"""
-        gener_cache = get_cache()
-        gener_db = get_db()
-        asyn_cache = await gener_cache.__anext__()
-        asyn_db = await gener_db.__anext__()
+        response_data = await CrudMenu.delete_menu_db(menu_id, asyn_db)
         await CacheMenu.clear_cache(asyn_cache, menu_id)
-        return await CrudMenu.delete_menu_db(menu_id, asyn_db)
+        return response_data
 
 
 class SubMenuService:
     """Логика для подменю"""
 
     @staticmethod
-    async def list_submenu(menu_id) -> list[dict]:
-        gener_cache = get_cache()
-        asyn_cache = await gener_cache.__anext__()
-        """Метод получения списка подменю либо из кеша либо из Postgres"""
-        if await CacheSubMenu.check_cache(asyn_cache, menu_id):
-            return await CacheSubMenu.get_sub_menu(asyn_cache, menu_id)
-        response_data = await CrudSubMenu.get_sub_menu_db(menu_id)
-        if response_data == []:
-            return response_data
-        return await CacheSubMenu.set_sub_menu(asyn_cache, response_data, menu_id)
+    async def list_submenu(
+        menu_id,
+        asyn_cache,
+        after_id: int = 0,
+        limit: int = LIST_PAGE_SIZE,
+        if_none_match: str | None = None,
+        accept_encoding: str | None = None,
+    ) -> Response:
+        """Метод получения страницы списка подменю либо из кеша либо из Postgres"""
+
+        key = CacheSubMenu.cache_key(menu_id, None, after_id, limit)
+
+        async def load_sub_menu():
+            version = await get_load_version(asyn_cache, key)
+            response_data = await CrudSubMenu.get_sub_menu_db(
+                menu_id, None, after_id, limit
+            )
+            return await CacheSubMenu.set_sub_menu(
+                asyn_cache, response_data, menu_id, None, after_id, limit, version
+            )
+
+        return await cached_response(
+            asyn_cache,
+            key,
+            load_sub_menu,
+            if_none_match,
+            accept_encoding=accept_encoding,
+        )
 
     @staticmethod
-    async def get_submenu_id(menu_id, sub_menu_id) -> dict:
+    async def get_submenu_id(
+        menu_id,
+        sub_menu_id,
+        asyn_cache,
+        if_none_match: str | None = None,
+        accept_encoding: str | None = None,
+    ) -> Response:
         """Метод получения подменю по id либо из кеша либо из Postgres"""
-        gener_cache = get_cache()
-        asyn_cache = await gener_cache.__anext__()
-        if await CacheSubMenu.check_cache(asyn_cache, menu_id, sub_menu_id):
-            return await CacheSubMenu.get_sub_menu(asyn_cache, menu_id, sub_menu_id)
-        response_data = await CrudSubMenu.get_sub_menu_db(menu_id, sub_menu_id)
-        if response_data == "NotFound":
-            return JSONResponse(
-                content={"detail": "submenu not found"}, status_code=404
+
+        key = CacheSubMenu.cache_key(menu_id, sub_menu_id)
+
+        async def load_sub_menu():
+            version = await get_load_version(asyn_cache, key)
+            response_data = await CrudSubMenu.get_sub_menu_db(menu_id, sub_menu_id)
+            return await CacheSubMenu.set_sub_menu(
+                asyn_cache, response_data, menu_id, sub_menu_id, version=version
             )
-        return await CacheSubMenu.set_sub_menu(
-            asyn_cache, response_data, menu_id, sub_menu_id
+
+        return await cached_response(
+            asyn_cache,
+            key,
+            load_sub_menu,
+            if_none_match,
+            CacheSubMenu.sub_menu_404,
+            accept_encoding,
         )
 
     @staticmethod
-    async def create_submenu(menu_id, request_data) -> dict:
+    async def create_submenu(menu_id, request_data, asyn_cache, asyn_db) -> dict:
         """Метод добавления подменю в БД и очистки не актуального кеша"""
-        gener_cache = get_cache()
-        gener_db = get_db()
-        asyn_cache = await gener_cache.__anext__()
-        asyn_db = await gener_db.__anext__()
         response_data = await CrudSubMenu.create_sub_menu_db(
             menu_id, request_data, asyn_db
         )
@@ -117,12 +328,10 @@ class SubMenuService:
         return response_data
 
     @staticmethod
-    async def edit_submenu(menu_id, sub_menu_id, request_data) -> dict:
+    async def edit_submenu(
+        menu_id, sub_menu_id, request_data, asyn_cache, asyn_db
+    ) -> dict:
         """Метод редактирования подменю в БД и очистки не актуального кеша"""
-        gener_cache = get_cache()
-        gener_db = get_db()
-        asyn_cache = await gener_cache.__anext__()
-        asyn_db = await gener_db.__anext__()
         response_data = await CrudSubMenu.edit_sub_menu_db(
             menu_id, sub_menu_id, request_data, asyn_db
         )
@@ -134,54 +343,136 @@ class SubMenuService:
         return response_data
 
     @staticmethod
-    async def delete_submenu(menu_id, sub_menu_id) -> dict:
+    async def delete_submenu(menu_id, sub_menu_id, asyn_cache, asyn_db) -> dict:
         """Метод удаления подменю в БД и очистки не актуального кеша"""
-        gener_cache = get_cache()
-        gener_db = get_db()
-        asyn_cache = await gener_cache.__anext__()
-        asyn_db = await gener_db.__anext__()
         response_data = await CrudSubMenu.delete_sub_menu_db(
             menu_id, sub_menu_id, asyn_db
         )
         await CacheSubMenu.clear_cache(asyn_cache, menu_id, sub_menu_id)
         return response_data
 
+    @staticmethod
+    async def create_submenus(menu_id, request_data, asyn_cache, asyn_db):
+        """Метод пакетного добавления подменю в БД и одной очистки кеша"""
+        response_data = await CrudSubMenu.create_sub_menus_db(
+            menu_id, request_data, asyn_db
+        )
+        if response_data == "NotFound":
+            return JSONResponse(content=CacheMenu.menu_404, status_code=404)
+        await CacheSubMenu.clear_cache_bulk(asyn_cache, menu_id)
+        return response_data
+
+    @staticmethod
+    async def edit_submenus(menu_id, request_data, asyn_cache, asyn_db):
+        """Метод пакетного редактирования подменю в БД и одной очистки кеша"""
+        response_data = await CrudSubMenu.edit_sub_menus_db(
+            menu_id, request_data, asyn_db
+        )
+        if response_data == "NotFound":
+            return JSONResponse(content=CacheMenu.menu_404, status_code=404)
+        if response_data:
+            await CacheSubMenu.clear_cache_bulk(
+                asyn_cache, menu_id, [int(obj["id"]) for obj in response_data]
+            )
+        return response_data
+
+    @staticmethod
+    async def delete_submenus(menu_id, request_data, asyn_cache, asyn_db):
+        """Метод пакетного удаления подменю в БД и одной очистки кеша"""
+        deleted = await CrudSubMenu.delete_sub_menus_db(
+            menu_id, request_data.ids, asyn_db
+        )
+        if deleted == "NotFound":
+            return JSONResponse(content=CacheMenu.menu_404, status_code=404)
+        if deleted:
+            await CacheSubMenu.clear_cache_bulk(asyn_cache, menu_id, deleted)
+        return {
+            "status": True,
+            "message": "The submenus have been deleted",
+            "ids": [str(sub_menu_id) for sub_menu_id in deleted],
+        }
+
 
 class DishService:
     """Логика для блюд"""
 
     @staticmethod
-    async def list_dish(menu_id, sub_menu_id) -> list[dict]:
-        """Метод получения списка блюд либо из кеша либо из Postgres"""
-        gener_cache = get_cache()
-        gener_db = get_db()
-        asyn_cache = await gener_cache.__anext__()
-        asyn_db = await gener_db.__anext__()
-        if await CacheDish.check_cache(asyn_cache, menu_id, sub_menu_id):
-            return await CacheDish.get_dish(asyn_cache, menu_id, sub_menu_id)
-        response_data = await CrudDish.get_dish_db(menu_id, sub_menu_id, asyn_db)
-        return await CacheDish.set_dish(asyn_cache, response_data, menu_id, sub_menu_id)
+    async def list_dish(
+        menu_id,
+        sub_menu_id,
+        asyn_cache,
+        after_id: int = 0,
+        limit: int = LIST_PAGE_SIZE,
+        if_none_match: str | None = None,
+        accept_encoding: str | None = None,
+    ) -> Response:
+        """Метод получения страницы списка блюд либо из кеша либо из Postgres"""
+
+        key = CacheDish.cache_key(menu_id, sub_menu_id, None, after_id, limit)
+
+        async def load_dish():
+            # Версия читается до запроса: список, прочитанный до записи
+            # в БД, не перезапишет кеш после ее инвалидации
+            version = await get_load_version(asyn_cache, key)
+            # Пересчет может идти в фоне после ответа, поэтому сессия своя
+            async with db_async_session() as asyn_db:
+                response_data = await CrudDish.get_dish_db(
+                    menu_id, sub_menu_id, asyn_db, None, after_id, limit
+                )
+            return await CacheDish.set_dish(
+                asyn_cache,
+                response_data,
+                menu_id,
+                sub_menu_id,
+                None,
+                after_id,
+                limit,
+                version,
+            )
+
+        return await cached_response(
+            asyn_cache,
+            key,
+            load_dish,
+            if_none_match,
+            accept_encoding=accept_encoding,
+        )
 
     @staticmethod
     async def get_dish_id(
         menu_id,
         sub_menu_id,
         dish_id,
-    ) -> dict:
+        asyn_cache,
+        if_none_match: str | None = None,
+        accept_encoding: str | None = None,
+    ) -> Response:
         """Метод получения блюда по id либо из кеша либо из Postgres"""
-        gener_cache = get_cache()
-        gener_db = get_db()
-        asyn_cache = await gener_cache.__anext__()
-        asyn_db = await gener_db.__anext__()
-        if await CacheDish.check_cache(asyn_cache, menu_id, sub_menu_id, dish_id):
-            return await CacheDish.get_dish(asyn_cache, menu_id, sub_menu_id, dish_id)
-        response_data = await CrudDish.get_dish_db(
-            menu_id, sub_menu_id, asyn_db, dish_id
-        )
-        if response_data == "NotFound":
-            return JSONResponse(content={"detail": "dish not found"}, status_code=404)
-        return await CacheDish.set_dish(
-            asyn_cache, response_data, menu_id, sub_menu_id, dish_id
+
+        key = CacheDish.cache_key(menu_id, sub_menu_id, dish_id)
+
+        async def load_dish():
+            version = await get_load_version(asyn_cache, key)
+            async with db_async_session() as asyn_db:
+                response_data = await CrudDish.get_dish_db(
+                    menu_id, sub_menu_id, asyn_db, dish_id
+                )
+            return await CacheDish.set_dish(
+                asyn_cache,
+                response_data,
+                menu_id,
+                sub_menu_id,
+                dish_id,
+                version=version,
+            )
+
+        return await cached_response(
+            asyn_cache,
+            key,
+            load_dish,
+            if_none_match,
+            CacheDish.dish_404,
+            accept_encoding,
         )
 
     @staticmethod
@@ -189,12 +480,10 @@ class DishService:
         menu_id,
         sub_menu_id,
         request_data,
+        asyn_cache,
+        asyn_db,
     ) -> dict:
         """Метод добавления блюда в БД и очистки не актуального кеша"""
-        gener_cache = get_cache()
-        gener_db = get_db()
-        asyn_cache = await gener_cache.__anext__()
-        asyn_db = await gener_db.__anext__()
         response_data = await CrudDish.create_dish_db(
             menu_id, sub_menu_id, request_data, asyn_db
         )
@@ -207,12 +496,10 @@ class DishService:
         sub_menu_id,
         dish_id,
         request_data,
+        asyn_cache,
+        asyn_db,
     ) -> dict:
         """Метод редактирования блюда в БД и очистки не актуального кеша"""
-        gener_cache = get_cache()
-        gener_db = get_db()
-        asyn_cache = await gener_cache.__anext__()
-        asyn_db = await gener_db.__anext__()
         response_data = await CrudDish.edit_dish_db(
             menu_id, sub_menu_id, dish_id, request_data, asyn_db
         )
@@ -226,52 +513,175 @@ class DishService:
         menu_id,
         sub_menu_id,
         dish_id,
+        asyn_cache,
+        asyn_db,
     ) -> dict:
         """Метод удаления блюда в БД и очистки не актуального кеша"""
-        gener_cache = get_cache()
-        gener_db = get_db()
-        asyn_cache = await gener_cache.__anext__()
-        asyn_db = await gener_db.__anext__()
         response_data = await CrudDish.delete_dish_db(
             menu_id, sub_menu_id, dish_id, asyn_db
         )
+        if response_data == "NotFound":
+            return JSONResponse(content={"detail": "dish not found"}, status_code=404)
         await CacheDish.clear_cache(asyn_cache, menu_id, sub_menu_id, dish_id)
         return response_data
 
+    @staticmethod
+    async def create_dishes(
+        menu_id,
+        sub_menu_id,
+        request_data,
+        asyn_cache,
+        asyn_db,
+    ):
+        """Метод пакетного добавления блюд в БД и одной очистки кеша"""
+        response_data = await CrudDish.create_dishes_db(
+            menu_id, sub_menu_id, request_data, asyn_db
+        )
+        if response_data == "NotFound":
+            return JSONResponse(content=CacheSubMenu.sub_menu_404, status_code=404)
+        await CacheDish.clear_cache_bulk(asyn_cache, menu_id, sub_menu_id)
+        return response_data
+
+    @staticmethod
+    async def edit_dishes(
+        menu_id,
+        sub_menu_id,
+        request_data,
+        asyn_cache,
+        asyn_db,
+    ):
+        """Метод пакетного редактирования блюд в БД и одной очистки кеша"""
+        response_data = await CrudDish.edit_dishes_db(
+            menu_id, sub_menu_id, request_data, asyn_db
+        )
+        if response_data == "NotFound":
+            return JSONResponse(content=CacheSubMenu.sub_menu_404, status_code=404)
+        if response_data:
+            await CacheDish.clear_cache_bulk(
+                asyn_cache,
+                menu_id,
+                sub_menu_id,
+                [int(obj["id"]) for obj in response_data],
+            )
+        return response_data
+
+    @staticmethod
+    async def delete_dishes(
+        menu_id,
+        sub_menu_id,
+        request_data,
+        asyn_cache,
+        asyn_db,
+    ):
+        """Метод пакетного удаления блюд в БД и одной очистки кеша"""
+        deleted = await CrudDish.delete_dishes_db(
+            menu_id, sub_menu_id, request_data.ids, asyn_db
+        )
+        if deleted == "NotFound":
+            return JSONResponse(content=CacheSubMenu.sub_menu_404, status_code=404)
+        if deleted:
+            await CacheDish.clear_cache_bulk(asyn_cache, menu_id, sub_menu_id, deleted)
+        return {
+            "status": True,
+            "message": "The dishes have been deleted",
+            "ids": [str(dish_id) for dish_id in deleted],
+        }
+
 
 class LoadData:
     """Логика загрузки данны в БД"""
 
     @staticmethod
-    async def test_data_to_db() -> JSONResponse:
-        """Метод загрузки тестовых данных в БД"""
-        bool_load = await LoadTestData.to_db()
+    async def test_data_to_db(asyn_cache, asyn_db) -> JSONResponse:
+        """Метод загрузки тестовых данных в БД и очистки кеша списка меню"""
+        bool_load = await LoadTestData.to_db(asyn_db)
         if bool_load:
+            await CacheMenu.clear_cache(asyn_cache)
             return JSONResponse(content={"detail": "Данные загружены"}, status_code=200)
         return JSONResponse(
             content={"detail": "Ошибка при загрузке данных"}, status_code=500
         )
 
+    @staticmethod
+    async def import_file(chunks, file_format, asyn_cache, asyn_db):
+        """Метод потокового импорта меню из файла и очистки кеша списка меню"""
+        try:
+            stats = await import_menu(asyn_db, chunks, file_format)
+        except ImportDataError as exc:
+            await asyn_db.rollback()
+            return JSONResponse(content={"detail": exc.errors}, status_code=422)
+        await CacheMenu.clear_cache(asyn_cache)
+        return stats
+
+
+class ExportData:
+    """Логика потоковой выгрузки меню"""
+
+    @staticmethod
+    async def export_file(file_format: str) -> StreamingResponse:
+        """
+        Метод выгрузки всего меню в CSV/NDJSON. Ответ отправляется частями
+        по мере чтения курсора, память не зависит от размера меню
+        """
+        return StreamingResponse(
+            export_menu(file_format),
+            media_type=EXPORT_MEDIA_TYPES[file_format],
+            headers={
+                "Content-Disposition": f'attachment; filename="menu.{file_format}"',
+                "Cache-Control": "no-store",
+            },
+        )
+
 
 class TaskXLSX:
     """Логика создания/получения пользовательских файлов"""
 
     @staticmethod
-    async def generate_xlsx_menu() -> JSONResponse:
-        """Метод запуска задачи на генерацию .xlsx файла меню"""
-        gener_cache = get_cache()
-        asyn_cache = await gener_cache.__anext__()
+    async def generate_xlsx_menu(asyn_cache) -> JSONResponse:
+        """
+        Метод запуска задачи на генерацию .xlsx файла меню. Файл строится один
+        раз на версию каталога: готовый файл текущей версии отдается ссылкой
+        сразу, к выполняющейся задаче запросы присоединяются по ее id
+        """
         unique_name_file = str(uuid4())
-        task_id = str(start_create_xlsx.delay(unique_name_file))
-        await asyn_cache.set(task_id, unique_name_file)
+        task_id, created = await CacheXLSX.attach_task(
+            asyn_cache, str(uuid4()), unique_name_file
+        )
+        if not created:
+            if await TaskXLSX.file_stat(task_id, asyn_cache):
+                info_data = {
+                    "detail": "Файл меню актуален",
+                    "task_id": task_id,
+                    "download_link": f"{BASE_URL}/download/{task_id}",
+                }
+                return JSONResponse(content=info_data, status_code=200)
+            # Статус берется из Redis, а не из бэкенда результатов Celery:
+            # rpc:// отдает результат только процессу, поставившему задачу
+            status = await CacheXLSX.get_status(asyn_cache, task_id)
+            if status is not None and status["status"] in XLSX_READY_STATUSES:
+                # Задача завершилась, но файла нет (ошибка, файл удален) -
+                # версия закрепляется за новой задачей
+                task_id, created = await CacheXLSX.attach_task(
+                    asyn_cache, str(uuid4()), unique_name_file, replace=task_id
+                )
+        if created:
+            await CacheXLSX.publish_status(asyn_cache, task_id, "PENDING")
+            start_create_xlsx.apply_async((unique_name_file,), task_id=task_id)
         info_data = {
-            "detail": f"Принято, GET запрос узнать статус задачи: '{BASE_URL}/status/{task_id}'"
+            "detail": f"Принято, GET запрос узнать статус задачи: '{BASE_URL}/status/{task_id}'",
+            "task_id": task_id,
         }
         return JSONResponse(content=info_data, status_code=202)
 
     @staticmethod
-    async def status_task(task_id) -> JSONResponse:
-        status_task = app_celery.AsyncResult(task_id).status
+    async def status_task(task_id, asyn_cache) -> JSONResponse:
+        """
+        Метод получения статуса задачи из Redis (его публикует воркер), без
+        запроса к бэкенду результатов Celery. Неизвестная задача - PENDING,
+        как у Celery
+        """
+        status = await CacheXLSX.get_status(asyn_cache, task_id)
+        status_task = status["status"] if status else "PENDING"
         info_data = {"status task": status_task}
         if status_task == "SUCCESS":
             #  Если задача выполнена, добавляем ссылку для скачивания в ответ
@@ -279,17 +689,93 @@ class TaskXLSX:
         return JSONResponse(content=info_data, status_code=200)
 
     @staticmethod
-    async def download_menu(task_id) -> JSONResponse | FileResponse:
-        gener_cache = get_cache()
-        asyn_cache = await gener_cache.__anext__()
-        name_file = await asyn_cache.get(str(task_id))
+    async def status_events(task_id, asyn_cache) -> JSONResponse | StreamingResponse:
+        """
+        Метод потока статусов задачи (Server-Sent Events): текущий статус и
+        каждое изменение до SUCCESS (со ссылкой для скачивания) или FAILURE
+        """
+        # Подписка запускается до ответа: пока заголовки не отправлены,
+        # недоступность Redis можно вернуть статусом 503
+        try:
+            await task_status_hub.start(asyn_cache)
+            status = await CacheXLSX.get_status(asyn_cache, task_id)
+        except (asyncio.TimeoutError, RedisError):
+            return JSONResponse(
+                content={"detail": "task status is unavailable"}, status_code=503
+            )
+        if status is None:
+            return JSONResponse(content={"detail": "NotFound"}, status_code=404)
+
+        async def stream():
+            async for status in task_status_hub.events(asyn_cache, task_id):
+                if status is None:
+                    yield b": keepalive\n\n"
+                    continue
+                if status["status"] == "SUCCESS":
+                    # Статус общий для всех клиентов задачи, поэтому копируется
+                    status = {
+                        **status,
+                        "download_link": f"{BASE_URL}/download/{task_id}",
+                    }
+                yield b"data: " + orjson.dumps(status) + b"\n\n"
+
+        return StreamingResponse(
+            stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @staticmethod
+    async def file_stat(task_id, asyn_cache) -> tuple[str, os.stat_result] | None:
+        """Метод получения пути и stat готового файла задачи"""
+        name_file = await CacheXLSX.name_file(asyn_cache, task_id)
         if name_file:
             path_file = f"storage/{name_file}.xlsx"
             #  Проверка существования файла
-            if os.path.exists(path_file):
-                return FileResponse(
-                    path=path_file,
-                    filename="FullMenu.xlsx",
-                    media_type="application/octet-stream",
-                )
-        return JSONResponse(content={"detail": "NotFound"}, status_code=404)
+            try:
+                return path_file, os.stat(path_file)
+            except FileNotFoundError:
+                return None
+        return None
+
+    @staticmethod
+    async def download_menu(task_id, request, asyn_cache) -> Response:
+        """
+        Метод отдачи файла задачи с поддержкой Range, ETag/Last-Modified и 304.
+        С DOWNLOAD_ACCEL_REDIRECT файл отдает nginx (sendfile) по X-Accel-Redirect
+        """
+        file_stat = await TaskXLSX.file_stat(task_id, asyn_cache)
+        if file_stat is None:
+            return JSONResponse(content={"detail": "NotFound"}, status_code=404)
+        path_file, stat_result = file_stat
+        if DOWNLOAD_ACCEL_REDIRECT:
+            return Response(
+                headers={
+                    "X-Accel-Redirect": (
+                        f"{DOWNLOAD_ACCEL_REDIRECT}/{os.path.basename(path_file)}"
+                    ),
+                    "Content-Disposition": 'attachment; filename="FullMenu.xlsx"',
+                }
+            )
+        return RangeFileResponse(
+            path_file,
+            stat_result,
+            request.headers,
+            method=request.method,
+            filename="FullMenu.xlsx",
+            headers={"Cache-Control": HTTP_CACHE_CONTROL},
+        )
+
+
+class MetricsService:
+    """Логика экспорта метрик приложения"""
+
+    @staticmethod
+    async def export() -> PlainTextResponse:
+        """Метод выдачи метрик в формате Prometheus"""
+        return PlainTextResponse(content=to_prometheus(collect_metrics()))
+
+    @staticmethod
+    async def cache_memory(asyn_cache) -> JSONResponse:
+        """Метод выдачи отчета по памяти Redis в разрезе семейств ключей"""
+        return JSONResponse(content=await cache_memory_usage(asyn_cache))
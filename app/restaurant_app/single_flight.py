@@ -0,0 +1,105 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+from uuid import uuid4
+
+from settings.settings import CACHE_LOCK_POLL_INTERVAL, CACHE_LOCK_TTL, CACHE_LOCK_WAIT
+
+from .cache_module import CacheData, stale_key, version_key
+from .compression import encoded_keys
+from .local_cache import local_cache
+
+# Удаление блокировки только ее владельцем (по уникальному токену)
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# Удаление устаревшей записи вместе с ее сжатыми копиями, если пересчет
+# ее не заменил (например, запись удалена из БД или список стал пустым)
+DROP_STALE_SCRIPT = """
+if redis.call("exists", KEYS[2]) == 1 then
+    return redis.call("del", unpack(KEYS))
+end
+return 0
+"""
+
+# Пересчеты кеша, выполняющиеся в данный момент в этом процессе
+_in_flight: dict[str, asyncio.Task] = {}
+# Фоновые пересчеты устаревших записей (ссылки нужны, что бы задачи не собрал GC)
+_refresh_tasks: set[asyncio.Task] = set()
+
+
+async def single_flight(
+    asyn_cache, key: str, loader: Callable[[], Awaitable[Any]]
+) -> Any:
+    """
+    Функция объединения одновременных промахов по одному ключу кеша.
+    Внутри процесса пересчет выполняет одна задача, остальные запросы ждут
+    ее результат. Между процессами пересчет защищен блокировкой в Redis.
+    """
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.create_task(_load_with_lock(asyn_cache, key, loader))
+        _in_flight[key] = task
+        task.add_done_callback(lambda _: _in_flight.pop(key, None))
+    # shield: отмена одного запроса не должна прерывать пересчет для остальных
+    return await asyncio.shield(task)
+
+
+async def _load_with_lock(
+    asyn_cache, key: str, loader: Callable[[], Awaitable[Any]]
+) -> Any:
+    """
+    Функция пересчета записи под распределенной блокировкой. Если запись
+    уже пересчитывает другой процесс, ждем ее появления в кеше. Если
+    блокировка снята, а записи нет (например, NotFound не кешируется),
+    либо истекло время ожидания, пересчитываем сами.
+    """
+    lock_key = f"lock_{key}"
+    token = uuid4().hex
+    if await asyn_cache.set(lock_key, token, nx=True, px=CACHE_LOCK_TTL):
+        try:
+            return await loader()
+        finally:
+            await asyn_cache.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+    deadline = time.monotonic() + CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(CACHE_LOCK_POLL_INTERVAL)
+        async with asyn_cache.pipeline(transaction=False) as pipe:
+            pipe.get(key).exists(stale_key(key)).exists(lock_key)
+            pipe.get(version_key(key))
+            body, stale, locked, version = await pipe.execute()
+        if body is not None and not stale:
+            body = CacheData.with_version(body, version)
+            local_cache.set(key, body)
+            return body
+        if not locked:
+            break
+    return await loader()
+
+
+def refresh_in_background(
+    asyn_cache, key: str, loader: Callable[[], Awaitable[Any]]
+) -> None:
+    """
+    Функция фонового пересчета устаревшей записи (stale-while-revalidate).
+    Запрос получает устаревшую запись сразу и не ждет БД.
+    """
+    if key in _in_flight:
+        return
+    task = asyncio.create_task(_refresh(asyn_cache, key, loader))
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+async def _refresh(asyn_cache, key: str, loader: Callable[[], Awaitable[Any]]) -> None:
+    """Функция пересчета устаревшей записи с удалением, если она не заменилась"""
+    await single_flight(asyn_cache, key, loader)
+    copies = encoded_keys(key)
+    await asyn_cache.eval(
+        DROP_STALE_SCRIPT, 2 + len(copies), key, stale_key(key), *copies
+    )
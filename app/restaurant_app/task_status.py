@@ -0,0 +1,146 @@
+"""
+Статусы задач генерации .xlsx для клиентов, ожидающих их по SSE.
+Процесс API держит одну подписку на канал статусов и раздает сообщения
+очередям ожидающих клиентов, поэтому число клиентов не меняет нагрузку
+на Redis и бэкенд результатов Celery.
+"""
+import asyncio
+import contextlib
+from collections.abc import AsyncIterator
+
+import orjson
+from redis.exceptions import RedisError
+from settings.settings import REDIS_SOCKET_TIMEOUT, SSE_KEEPALIVE_INTERVAL
+
+from .cache_module import XLSX_READY_STATUSES, XLSX_STATUS_CHANNEL, CacheXLSX
+
+# Сообщение очереди клиента: статус мог быть пропущен (переподписка),
+# его нужно перечитать из Redis
+RESYNC = None
+
+
+class TaskStatusHub:
+
+    """Подписка процесса на канал статусов задач и очереди ожидающих клиентов"""
+
+    def __init__(self) -> None:
+        self._waiters: dict[str, set[asyncio.Queue]] = {}
+        self._listener: asyncio.Task | None = None
+        self._subscribed = asyncio.Event()
+
+    def waiters(self, task_id: str) -> int:
+        """Метод получения числа клиентов, ожидающих задачу"""
+        return len(self._waiters.get(task_id, ()))
+
+    def _broadcast(self, task_id: str | None, status: dict | None) -> None:
+        """Метод отправки статуса клиентам задачи, task_id None - всем клиентам"""
+        if task_id is None:
+            queues = [queue for queues in self._waiters.values() for queue in queues]
+        else:
+            queues = self._waiters.get(task_id, ())
+        for queue in queues:
+            queue.put_nowait(status)
+
+    @staticmethod
+    def _parse(message: dict) -> tuple[str, dict] | None:
+        """Метод разбора сообщения канала, None - сообщение не статус задачи"""
+        try:
+            status = orjson.loads(message["data"])
+            return status["task_id"], status
+        except (orjson.JSONDecodeError, KeyError, TypeError):
+            return None
+
+    async def _listen(self, asyn_cache) -> None:
+        """
+        Метод подписки на канал статусов. Пока подписки нет (обрыв
+        соединения), сообщения могут теряться, поэтому после подписки
+        все клиенты перечитывают статусы своих задач. Сообщения не в формате
+        статуса пропускаются и не останавливают подписку
+        """
+        while True:
+            pubsub = asyn_cache.pubsub()
+            try:
+                await pubsub.subscribe(XLSX_STATUS_CHANNEL)
+                self._subscribed.set()
+                self._broadcast(None, RESYNC)
+                while True:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=1.0
+                    )
+                    parsed = message and self._parse(message)
+                    if parsed:
+                        self._broadcast(*parsed)
+            except RedisError:
+                self._subscribed.clear()
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
+
+    def _listener_done(self, listener: asyncio.Task) -> None:
+        """
+        Метод, вызываемый при завершении подписки: кроме остановки приложения
+        клиенты будятся RESYNC, перечитывают статус и перезапускают подписку
+        """
+        self._subscribed.clear()
+        if not listener.cancelled():
+            # Исключение подписки забирается: ее перезапустят клиенты
+            listener.exception()
+            self._broadcast(None, RESYNC)
+
+    async def start(self, asyn_cache) -> None:
+        """
+        Метод запуска подписки, если она еще не запущена (или завершилась),
+        и ожидания ее. Подписка не оформлена за REDIS_SOCKET_TIMEOUT сек -
+        asyncio.TimeoutError
+        """
+        if self._listener is None or self._listener.done():
+            self._subscribed.clear()
+            self._listener = asyncio.create_task(self._listen(asyn_cache))
+            self._listener.add_done_callback(self._listener_done)
+        await asyncio.wait_for(self._subscribed.wait(), REDIS_SOCKET_TIMEOUT)
+
+    async def stop(self) -> None:
+        """Метод остановки подписки при остановке приложения"""
+        if self._listener is not None:
+            self._listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._listener
+            self._listener = None
+
+    async def events(self, asyn_cache, task_id: str) -> AsyncIterator[dict | None]:
+        """
+        Метод ожидания статусов задачи: выдает текущий статус и каждое его
+        изменение до завершения задачи. None - статус не менялся
+        SSE_KEEPALIVE_INTERVAL сек (сигнал поддержания соединения).
+        Подписку нужно запустить (start) до начала ответа клиенту
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        self._waiters.setdefault(task_id, set()).add(queue)
+        try:
+            await self.start(asyn_cache)
+            # Статус читается после подписки: более поздние придут в очередь
+            status = await CacheXLSX.get_status(asyn_cache, task_id)
+            last = None
+            while True:
+                if status is not None and status != last:
+                    yield status
+                    last = status
+                    if status["status"] in XLSX_READY_STATUSES:
+                        return
+                try:
+                    status = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    status = last
+                    yield None
+                    continue
+                if status is RESYNC:
+                    # Подписка переподключилась либо завершилась и запускается снова
+                    await self.start(asyn_cache)
+                    status = await CacheXLSX.get_status(asyn_cache, task_id)
+        finally:
+            self._waiters[task_id].discard(queue)
+            if not self._waiters[task_id]:
+                del self._waiters[task_id]
+
+
+task_status_hub = TaskStatusHub()
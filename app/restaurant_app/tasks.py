@@ -1,13 +1,28 @@
 import asyncio
+import contextlib
 import os
+from collections.abc import AsyncIterable, AsyncIterator, Callable
 
+import redis
 import xlsxwriter
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
 from dotenv import load_dotenv
-from settings.settings import db_async_session
-from sqlalchemy import func, select
+from settings.settings import (
+    CELERY_DB_POOL_SIZE,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    POSTGRE_URL,
+    REDIS_URL,
+    XLSX_FETCH_SIZE,
+    XLSX_PROGRESS_ROWS,
+    engine_task,
+)
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 
-from restaurant_app.models import RestaurantDish, RestaurantMenu, RestaurantSubMenu
+from restaurant_app.cache_module import XLSX_STATUS_CHANNEL, CacheXLSX
+from restaurant_app.crud import menu_rows_query
 
 load_dotenv()
 
@@ -21,98 +36,186 @@ app_celery = Celery(
     task_track_started=True,
 )
 app_celery.autodiscover_tasks()
+# Синхронный клиент Redis для публикации статусов задач из воркера,
+# соединения создаются при первой публикации в процессе воркера
+status_redis = redis.Redis.from_url(REDIS_URL)
 
 
-async def get_full_menu_from_db():
-    """Функция получения всего меню в json из БД"""
-    rm = RestaurantMenu
-    rsm = RestaurantSubMenu
-    rd = RestaurantDish
-    dish_m = (
-        (
-            select(
-                func.json_agg(
-                    func.json_build_object(
-                        "title",
-                        rd.title,
-                        "description",
-                        rd.description,
-                        "price",
-                        rd.price,
-                    )
-                )
-            )
+class WorkerRuntime:
+
+    """
+    Event loop и пул соединений Postgres процесса воркера Celery. Создаются
+    при запуске процесса и переиспользуются всеми его задачами. Пока не
+    запущены (вне процесса воркера prefork), каждая задача выполняется в
+    своем event loop с соединением engine_task без пула
+    """
+
+    def __init__(self) -> None:
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.engine = None
+
+    def start(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        self.engine = create_async_engine(
+            POSTGRE_URL,
+            echo=False,
+            pool_size=CELERY_DB_POOL_SIZE,
+            max_overflow=0,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
         )
-        .where(rsm.id == rd.sub_menu_id)
-        .scalar_subquery()
-    )
-    sub_m = (
-        select(
-            func.json_agg(
-                func.json_build_object(
-                    "title", rsm.title, "description", rsm.description, "dishes", dish_m
-                )
+
+    def stop(self) -> None:
+        if self.loop is None:
+            return
+        self.loop.run_until_complete(self.engine.dispose())
+        self.loop.close()
+        self.loop = self.engine = None
+
+    def run(self, coro):
+        """Метод выполнения корутины задачи"""
+        if self.loop is None:
+            return asyncio.run(coro)
+        return self.loop.run_until_complete(coro)
+
+
+worker_runtime = WorkerRuntime()
+
+
+@worker_process_init.connect
+def start_worker_runtime(**kwargs) -> None:
+    """Создание event loop и пула соединений при запуске процесса воркера"""
+    worker_runtime.start()
+
+
+@worker_process_shutdown.connect
+def stop_worker_runtime(**kwargs) -> None:
+    """Закрытие соединений пула и event loop при остановке процесса воркера"""
+    worker_runtime.stop()
+
+
+async def get_menu_rows_from_db(
+    fetch_size: int = XLSX_FETCH_SIZE, db_engine: AsyncEngine | None = None
+) -> AsyncIterator[list[Row]]:
+    """
+    Функция получения всего меню из БД пачками по fetch_size строк.
+    Строки читаются серверным курсором в порядке меню/подменю/блюдо на
+    отдельном соединении db_engine (в процессе API - его пул), по умолчанию
+    пул воркера или engine_task без пула
+    """
+    async with (db_engine or worker_runtime.engine or engine_task).connect() as conn:
+        result = await conn.stream(menu_rows_query)
+        async for rows in result.partitions(fetch_size):
+            yield rows
+
+
+async def get_full_menu_from_db() -> AsyncIterator[Row]:
+    """Функция построчного получения всего меню из БД"""
+    async for rows in get_menu_rows_from_db():
+        for row in rows:
+            yield row
+
+
+async def xlsx_rows(
+    rows: AsyncIterable[Row],
+) -> AsyncIterator[tuple[int, int, int, tuple]]:
+    """
+    Функция раскладки строк меню по листу .xlsx: выдает номер строки листа,
+    первый столбец, номер записи и ее тексты. Меню, подменю и блюда нумеруются с 1 внутри
+    родителя, каждая запись - следующая строка листа (меню без подменю
+    не затирается следующим меню). Строки листа идут строго по порядку
+    """
+    row = -1
+    menu_id = sub_menu_id = None
+    num_menu = num_submenu = num_dish = 0
+    async for obj in rows:
+        if obj.menu_id != menu_id:
+            menu_id, sub_menu_id = obj.menu_id, None
+            num_menu += 1
+            num_submenu = 0
+            row += 1
+            yield row, 0, num_menu, (obj.menu_title, obj.menu_description)
+        if obj.sub_menu_id is not None and obj.sub_menu_id != sub_menu_id:
+            sub_menu_id = obj.sub_menu_id
+            num_submenu += 1
+            num_dish = 0
+            row += 1
+            yield row, 1, num_submenu, (
+                obj.sub_menu_title,
+                obj.sub_menu_description,
             )
-        )
-        .where(rm.id == rsm.menu_id)
-        .scalar_subquery()
-    )
-    stmt = select(
-        func.json_agg(
-            func.json_build_object(
-                "title", rm.title, "description", rm.description, "submenus", sub_m
+        if obj.dish_id is not None:
+            num_dish += 1
+            row += 1
+            yield row, 2, num_dish, (
+                obj.dish_title,
+                obj.dish_description,
+                f"{round(float(obj.price), 2):.2f}",
             )
-        )
-    )
-    return await db_async_session().execute(stmt)
 
 
-async def create_xlsx(unique_name):
-    """Функция генерации .xlsx файла"""
-    data = await get_full_menu_from_db()
-    workbook = xlsxwriter.Workbook(f"storage/{unique_name}.xlsx")
+def publish_status(task_id: str | None, status: str, **data) -> None:
+    """
+    Функция сохранения и публикации статуса задачи для клиентов, ожидающих ее
+    по SSE. Задача, вызванная напрямую (без id), статусы не публикует.
+    Недоступность Redis не прерывает генерацию файла
+    """
+    if task_id is None:
+        return
+    message = CacheXLSX.status_message(task_id, status, **data)
+    with contextlib.suppress(redis.RedisError):
+        with status_redis.pipeline() as pipe:
+            pipe.set(CacheXLSX.status_key(task_id), message, ex=CacheXLSX.ttl)
+            pipe.publish(XLSX_STATUS_CHANNEL, message)
+            pipe.execute()
+
+
+async def create_xlsx(unique_name, progress: Callable[[int], None] | None = None):
+    """
+    Функция генерации .xlsx файла. Режим constant_memory сбрасывает каждую
+    строку листа на диск, как только начата следующая, поэтому память
+    не зависит от размера меню. Типы ячеек известны, поэтому значения пишутся
+    write_number/write_string без разбора строк (формулы, ссылки) в write,
+    пустое значение (описание меню может быть NULL) оставляет ячейку пустой.
+    progress вызывается с числом записанных строк каждые XLSX_PROGRESS_ROWS строк
+    """
+    path_file = f"storage/{unique_name}.xlsx"
+    workbook = xlsxwriter.Workbook(f"{path_file}.part", {"constant_memory": True})
     worksheet = workbook.add_worksheet()
-    row = 0
-    not_empty_data = list(data)[0][0]
-    if not_empty_data:
-        for menu in enumerate(not_empty_data, 1):
-            if menu[0]:
-                if row > 0:
-                    row += 1
-                num_menu = menu[0]
-                menu_title = menu[1]["title"]
-                menu_description = menu[1]["description"]
-                worksheet.write(row, 0, num_menu)
-                worksheet.write(row, 1, menu_title)
-                worksheet.write(row, 2, menu_description)
-                if menu[1]["submenus"]:
-                    for sub_menu in enumerate(menu[1]["submenus"], 1):
-                        if sub_menu[0]:
-                            row += 1
-                            num_submenu = sub_menu[0]
-                            submenu_title = sub_menu[1]["title"]
-                            submenu_description = sub_menu[1]["description"]
-                            worksheet.write(row, 1, num_submenu)
-                            worksheet.write(row, 2, submenu_title)
-                            worksheet.write(row, 3, submenu_description)
-                            if sub_menu[1]["dishes"]:
-                                for dish in enumerate(sub_menu[1]["dishes"], 1):
-                                    if dish[0]:
-                                        row += 1
-                                        num_dish = dish[0]
-                                        dish_title = dish[1]["title"]
-                                        dish_description = dish[1]["description"]
-                                        dish_price = dish[1]["price"]
-                                        worksheet.write(row, 2, num_dish)
-                                        worksheet.write(row, 3, dish_title)
-                                        worksheet.write(row, 4, dish_description)
-                                        worksheet.write(
-                                            row, 5, f"{round(dish_price, 2):.2f}"
-                                        )
-    workbook.close()
-
-
-@app_celery.task
-def start_create_xlsx(unique_name):
-    """Функция запуска асинхронной задачи"""
-    asyncio.run(create_xlsx(unique_name))
+    try:
+        async for row, col, num, texts in xlsx_rows(get_full_menu_from_db()):
+            if progress is not None and row and row % XLSX_PROGRESS_ROWS == 0:
+                progress(row)
+            worksheet.write_number(row, col, num)
+            for offset, value in enumerate(texts, 1):
+                if value is not None:
+                    worksheet.write_string(row, col + offset, value)
+        workbook.close()
+        # Файл появляется под своим именем только целиком: его наличие
+        # означает готовую выгрузку
+        os.replace(f"{path_file}.part", path_file)
+    finally:
+        # После ошибки недописанный файл не остается в storage
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(f"{path_file}.part")
+
+
+@app_celery.task(bind=True)
+def start_create_xlsx(self, unique_name):
+    """
+    Функция запуска асинхронной задачи в event loop процесса воркера,
+    начало, прогресс и завершение задачи публикуются (publish_status)
+    """
+    task_id = self.request.id
+    publish_status(task_id, "STARTED")
+    try:
+        worker_runtime.run(
+            create_xlsx(
+                unique_name,
+                lambda rows: publish_status(task_id, "PROGRESS", rows=rows),
+            )
+        )
+    except Exception:
+        publish_status(task_id, "FAILURE")
+        raise
+    publish_status(task_id, "SUCCESS")
@@ -1,6 +1,8 @@
 from collections.abc import AsyncGenerator
 
-from .settings import cache_redis, db_async_session
+from sqlalchemy import text
+
+from .settings import cache_pool, cache_redis, db_async_session, engine
 
 
 async def get_db() -> AsyncGenerator:
@@ -12,9 +14,41 @@ async def get_db() -> AsyncGenerator:
         await asyn_db.close()
 
 
-async def get_cache():
-    """Функция получения генератора сессии Redis[кеш]"""
-    try:
-        yield cache_redis
-    finally:
-        await cache_redis.close()
+async def get_cache() -> AsyncGenerator:
+    """
+    Функция получения клиента Redis[кеш]. Клиент общий на всё приложение,
+    соединения берутся из пула на время команды и возвращаются обратно,
+    поэтому закрывать его после запроса не нужно.
+    """
+    yield cache_redis
+
+
+async def open_db_pool() -> None:
+    """Открытие пула соединений Postgres при старте приложения"""
+    async with engine.connect() as conn:
+        await conn.execute(text("select 1"))
+
+
+async def close_db_pool() -> None:
+    """Закрытие всех соединений пула Postgres при остановке приложения"""
+    await engine.dispose()
+
+
+def db_pool_metrics() -> dict[str, float]:
+    """Метрики пула соединений Postgres"""
+    return engine.pool.metrics()
+
+
+async def open_cache_pool() -> None:
+    """Проверка доступности Redis при старте приложения"""
+    await cache_redis.ping()
+
+
+async def close_cache_pool() -> None:
+    """Закрытие всех соединений пула Redis при остановке приложения"""
+    await cache_pool.disconnect()
+
+
+def cache_pool_metrics() -> dict[str, float]:
+    """Метрики пула соединений Redis"""
+    return cache_pool.metrics()
@@ -0,0 +1,117 @@
+import time
+
+from redis.asyncio import BlockingConnectionPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class MeteredAsyncPool(AsyncAdaptedQueuePool):
+
+    """
+    Пул соединений Postgres, собирающий метрики ожидания соединений.
+    Ожиданием считается только выдача из исчерпанного пула (все соединения
+    и overflow заняты): открытие нового соединения и pre-ping в него не входят
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waiters = 0
+        self.checkouts_total = 0
+        self.waits_total = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def connect(self):
+        """Получение соединения из пула"""
+        connection = super().connect()
+        self.checkouts_total += 1
+        return connection
+
+    def exhausted(self) -> bool:
+        """Метод проверки, что свободных соединений и места для overflow нет"""
+        return (
+            self._max_overflow > -1
+            and self.checkedout() >= self.size() + self._max_overflow
+        )
+
+    def _do_get(self):
+        """Выдача соединения с замером времени ожидания, если пул исчерпан"""
+        if not self.exhausted():
+            return super()._do_get()
+        self.waiters += 1
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            self.waiters -= 1
+            self.waits_total += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def recreate(self):
+        """При пересоздании пула (dispose) накопленные метрики сохраняются"""
+        new_pool = super().recreate()
+        new_pool.checkouts_total = self.checkouts_total
+        new_pool.waits_total = self.waits_total
+        new_pool.wait_seconds_total = self.wait_seconds_total
+        new_pool.wait_seconds_max = self.wait_seconds_max
+        return new_pool
+
+    def metrics(self) -> dict[str, float]:
+        """Текущее состояние пула для экспорта метрик"""
+        return {
+            "db_pool_size": self.size(),
+            "db_pool_checked_out": self.checkedout(),
+            "db_pool_checked_in": self.checkedin(),
+            "db_pool_overflow": self.overflow(),
+            "db_pool_waiters": self.waiters,
+            "db_pool_checkouts_total": self.checkouts_total,
+            "db_pool_waits_total": self.waits_total,
+            "db_pool_wait_seconds_total": round(self.wait_seconds_total, 6),
+            "db_pool_wait_seconds_max": round(self.wait_seconds_max, 6),
+        }
+
+
+class MeteredRedisPool(BlockingConnectionPool):
+
+    """
+    Пул соединений Redis, считающий созданные и выданные соединения
+    сам, без чтения внутренних атрибутов redis-py
+    """
+
+    def reset(self):
+        """Сброс пула (вызывается и из __init__) обнуляет счетчики соединений"""
+        super().reset()
+        self.created_connections = 0
+        self.checkouts_total = 0
+        self.in_use = set()
+
+    def make_connection(self):
+        """Создание нового соединения в пуле"""
+        connection = super().make_connection()
+        self.created_connections += 1
+        return connection
+
+    async def get_connection(self, command_name, *keys, **options):
+        """Выдача соединения из пула"""
+        connection = await super().get_connection(command_name, *keys, **options)
+        self.in_use.add(connection)
+        self.checkouts_total += 1
+        return connection
+
+    async def release(self, connection):
+        """Возврат соединения в пул"""
+        # Неудачная выдача тоже возвращает соединение, поэтому discard
+        self.in_use.discard(connection)
+        await super().release(connection)
+
+    def metrics(self) -> dict[str, float]:
+        """Текущее состояние пула для экспорта метрик"""
+        in_use = len(self.in_use)
+        return {
+            "redis_pool_max_connections": self.max_connections,
+            "redis_pool_created_connections": self.created_connections,
+            "redis_pool_idle_connections": self.created_connections - in_use,
+            "redis_pool_in_use_connections": in_use,
+            "redis_pool_checkouts_total": self.checkouts_total,
+        }
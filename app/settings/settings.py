@@ -8,6 +8,8 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool
 
+from .pool import MeteredAsyncPool, MeteredRedisPool
+
 load_dotenv()
 
 
@@ -18,17 +20,107 @@ URL_DB = os.getenv("URL_DB")
 REDIS_PASS = os.getenv("REDIS_PASS")
 REDIS_HOST = os.getenv("REDIS_HOST")
 
+# Параметры пула соединений Postgres
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# Параметры пула соединений Redis
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+REDIS_POOL_TIMEOUT = int(os.getenv("REDIS_POOL_TIMEOUT", 5))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 5))
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", 5))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", 30))
+
+# Параметры локального кеша в памяти процесса (L1 перед Redis)
+LOCAL_CACHE_ENABLED = os.getenv("LOCAL_CACHE_ENABLED", "true").lower() == "true"
+LOCAL_CACHE_MAX_SIZE = int(os.getenv("LOCAL_CACHE_MAX_SIZE", 1024))
+LOCAL_CACHE_TTL = float(os.getenv("LOCAL_CACHE_TTL", 5))
+
+# Параметры защиты от одновременного пересчета кеша (stampede)
+CACHE_LOCK_TTL = int(os.getenv("CACHE_LOCK_TTL", 5000))  # мс
+CACHE_LOCK_WAIT = float(os.getenv("CACHE_LOCK_WAIT", 5))
+CACHE_LOCK_POLL_INTERVAL = float(os.getenv("CACHE_LOCK_POLL_INTERVAL", 0.05))
+
+# Режим stale-while-revalidate: сколько секунд после изменения данных можно
+# отдавать устаревшую запись, пока она пересчитывается в фоне. 0 - выключен
+CACHE_SWR_MENU_MAX_STALE = float(os.getenv("CACHE_SWR_MENU_MAX_STALE", 0))
+CACHE_SWR_SUBMENU_MAX_STALE = float(os.getenv("CACHE_SWR_SUBMENU_MAX_STALE", 0))
+CACHE_SWR_DISH_MAX_STALE = float(os.getenv("CACHE_SWR_DISH_MAX_STALE", 0))
+
+# Время жизни записей кеша (сек) и разброс в долях от него, что бы записи,
+# созданные одновременно, не истекали одновременно
+CACHE_TTL_MENU = int(os.getenv("CACHE_TTL_MENU", 3600))
+CACHE_TTL_SUBMENU = int(os.getenv("CACHE_TTL_SUBMENU", 3600))
+CACHE_TTL_DISH = int(os.getenv("CACHE_TTL_DISH", 3600))
+CACHE_TTL_JITTER = float(os.getenv("CACHE_TTL_JITTER", 0.1))
+# Время хранения связи задачи генерации .xlsx с файлом (сек)
+XLSX_TASK_TTL = int(os.getenv("XLSX_TASK_TTL", 86400))
+# Размер страницы списков (меню, подменю, блюда) по умолчанию и максимальный
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", 100))
+LIST_PAGE_SIZE_MAX = int(os.getenv("LIST_PAGE_SIZE_MAX", 1000))
+# Заголовок Cache-Control ответов на чтение. По умолчанию прокси и клиенты
+# могут хранить ответ, но перед отдачей обязаны проверить его по ETag
+HTTP_CACHE_CONTROL = os.getenv("HTTP_CACHE_CONTROL", "public, no-cache")
+# Сжатие ответов: кодировки в порядке предпочтения и минимальный размер тела
+COMPRESSION_ENCODINGS = os.getenv("COMPRESSION_ENCODINGS", "br,zstd,gzip").split(",")
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+# Максимум элементов в одном пакетном запросе: вставка идет одним оператором,
+# а у Postgres не больше 32767 параметров на оператор (4 на блюдо)
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", 5000))
+# Размер пачки строк, проверяемых за раз при потоковом импорте файла
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", 5000))
+# Строк меню, читаемых из курсора за раз при генерации .xlsx
+XLSX_FETCH_SIZE = int(os.getenv("XLSX_FETCH_SIZE", 5000))
+# Строк меню в одной части потоковой выгрузки CSV/NDJSON
+EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", 1000))
+# Через сколько строк листа воркер публикует прогресс генерации .xlsx
+XLSX_PROGRESS_ROWS = int(os.getenv("XLSX_PROGRESS_ROWS", 10000))
+# Интервал (сек) сигналов поддержания соединения в потоке статусов задачи (SSE)
+SSE_KEEPALIVE_INTERVAL = float(os.getenv("SSE_KEEPALIVE_INTERVAL", 15))
+# Префикс internal location nginx с папкой storage: если задан, файлы выгрузок
+# отдает nginx (sendfile, Range) по заголовку X-Accel-Redirect
+DOWNLOAD_ACCEL_REDIRECT = os.getenv("DOWNLOAD_ACCEL_REDIRECT", "").rstrip("/")
+# Соединений Postgres в пуле процесса воркера Celery (задачи процесса
+# выполняются по одной)
+CELERY_DB_POOL_SIZE = int(os.getenv("CELERY_DB_POOL_SIZE", 2))
+
 
 REDIS_URL = f"redis://{REDIS_HOST}:6379/0"
 POSTGRE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{URL_DB}:5432/{DB_NAME}"
 
 
 engine = create_async_engine(
-    POSTGRE_URL, echo=False, pool_pre_ping=True, poolclass=NullPool
+    POSTGRE_URL,
+    echo=False,
+    poolclass=MeteredAsyncPool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
 )
+# Соединения без пула для задач вне процесса воркера Celery (скрипты,
+# запуск задачи в новом event loop), где соединения из пула использовать нельзя.
+# Воркер создает свой пул при запуске процесса (tasks.WorkerRuntime)
+engine_task = create_async_engine(POSTGRE_URL, echo=False, poolclass=NullPool)
 eng_celery = create_engine(POSTGRE_URL)
 
-cache_redis = aredis.from_url(REDIS_URL, encoding="utf-8", decode_responses=True)
+# Один пул соединений Redis на процесс, клиент разделяется всеми запросами
+cache_pool = MeteredRedisPool.from_url(
+    REDIS_URL,
+    max_connections=REDIS_MAX_CONNECTIONS,
+    timeout=REDIS_POOL_TIMEOUT,
+    socket_timeout=REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+    health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+    encoding="utf-8",
+    # В кеше хранятся готовые тела ответов, поэтому читаем их как bytes
+    decode_responses=False,
+)
+cache_redis = aredis.Redis(connection_pool=cache_pool)
 db_async_session = sessionmaker(
     autocommit=False,
     autoflush=False,
@@ -36,5 +128,12 @@ db_async_session = sessionmaker(
     bind=engine,
     expire_on_commit=False,
 )
+db_task_session = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    class_=AsyncSession,
+    bind=engine_task,
+    expire_on_commit=False,
+)
 
 app = FastAPI()
@@ -0,0 +1,143 @@
+import pytest
+
+MENU_DATA = {"title": "Bulk menu", "description": "Bulk menu description"}
+SUB_MENUS_DATA = [
+    {"title": f"Bulk submenu {number}", "description": "Bulk submenu"}
+    for number in range(3)
+]
+DISHES_DATA = [
+    {"title": f"Bulk dish {number}", "description": "Bulk dish", "price": "12.50"}
+    for number in range(5)
+]
+
+
+class TestGroupBulk:
+    """Класс тестирования пакетных операций над подменю и блюдами"""
+
+    def setup_class(self):
+        self.url = "http://test/api/v1/menus"
+
+    @pytest.mark.asyncio
+    async def test_bulk_sub_menus(self, async_app_client):
+        """Тест: пакетное создание, изменение и удаление подменю"""
+        response = await async_app_client.post(self.url, json=MENU_DATA)
+        menu_url = f"{self.url}/{response.json()['id']}"
+        # Список закеширован до пакетной операции
+        await async_app_client.get(f"{menu_url}/submenus")
+        response = await async_app_client.post(
+            f"{menu_url}/submenus/bulk", json=SUB_MENUS_DATA
+        )
+        assert response.status_code == 201
+        created = response.json()
+        assert [obj["title"] for obj in created] == [
+            obj["title"] for obj in SUB_MENUS_DATA
+        ]
+        response = await async_app_client.get(f"{menu_url}/submenus")
+        assert [obj["id"] for obj in response.json()] == [obj["id"] for obj in created]
+        response = await async_app_client.get(menu_url)
+        assert response.json()["submenus_count"] == 3
+        patch_data = [
+            {"id": int(created[0]["id"]), "title": "Renamed", "description": "New"},
+            {"id": 0, "title": "Missing", "description": "Missing"},
+        ]
+        response = await async_app_client.patch(
+            f"{menu_url}/submenus/bulk", json=patch_data
+        )
+        assert response.status_code == 200
+        assert [obj["id"] for obj in response.json()] == [created[0]["id"]]
+        response = await async_app_client.get(f"{menu_url}/submenus/{created[0]['id']}")
+        assert response.json()["title"] == "Renamed"
+        response = await async_app_client.request(
+            "DELETE",
+            f"{menu_url}/submenus/bulk",
+            json={"ids": [int(obj["id"]) for obj in created[:2]]},
+        )
+        assert response.json()["ids"] == [obj["id"] for obj in created[:2]]
+        response = await async_app_client.get(f"{menu_url}/submenus")
+        assert [obj["id"] for obj in response.json()] == [created[2]["id"]]
+        response = await async_app_client.get(menu_url)
+        assert response.json()["submenus_count"] == 1
+        await async_app_client.delete(menu_url)
+        response = await async_app_client.post(
+            f"{menu_url}/submenus/bulk", json=SUB_MENUS_DATA
+        )
+        assert response.status_code == 404
+        response = await async_app_client.patch(
+            f"{menu_url}/submenus/bulk", json=patch_data
+        )
+        assert response.status_code == 404
+        assert response.json() == {"detail": "menu not found"}
+        response = await async_app_client.request(
+            "DELETE", f"{menu_url}/submenus/bulk", json={"ids": [1]}
+        )
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_bulk_dishes(self, async_app_client):
+        """Тест: пакетные операции над блюдами с одной инвалидацией кеша"""
+        response = await async_app_client.post(self.url, json=MENU_DATA)
+        menu_url = f"{self.url}/{response.json()['id']}"
+        response = await async_app_client.post(
+            f"{menu_url}/submenus", json=SUB_MENUS_DATA[0]
+        )
+        sub_menu_url = f"{menu_url}/submenus/{response.json()['id']}"
+        await async_app_client.get(f"{sub_menu_url}/dishes")
+        response = await async_app_client.post(
+            f"{sub_menu_url}/dishes/bulk", json=DISHES_DATA
+        )
+        assert response.status_code == 201
+        created = response.json()
+        assert len(created) == 5
+        assert {obj["price"] for obj in created} == {"12.5"}
+        response = await async_app_client.get(f"{sub_menu_url}/dishes")
+        assert [obj["id"] for obj in response.json()] == [obj["id"] for obj in created]
+        response = await async_app_client.get(sub_menu_url)
+        assert response.json()["dishes_count"] == 5
+        # Блюдо закешировано и обновляется пакетом
+        dish_url = f"{sub_menu_url}/dishes/{created[0]['id']}"
+        await async_app_client.get(dish_url)
+        patch_data = [
+            {**DISHES_DATA[0], "id": int(created[0]["id"]), "price": 7.3},
+            {**DISHES_DATA[1], "id": int(created[1]["id"]), "title": "Renamed"},
+        ]
+        response = await async_app_client.patch(
+            f"{sub_menu_url}/dishes/bulk", json=patch_data
+        )
+        assert [obj["id"] for obj in response.json()] == [
+            obj["id"] for obj in created[:2]
+        ]
+        response = await async_app_client.get(dish_url)
+        assert response.json()["price"] == "7.3"
+        response = await async_app_client.request(
+            "DELETE",
+            f"{sub_menu_url}/dishes/bulk",
+            json={"ids": [int(obj["id"]) for obj in created[:3]]},
+        )
+        assert len(response.json()["ids"]) == 3
+        response = await async_app_client.get(dish_url)
+        assert response.status_code == 404
+        response = await async_app_client.get(menu_url)
+        assert response.json()["dishes_count"] == 2
+        await async_app_client.delete(menu_url)
+
+    @pytest.mark.asyncio
+    async def test_bulk_dishes_foreign_sub_menu(self, async_app_client):
+        """Тест: пакет блюд в подменю чужого меню и пустой пакет отклоняются"""
+        menu_ids = []
+        for _ in range(2):
+            response = await async_app_client.post(self.url, json=MENU_DATA)
+            menu_ids.append(response.json()["id"])
+        response = await async_app_client.post(
+            f"{self.url}/{menu_ids[0]}/submenus", json=SUB_MENUS_DATA[0]
+        )
+        foreign_url = (
+            f"{self.url}/{menu_ids[1]}/submenus/{response.json()['id']}/dishes/bulk"
+        )
+        response = await async_app_client.post(foreign_url, json=DISHES_DATA)
+        assert response.status_code == 404
+        response = await async_app_client.post(foreign_url, json=[])
+        assert response.status_code == 422
+        response = await async_app_client.get(f"{self.url}/{menu_ids[0]}")
+        assert response.json()["dishes_count"] == 0
+        for menu_id in menu_ids:
+            await async_app_client.delete(f"{self.url}/{menu_id}")
@@ -0,0 +1,79 @@
+import pytest
+import zstandard
+from restaurant_app import compression
+from restaurant_app.compression import negotiate
+
+MENU_DATA = {"title": "Compressed menu", "description": "Compressed menu description"}
+SUB_MENU_DATA = {"title": "Compressed submenu", "description": "x" * 300}
+
+
+class TestGroupCompression:
+    """Класс тестирования сжатия ответов"""
+
+    def setup_class(self):
+        self.url = "http://test/api/v1/menus"
+
+    def test_negotiate(self):
+        """Тест выбора кодировки по Accept-Encoding"""
+        assert negotiate(None) is None
+        assert negotiate("gzip, deflate") == "gzip"
+        assert negotiate("gzip, zstd, br") == "br"
+        assert negotiate("br;q=0, gzip;q=0.5") == "gzip"
+        assert negotiate("*") == "br"
+        assert negotiate("*, br;q=0") == "zstd"
+        assert negotiate("identity") is None
+
+    @pytest.mark.asyncio
+    async def test_cached_variants(self, async_app_client, monkeypatch):
+        """Тест: большие тела отдаются сжатыми копиями из кеша, малые - без сжатия"""
+        response = await async_app_client.post(self.url, json=MENU_DATA)
+        menu_url = f"{self.url}/{response.json()['id']}"
+        sub_menus_url = f"{menu_url}/submenus"
+        for _ in range(5):
+            await async_app_client.post(sub_menus_url, json=SUB_MENU_DATA)
+        response = await async_app_client.get(
+            sub_menus_url, headers={"Accept-Encoding": "identity"}
+        )
+        assert "Content-Encoding" not in response.headers
+        plain = response.content
+        assert len(plain) > compression.COMPRESSION_MIN_SIZE
+        for encoding in compression.ENCODINGS:
+            response = await async_app_client.get(
+                sub_menus_url, headers={"Accept-Encoding": encoding}
+            )
+            assert response.headers["Content-Encoding"] == encoding
+            assert response.headers["Vary"] == "Accept-Encoding"
+            assert response.headers["ETag"].endswith(f'-{encoding}"')
+            if encoding == "zstd":
+                # httpx не распаковывает zstd сам
+                body = zstandard.ZstdDecompressor().decompress(response.content)
+            else:
+                body = response.content
+            assert body == plain
+        # Попадание в кеш не тратит CPU на сжатие
+        for encoding in compression.ENCODINGS:
+            monkeypatch.setitem(compression.COMPRESSORS, encoding, None)
+        response = await async_app_client.get(
+            sub_menus_url, headers={"Accept-Encoding": "gzip"}
+        )
+        assert response.content == plain
+        etag = response.headers["ETag"]
+        response = await async_app_client.get(
+            sub_menus_url, headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        # Тело меньше порога не сжимается
+        await async_app_client.get(menu_url)
+        response = await async_app_client.get(
+            menu_url, headers={"Accept-Encoding": "gzip"}
+        )
+        assert "Content-Encoding" not in response.headers
+        monkeypatch.undo()
+        # Сжатые копии инвалидируются вместе с записью
+        await async_app_client.post(sub_menus_url, json=SUB_MENU_DATA)
+        response = await async_app_client.get(
+            sub_menus_url, headers={"Accept-Encoding": "gzip"}
+        )
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert len(response.json()) == 6
+        await async_app_client.delete(menu_url)
@@ -0,0 +1,50 @@
+import pytest
+
+MENU_DATA = {"title": "Counter menu", "description": "Counter menu description"}
+SUB_MENU_DATA = {"title": "Counter submenu", "description": "Counter submenu"}
+DISH_DATA = {"title": "Counter dish", "description": "Counter dish", "price": "1.50"}
+
+
+class TestGroupCounters:
+    """Класс тестирования счетчиков подменю и блюд, поддерживаемых триггерами"""
+
+    def setup_class(self):
+        self.url = "http://test/api/v1/menus"
+
+    async def counters(self, client, menu_id, sub_menu_id):
+        menu = (await client.get(f"{self.url}/{menu_id}")).json()
+        sub_menu = (
+            await client.get(f"{self.url}/{menu_id}/submenus/{sub_menu_id}")
+        ).json()
+        return (
+            menu["submenus_count"],
+            menu["dishes_count"],
+            sub_menu["dishes_count"],
+        )
+
+    @pytest.mark.asyncio
+    async def test_counters_follow_writes(self, async_app_client):
+        """Тест: счетчики меняются при создании и удалении, в том числе каскадном"""
+        response = await async_app_client.post(self.url, json=MENU_DATA)
+        menu_id = response.json()["id"]
+        sub_menus_url = f"{self.url}/{menu_id}/submenus"
+        sub_menu_ids = []
+        for _ in range(2):
+            response = await async_app_client.post(sub_menus_url, json=SUB_MENU_DATA)
+            sub_menu_ids.append(response.json()["id"])
+        first, second = sub_menu_ids
+        dish_ids = []
+        for sub_menu_id, count in ((first, 3), (second, 2)):
+            for number in range(count):
+                response = await async_app_client.post(
+                    f"{sub_menus_url}/{sub_menu_id}/dishes",
+                    json={**DISH_DATA, "title": f"Counter dish {number}"},
+                )
+                dish_ids.append(response.json()["id"])
+        assert await self.counters(async_app_client, menu_id, first) == (2, 5, 3)
+        await async_app_client.delete(f"{sub_menus_url}/{first}/dishes/{dish_ids[0]}")
+        assert await self.counters(async_app_client, menu_id, first) == (2, 4, 2)
+        # Каскадное удаление подменю уменьшает счетчик блюд меню
+        await async_app_client.delete(f"{sub_menus_url}/{first}")
+        assert await self.counters(async_app_client, menu_id, second) == (1, 2, 2)
+        await async_app_client.delete(f"{self.url}/{menu_id}")
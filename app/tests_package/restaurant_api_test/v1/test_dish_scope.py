@@ -0,0 +1,86 @@
+import orjson
+import pytest
+
+MENU_DATA = {"title": "Scope menu", "description": "Scope menu description"}
+SUB_MENU_DATA = {"title": "Scope submenu", "description": "Scope submenu"}
+DISH_DATA = {"title": "Scope dish", "description": "Scope dish", "price": "3.25"}
+
+
+class TestGroupDishScope:
+    """Класс тестирования выборки блюд в пределах подменю"""
+
+    def setup_class(self):
+        self.url = "http://test/api/v1/menus"
+
+    @pytest.mark.asyncio
+    async def test_dishes_scoped_by_sub_menu(self, async_app_client):
+        """Тест: список содержит только блюда подменю, чужое меню не подходит"""
+        menu_ids, dish_urls = [], []
+        for _ in range(2):
+            response = await async_app_client.post(self.url, json=MENU_DATA)
+            menu_id = response.json()["id"]
+            response = await async_app_client.post(
+                f"{self.url}/{menu_id}/submenus", json=SUB_MENU_DATA
+            )
+            dishes_url = f"{self.url}/{menu_id}/submenus/{response.json()['id']}/dishes"
+            response = await async_app_client.post(dishes_url, json=DISH_DATA)
+            menu_ids.append(menu_id)
+            dish_urls.append((dishes_url, response.json()["id"]))
+        (first_url, first_dish), (second_url, second_dish) = dish_urls
+        response = await async_app_client.get(first_url)
+        assert [dish["id"] for dish in response.json()] == [first_dish]
+        response = await async_app_client.get(second_url)
+        assert [dish["id"] for dish in response.json()] == [second_dish]
+        # Подменю, не принадлежащее меню из URL, не отдает блюда
+        foreign_url = first_url.replace(
+            f"menus/{menu_ids[0]}/", f"menus/{menu_ids[1]}/"
+        )
+        response = await async_app_client.get(foreign_url)
+        assert response.json() == []
+        response = await async_app_client.get(f"{foreign_url}/{first_dish}")
+        assert response.status_code == 404
+        for menu_id in menu_ids:
+            await async_app_client.delete(f"{self.url}/{menu_id}")
+
+    @pytest.mark.asyncio
+    async def test_dish_write_scoped_by_sub_menu(self, async_app_client):
+        """Тест: PATCH/DELETE блюда по чужому пути - 404 без записи в БД"""
+        menu_ids, dish_urls = [], []
+        for _ in range(2):
+            response = await async_app_client.post(self.url, json=MENU_DATA)
+            menu_id = response.json()["id"]
+            response = await async_app_client.post(
+                f"{self.url}/{menu_id}/submenus", json=SUB_MENU_DATA
+            )
+            dishes_url = f"{self.url}/{menu_id}/submenus/{response.json()['id']}/dishes"
+            response = await async_app_client.post(dishes_url, json=DISH_DATA)
+            menu_ids.append(menu_id)
+            dish_urls.append((dishes_url, response.json()["id"]))
+        (first_url, first_dish), (second_url, _) = dish_urls
+        # Блюдо первого подменю по пути второго подменю и по чужому меню
+        foreign_urls = (
+            f"{second_url}/{first_dish}",
+            first_url.replace(f"menus/{menu_ids[0]}/", f"menus/{menu_ids[1]}/")
+            + f"/{first_dish}",
+        )
+        response = await async_app_client.get(f"{first_url}/{first_dish}")
+        assert response.json()["title"] == DISH_DATA["title"]
+        for foreign_url in foreign_urls:
+            response = await async_app_client.patch(
+                foreign_url, json={**DISH_DATA, "title": "Changed"}
+            )
+            assert response.status_code == 404
+            assert response.json() == {"detail": "dish not found"}
+            response = await async_app_client.delete(foreign_url)
+            assert response.status_code == 404
+        response = await async_app_client.get("http://test/api/v1/export.ndjson")
+        rows = [
+            row
+            for row in map(orjson.loads, response.content.splitlines())
+            if row["dish_id"] == first_dish
+        ]
+        assert [row["dish_title"] for row in rows] == [DISH_DATA["title"]]
+        response = await async_app_client.get(f"{first_url}/{first_dish}")
+        assert response.json()["title"] == DISH_DATA["title"]
+        for menu_id in menu_ids:
+            await async_app_client.delete(f"{self.url}/{menu_id}")
@@ -0,0 +1,112 @@
+import os
+
+import pytest
+from restaurant_app.cache_module import CacheXLSX
+from restaurant_app.file_response import ZERO_COPY_EXTENSION, RangeFileResponse
+from settings.settings import cache_redis
+
+TASK_ID = "test-download"
+NAME_FILE = "test_download"
+CONTENT = bytes(range(256)) * 40
+
+
+class TestGroupDownload:
+    """Класс тестирования отдачи файла выгрузки"""
+
+    def setup_class(self):
+        self.url = f"http://test/api/v1/download/{TASK_ID}"
+        self.path = f"storage/{NAME_FILE}.xlsx"
+        with open(self.path, "wb") as file:
+            file.write(CONTENT)
+
+    def teardown_class(self):
+        os.remove(self.path)
+
+    @pytest.mark.asyncio
+    async def test_conditional_download(self, async_app_client):
+        """Тест: файл отдается с ETag/Last-Modified, повторный запрос - 304"""
+        await cache_redis.set(CacheXLSX.cache_key(TASK_ID), NAME_FILE)
+        response = await async_app_client.get(self.url)
+        assert response.status_code == 200
+        assert response.content == CONTENT
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.headers["content-length"] == str(len(CONTENT))
+        assert "FullMenu.xlsx" in response.headers["content-disposition"]
+        etag = response.headers["etag"]
+        last_modified = response.headers["last-modified"]
+        for headers in (
+            {"If-None-Match": etag},
+            {"If-None-Match": f'"other", W/{etag}'},
+            {"If-Modified-Since": last_modified},
+        ):
+            response = await async_app_client.get(self.url, headers=headers)
+            assert response.status_code == 304
+            assert response.content == b""
+            assert response.headers["etag"] == etag
+        response = await async_app_client.get(
+            self.url, headers={"If-None-Match": '"other"'}
+        )
+        assert response.status_code == 200
+        response = await async_app_client.head(self.url)
+        assert response.status_code == 200
+        assert response.content == b""
+        assert response.headers["content-length"] == str(len(CONTENT))
+        response = await async_app_client.get(
+            "http://test/api/v1/download/unknown-task"
+        )
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_range_download(self, async_app_client):
+        """Тест: докачка по Range, If-Range и диапазон за пределами файла"""
+        await cache_redis.set(CacheXLSX.cache_key(TASK_ID), NAME_FILE)
+        size = len(CONTENT)
+        etag = (await async_app_client.head(self.url)).headers["etag"]
+        for range_header, start, end in (
+            ("bytes=10-19", 10, 19),
+            ("bytes=10000-", 10000, size - 1),
+            ("bytes=-5", size - 5, size - 1),
+            ("bytes=100-99999", 100, size - 1),
+        ):
+            response = await async_app_client.get(
+                self.url, headers={"Range": range_header, "If-Range": etag}
+            )
+            assert response.status_code == 206
+            assert response.headers["content-range"] == f"bytes {start}-{end}/{size}"
+            assert response.content == CONTENT[start:][: end - start + 1]
+        response = await async_app_client.get(
+            self.url, headers={"Range": f"bytes={size}-"}
+        )
+        assert response.status_code == 416
+        assert response.headers["content-range"] == f"bytes */{size}"
+        # Файл изменился (другой ETag) или диапазонов несколько - весь файл
+        for headers in (
+            {"Range": "bytes=0-9", "If-Range": '"other"'},
+            {"Range": "bytes=0-9,20-29"},
+        ):
+            response = await async_app_client.get(self.url, headers=headers)
+            assert response.status_code == 200
+            assert response.content == CONTENT
+
+    @pytest.mark.asyncio
+    async def test_zero_copy_send(self):
+        """Тест: сервер с расширением zerocopysend получает файл, а не байты"""
+        response = RangeFileResponse(
+            self.path, os.stat(self.path), {"range": "bytes=100-199"}
+        )
+        messages = []
+
+        async def send(message):
+            if message["type"] == ZERO_COPY_EXTENSION:
+                message = {**message, "file": message["file"].name}
+            messages.append(message)
+
+        scope = {"type": "http", "extensions": {ZERO_COPY_EXTENSION: {}}}
+        await response(scope, None, send)
+        assert messages[0]["status"] == 206
+        assert messages[1] == {
+            "type": ZERO_COPY_EXTENSION,
+            "file": self.path,
+            "offset": 100,
+            "count": 100,
+        }
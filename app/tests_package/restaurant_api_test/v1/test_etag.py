@@ -0,0 +1,101 @@
+import pytest
+from restaurant_app.cache_module import CacheMenu
+from restaurant_app.crud import CrudMenu
+from restaurant_app.local_cache import local_cache
+from settings.settings import HTTP_CACHE_CONTROL, cache_redis
+
+DATA = {"title": "ETag menu", "description": "ETag menu description"}
+UPDATED_DATA = {"title": "Updated ETag menu", "description": "Updated"}
+
+
+class TestGroupETag:
+    """Класс тестирования условных запросов по ETag"""
+
+    def setup_class(self):
+        self.url = "http://test/api/v1/menus"
+
+    async def etag(self, client, url):
+        """ETag появляется, когда ответ отдается из кеша"""
+        for _ in range(2):
+            response = await client.get(url)
+            assert response.headers["Cache-Control"] == HTTP_CACHE_CONTROL
+            if "ETag" in response.headers:
+                return response.headers["ETag"]
+        raise AssertionError("ETag not found")
+
+    @pytest.mark.asyncio
+    async def test_not_modified_without_db(self, async_app_client, monkeypatch):
+        """Тест: совпавший ETag дает 304 без тела и без запроса в БД"""
+        response = await async_app_client.post(self.url, json=DATA)
+        menu_url = f"{self.url}/{response.json()['id']}"
+        # Пустые списки не кешируются, поэтому нужен хотя бы один элемент
+        await async_app_client.post(f"{menu_url}/submenus", json=DATA)
+        urls = [self.url, menu_url, f"{self.url}/tree", f"{menu_url}/submenus"]
+        etags = {url: await self.etag(async_app_client, url) for url in urls}
+
+        async def fail_get_menu_db(*args, **kwargs):
+            raise AssertionError("Postgres must not be queried")
+
+        monkeypatch.setattr(CrudMenu, "get_menu_db", fail_get_menu_db)
+        for url, etag in etags.items():
+            # Версия берется и из локального кеша, и из Redis
+            for clear_local in (False, True):
+                if clear_local:
+                    local_cache.clear()
+                response = await async_app_client.get(
+                    url, headers={"If-None-Match": f'"other", {etag}'}
+                )
+                assert response.status_code == 304
+                assert response.content == b""
+                assert response.headers["ETag"] == etag
+        monkeypatch.undo()
+        # После изменения старый ETag не совпадает
+        await async_app_client.patch(menu_url, json=UPDATED_DATA)
+        for url in (self.url, menu_url, f"{self.url}/tree"):
+            response = await async_app_client.get(
+                url, headers={"If-None-Match": etags[url]}
+            )
+            assert response.status_code == 200
+            assert await self.etag(async_app_client, url) != etags[url]
+        # Не изменившийся список подменю по-прежнему не модифицирован
+        response = await async_app_client.get(
+            f"{menu_url}/submenus",
+            headers={"If-None-Match": etags[f"{menu_url}/submenus"]},
+        )
+        assert response.status_code == 304
+        await async_app_client.delete(menu_url)
+        response = await async_app_client.get(
+            menu_url, headers={"If-None-Match": etags[menu_url]}
+        )
+        assert response.status_code == 404
+        assert "ETag" not in response.headers
+
+    @pytest.mark.asyncio
+    async def test_outdated_body_is_not_cached(self, async_app_client, monkeypatch):
+        """
+        Тест: тело, прочитанное из БД до инвалидации записи, не сохраняется
+        в кеш под новой версией и отдается без ETag
+        """
+        response = await async_app_client.post(self.url, json=DATA)
+        menu_id = response.json()["id"]
+        menu_url = f"{self.url}/{menu_id}"
+        get_menu_db = CrudMenu.get_menu_db
+
+        async def get_menu_db_before_write(*args, **kwargs):
+            data = await get_menu_db(*args, **kwargs)
+            # Запись в БД завершилась, пока читались старые данные
+            await CacheMenu.clear_cache(cache_redis, menu_id)
+            return data
+
+        monkeypatch.setattr(CrudMenu, "get_menu_db", get_menu_db_before_write)
+        for url, key in (
+            (menu_url, CacheMenu.cache_key(menu_id)),
+            (f"{self.url}?limit=5", CacheMenu.cache_key(None, 0, 5)),
+        ):
+            response = await async_app_client.get(url)
+            assert response.status_code == 200
+            assert "ETag" not in response.headers
+            assert not await cache_redis.exists(key)
+        monkeypatch.undo()
+        assert await self.etag(async_app_client, menu_url)
+        await async_app_client.delete(menu_url)
@@ -0,0 +1,119 @@
+import csv
+import io
+
+import orjson
+import pytest
+from restaurant_app import tasks
+
+MENU_DATA = {"title": "Export menu", "description": "Export, menu"}
+SUB_MENU_DATA = {"title": "Export submenu", "description": "Export\nsubmenu"}
+DISH_DATA = {"title": "Export dish", "description": "Export dish", "price": "10"}
+
+
+class TestGroupExport:
+    """Класс тестирования потоковой выгрузки меню в CSV/NDJSON"""
+
+    def setup_class(self):
+        self.url = "http://test/api/v1"
+
+    async def create_menu(self, client) -> tuple[str, list[str], list[str]]:
+        response = await client.post(f"{self.url}/menus", json=MENU_DATA)
+        menu_id = response.json()["id"]
+        sub_menu_ids, dish_ids = [], []
+        for num in (1, 2):
+            response = await client.post(
+                f"{self.url}/menus/{menu_id}/submenus",
+                json={**SUB_MENU_DATA, "title": f"Export submenu {num}"},
+            )
+            sub_menu_ids.append(response.json()["id"])
+        for num in (1, 2):
+            response = await client.post(
+                f"{self.url}/menus/{menu_id}/submenus/{sub_menu_ids[0]}/dishes",
+                json={**DISH_DATA, "title": f"Export dish {num}"},
+            )
+            dish_ids.append(response.json()["id"])
+        return menu_id, sub_menu_ids, dish_ids
+
+    @pytest.mark.asyncio
+    async def test_export_ndjson(self, async_app_client):
+        """Тест: NDJSON - строки меню/подменю/блюда по порядку, пустые потомки - null"""
+        menu_id, sub_menu_ids, dish_ids = await self.create_menu(async_app_client)
+        response = await async_app_client.get(f"{self.url}/export.ndjson")
+        await async_app_client.delete(f"{self.url}/menus/{menu_id}")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        rows = [
+            row
+            for row in map(orjson.loads, response.content.splitlines())
+            if row["menu_id"] == menu_id
+        ]
+        assert [(row["submenu_id"], row["dish_id"]) for row in rows] == [
+            (sub_menu_ids[0], dish_ids[0]),
+            (sub_menu_ids[0], dish_ids[1]),
+            (sub_menu_ids[1], None),
+        ]
+        assert rows[0] == {
+            "menu_id": menu_id,
+            "submenu_id": sub_menu_ids[0],
+            "dish_id": dish_ids[0],
+            "menu_title": MENU_DATA["title"],
+            "menu_description": MENU_DATA["description"],
+            "submenu_title": "Export submenu 1",
+            "submenu_description": SUB_MENU_DATA["description"],
+            "dish_title": "Export dish 1",
+            "dish_description": DISH_DATA["description"],
+            "price": "10.00",
+        }
+        assert rows[2]["dish_title"] is None and rows[2]["price"] is None
+
+    @pytest.mark.asyncio
+    async def test_export_csv_round_trip(self, async_app_client):
+        """Тест: выгрузка CSV загружается обратно импортом"""
+        menu_id, _, _ = await self.create_menu(async_app_client)
+        response = await async_app_client.get(f"{self.url}/export.csv")
+        await async_app_client.delete(f"{self.url}/menus/{menu_id}")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        rows = [row for row in rows if row["menu_id"] == menu_id]
+        assert [row["dish_title"] for row in rows] == [
+            "Export dish 1",
+            "Export dish 2",
+            "",
+        ]
+        assert rows[0]["submenu_description"] == SUB_MENU_DATA["description"]
+        body = io.StringIO()
+        writer = csv.DictWriter(body, fieldnames=rows[0].keys())
+        writer.writeheader()
+        writer.writerows(rows)
+        response = await async_app_client.post(
+            f"{self.url}/import", content=body.getvalue().encode()
+        )
+        assert response.status_code == 201
+        stats = response.json()
+        assert (stats["menus"], stats["submenus"], stats["dishes"]) == (1, 2, 2)
+        response = await async_app_client.get(f"{self.url}/export.ndjson")
+        imported = [
+            row
+            for row in map(orjson.loads, response.content.splitlines())
+            if row["menu_title"] == MENU_DATA["title"]
+        ]
+        assert len(imported) == 3
+        await async_app_client.delete(f"{self.url}/menus/{imported[0]['menu_id']}")
+
+    @pytest.mark.asyncio
+    async def test_export_uses_app_pool(self, async_app_client, monkeypatch):
+        """Тест: выгрузка берет соединение из пула API, а не engine_task без пула"""
+
+        class NoEngine:
+            def connect(self):
+                raise AssertionError("engine_task must not be used by the API")
+
+        monkeypatch.setattr(tasks, "engine_task", NoEngine())
+        menu_id, _, _ = await self.create_menu(async_app_client)
+        response = await async_app_client.get(f"{self.url}/export.ndjson")
+        await async_app_client.delete(f"{self.url}/menus/{menu_id}")
+        assert response.status_code == 200
+        assert menu_id in {
+            row["menu_id"] for row in map(orjson.loads, response.content.splitlines())
+        }
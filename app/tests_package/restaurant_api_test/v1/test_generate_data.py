@@ -0,0 +1,68 @@
+import pytest
+from restaurant_app.generate_data import dish_rows, generate, menu_row
+from restaurant_app.load_data import insert_rows_with_ids
+from restaurant_app.models import dish, menus, sub_menus
+from settings.settings import db_async_session
+from sqlalchemy import func, select
+
+
+class TestGroupGenerateData:
+    """Класс тестирования генератора синтетических данных"""
+
+    def test_generated_rows_depend_on_seed(self):
+        """Тест: одинаковый seed дает одинаковые данные, другой - другие"""
+        assert menu_row(1, 0) == menu_row(1, 0)
+        assert list(dish_rows(1, 0, 0, 1, 50)) == list(dish_rows(1, 0, 0, 1, 50))
+        assert list(dish_rows(1, 0, 0, 1, 50)) != list(dish_rows(2, 0, 0, 1, 50))
+        for row in dish_rows(1, 0, 0, 1, 200):
+            assert 1 <= row["price"] <= 100_000
+            assert len(row["description"]) <= 2048
+
+    @pytest.mark.asyncio
+    async def test_generate(self, async_app_client):
+        """Тест: генерация N × M × K записей пачками не зависит от размера пачки"""
+        titles = []
+        for batch_size in (2, 100):
+            async with db_async_session() as asyn_db:
+                last_id = await asyn_db.scalar(select(func.max(menus.c.id))) or 0
+                stats = await generate(asyn_db, 3, 2, 5, seed=7, batch_size=batch_size)
+                assert (stats["menus"], stats["submenus"], stats["dishes"]) == (
+                    3,
+                    6,
+                    30,
+                )
+                query = (
+                    select(menus.c.title, sub_menus.c.title, dish.c.title, dish.c.price)
+                    .join(sub_menus, sub_menus.c.menu_id == menus.c.id)
+                    .join(dish, dish.c.sub_menu_id == sub_menus.c.id)
+                    .where(menus.c.id > last_id)
+                    .order_by(dish.c.id)
+                )
+                titles.append((await asyn_db.execute(query)).all())
+                counters = await asyn_db.execute(
+                    select(menus.c.submenus_count, menus.c.dishes_count).where(
+                        menus.c.id > last_id
+                    )
+                )
+                assert counters.all() == [(2, 10)] * 3
+                await asyn_db.execute(menus.delete().where(menus.c.id > last_id))
+                await asyn_db.commit()
+        assert titles[0] == titles[1]
+
+    @pytest.mark.asyncio
+    async def test_insert_rows_with_ids(self, async_app_client):
+        """Тест: id выделяются заранее и соответствуют строкам по порядку"""
+        rows = [{"title": f"Ids menu {num}", "description": "Ids"} for num in range(50)]
+        async with db_async_session() as asyn_db:
+            ids = await insert_rows_with_ids(asyn_db, menus, rows)
+            assert ids == sorted(ids)
+            titles = dict(
+                (
+                    await asyn_db.execute(
+                        select(menus.c.id, menus.c.title).where(menus.c.id.in_(ids))
+                    )
+                ).all()
+            )
+            assert [titles[row_id] for row_id in ids] == [row["title"] for row in rows]
+            await asyn_db.execute(menus.delete().where(menus.c.id.in_(ids)))
+            await asyn_db.commit()
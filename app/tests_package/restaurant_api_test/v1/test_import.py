@@ -0,0 +1,123 @@
+import orjson
+import pytest
+
+CSV_DATA = (
+    "menu_title,menu_description,submenu_title,submenu_description,"
+    "dish_title,dish_description,price\r\n"
+    'Import menu A,Menu A,Soups,"Hot\nsoups",Borsch,"Red, hot",12.50\r\n'
+    "Import menu A,Menu A,Soups,Hot soups,Shchi,Cabbage soup,10.75\r\n"
+    "Import menu A,Menu A,Salads,Cold,Olivier,Salad,8.25\r\n"
+    "Import menu B,Menu B,Drinks,Drinks,,,\r\n"
+    "Import menu C,Menu C,,,,,\r\n"
+)
+
+
+class TestGroupImport:
+    """Класс тестирования потокового импорта меню"""
+
+    def setup_class(self):
+        self.url = "http://test/api/v1"
+
+    async def imported_menus(self, client, prefix: str) -> dict:
+        response = await client.get(f"{self.url}/menus", params={"limit": 1000})
+        return {
+            menu["title"]: menu
+            for menu in response.json()
+            if menu["title"].startswith(prefix)
+        }
+
+    @pytest.mark.asyncio
+    async def test_import_csv(self, async_app_client):
+        """Тест: импорт CSV создает меню, подменю и блюда, кеш списка сброшен"""
+        await async_app_client.get(f"{self.url}/menus", params={"limit": 1000})
+        response = await async_app_client.post(
+            f"{self.url}/import", content=CSV_DATA.encode()
+        )
+        assert response.status_code == 201
+        stats = response.json()
+        assert (stats["rows"], stats["menus"], stats["submenus"], stats["dishes"]) == (
+            5,
+            3,
+            3,
+            3,
+        )
+        assert stats["rows_per_sec"] > 0
+        menus = await self.imported_menus(async_app_client, "Import menu")
+        assert [
+            (menus[title]["submenus_count"], menus[title]["dishes_count"])
+            for title in ("Import menu A", "Import menu B", "Import menu C")
+        ] == [(2, 3), (1, 0), (0, 0)]
+        menu_url = f"{self.url}/menus/{menus['Import menu A']['id']}"
+        response = await async_app_client.get(f"{menu_url}/submenus")
+        soups = response.json()[0]
+        assert (soups["title"], soups["description"]) == ("Soups", "Hot\nsoups")
+        response = await async_app_client.get(
+            f"{menu_url}/submenus/{soups['id']}/dishes"
+        )
+        assert [(obj["title"], obj["price"]) for obj in response.json()] == [
+            ("Borsch", "12.5"),
+            ("Shchi", "10.75"),
+        ]
+        for menu in menus.values():
+            await async_app_client.delete(f"{self.url}/menus/{menu['id']}")
+
+    @pytest.mark.asyncio
+    async def test_import_ndjson(self, async_app_client):
+        """Тест: импорт NDJSON"""
+        rows = [
+            {
+                "menu_title": "Ndjson menu",
+                "menu_description": "Ndjson",
+                "submenu_title": "Ndjson submenu",
+                "submenu_description": "Ndjson",
+                "dish_title": f"Dish {number}",
+                "dish_description": "Dish",
+                "price": number + 0.5,
+            }
+            for number in range(10)
+        ]
+        body = b"\n".join(orjson.dumps(row) for row in rows)
+        response = await async_app_client.post(
+            f"{self.url}/import", params={"format": "ndjson"}, content=body
+        )
+        assert response.status_code == 201
+        assert response.json()["dishes"] == 10
+        menus = await self.imported_menus(async_app_client, "Ndjson menu")
+        assert menus["Ndjson menu"]["dishes_count"] == 10
+        await async_app_client.delete(f"{self.url}/menus/{menus['Ndjson menu']['id']}")
+
+    @pytest.mark.asyncio
+    async def test_import_invalid_rows(self, async_app_client):
+        """Тест: ошибка в строке отклоняет весь файл, в ответе номер строки"""
+        data = CSV_DATA.replace("8.25", "not a price")
+        response = await async_app_client.post(
+            f"{self.url}/import", content=data.encode()
+        )
+        assert response.status_code == 422
+        assert [error["row"] for error in response.json()["detail"]] == [3]
+        assert await self.imported_menus(async_app_client, "Import menu") == {}
+
+    @pytest.mark.asyncio
+    async def test_import_too_long_field(self, async_app_client):
+        """Тест: поле длиннее столбца БД - 422 с номером строки, а не ошибка COPY"""
+        data = CSV_DATA.replace("Olivier", "O" * 256).replace("Red, hot", "R" * 2049)
+        response = await async_app_client.post(
+            f"{self.url}/import", content=data.encode()
+        )
+        assert response.status_code == 422
+        errors = response.json()["detail"]
+        assert [error["row"] for error in errors] == [1, 3]
+        assert errors[0]["msg"].startswith("dish_description:")
+        assert errors[1]["msg"].startswith("dish_title:")
+        assert await self.imported_menus(async_app_client, "Import menu") == {}
+
+    @pytest.mark.asyncio
+    async def test_import_invalid_encoding(self, async_app_client):
+        """Тест: файл не в UTF-8 - 422, а не ошибка сервера"""
+        data = CSV_DATA.encode().replace(b"Shchi", "Щи".encode("cp1251"))
+        response = await async_app_client.post(f"{self.url}/import", content=data)
+        assert response.status_code == 422
+        [error] = response.json()["detail"]
+        assert error["row"] is None
+        assert error["msg"].startswith("invalid utf-8")
+        assert await self.imported_menus(async_app_client, "Import menu") == {}
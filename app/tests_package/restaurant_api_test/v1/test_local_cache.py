@@ -0,0 +1,44 @@
+import time
+
+from restaurant_app.local_cache import LocalCache
+
+
+class TestGroupLocalCache:
+    """Класс тестирования локального кеша"""
+
+    def test_lru_eviction(self):
+        """Тест вытеснения самой давно использованной записи"""
+        cache = LocalCache(max_size=2, ttl=60)
+        cache.set("menu", [1])
+        cache.set("menu_1", {"id": "1"})
+        # Обращение к menu делает самой старой запись menu_1
+        assert cache.get("menu") == [1]
+        cache.set("menu_2", {"id": "2"})
+        assert cache.get("menu_1") is None
+        assert cache.get("menu") == [1]
+        assert cache.metrics()["local_cache_evictions_total"] == 1
+
+    def test_ttl_expiration(self):
+        """Тест устаревания записи по TTL"""
+        cache = LocalCache(max_size=10, ttl=0.01)
+        cache.set("menu", [])
+        time.sleep(0.02)
+        assert cache.get("menu", "miss") == "miss"
+        assert cache.metrics()["local_cache_size"] == 0
+
+    def test_counters_and_delete(self):
+        """Тест счетчиков попаданий/промахов и удаления записей"""
+        cache = LocalCache(max_size=10, ttl=60)
+        cache.set("menu", [])
+        cache.get("menu")
+        cache.delete("menu", "menu_1")
+        cache.get("menu")
+        metrics = cache.metrics()
+        assert metrics["local_cache_hits_total"] == 1
+        assert metrics["local_cache_misses_total"] == 1
+
+    def test_disabled(self):
+        """Тест отключенного кеша"""
+        cache = LocalCache(max_size=10, ttl=60, enabled=False)
+        cache.set("menu", [])
+        assert cache.get("menu") is None
@@ -0,0 +1,58 @@
+import pytest
+from restaurant_app.cache_module import CacheTree
+from settings.settings import cache_redis
+
+MENU_DATA = {"title": "Tree menu", "description": "Tree menu description"}
+SUB_MENU_DATA = {"title": "Tree submenu", "description": "Tree submenu"}
+DISH_DATA = {"title": "Tree dish", "description": "Tree dish", "price": "7.25"}
+
+
+class TestGroupMenuTree:
+    """Класс тестирования дерева меню"""
+
+    def setup_class(self):
+        self.url = "http://test/api/v1/menus"
+
+    async def find_menu(self, client, menu_id):
+        response = await client.get(f"{self.url}/tree")
+        assert response.status_code == 200
+        return next(menu for menu in response.json() if menu["id"] == menu_id)
+
+    @pytest.mark.asyncio
+    async def test_tree_follows_writes(self, async_app_client):
+        """Тест: дерево содержит вложенные подменю и блюда и обновляется после записи"""
+        response = await async_app_client.post(self.url, json=MENU_DATA)
+        menu_id = response.json()["id"]
+        response = await async_app_client.post(
+            f"{self.url}/{menu_id}/submenus", json=SUB_MENU_DATA
+        )
+        sub_menu_id = response.json()["id"]
+        menu = await self.find_menu(async_app_client, menu_id)
+        assert menu["submenus_count"] == 1
+        assert menu["submenus"][0]["id"] == sub_menu_id
+        assert menu["submenus"][0]["dishes"] == []
+        assert await cache_redis.exists(CacheTree.cache_key())
+        # Новое блюдо инвалидирует закешированное дерево
+        response = await async_app_client.post(
+            f"{self.url}/{menu_id}/submenus/{sub_menu_id}/dishes", json=DISH_DATA
+        )
+        dish_id = response.json()["id"]
+        menu = await self.find_menu(async_app_client, menu_id)
+        assert menu["dishes_count"] == 1
+        dish = menu["submenus"][0]["dishes"][0]
+        assert dish == {**DISH_DATA, "id": dish_id}
+        await async_app_client.delete(f"{self.url}/{menu_id}")
+        response = await async_app_client.get(f"{self.url}/tree")
+        assert menu_id not in [menu["id"] for menu in response.json()]
+
+    @pytest.mark.asyncio
+    async def test_outdated_tree_is_not_cached(self, async_app_client):
+        """Тест: дерево, собранное до записи в БД, не попадает в кеш"""
+        version = await CacheTree.catalog_version(cache_redis)
+        await async_app_client.post(self.url, json=MENU_DATA)
+        assert not await CacheTree.set_tree(cache_redis, b"[]", version)
+        assert not await cache_redis.exists(CacheTree.cache_key())
+        response = await async_app_client.get(f"{self.url}/tree")
+        menu = response.json()[-1]
+        assert menu["title"] == MENU_DATA["title"]
+        await async_app_client.delete(f"{self.url}/{menu['id']}")
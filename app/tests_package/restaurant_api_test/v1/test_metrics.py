@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+from restaurant_app.cache_module import CacheMenu
+from settings.pool import MeteredAsyncPool
+from settings.settings import CACHE_TTL_JITTER, POSTGRE_URL, cache_redis
+from sqlalchemy.ext.asyncio import create_async_engine
+
+MENU_DATA = {"title": "Metrics menu", "description": "Metrics menu description"}
+
+
+class TestGroupMetrics:
+    """Класс тестирования метрик"""
+
+    def setup_class(self):
+        self.url = "http://test/api/v1/metrics"
+
+    @pytest.mark.asyncio
+    async def test_db_pool_metrics(self, async_app_client):
+        """Тест наличия метрик пула соединений Postgres"""
+        response = await async_app_client.get(self.url)
+        assert response.status_code == 200
+        metrics = dict(line.split(" ") for line in response.text.splitlines())
+        # После прогона CRUD тестов пул уже выдавал соединения
+        assert float(metrics["db_pool_checkouts_total"]) > 0
+        # Соединений в ожидании быть не должно
+        assert float(metrics["db_pool_waiters"]) == 0
+        for name in (
+            "db_pool_size",
+            "db_pool_checked_out",
+            "db_pool_wait_seconds_total",
+        ):
+            assert name in metrics
+
+    @pytest.mark.asyncio
+    async def test_db_pool_wait_only_when_exhausted(self):
+        """
+        Тест: выдача свободного соединения и открытие нового не считаются
+        ожиданием, ожидание - только выдача из исчерпанного пула
+        """
+        engine = create_async_engine(
+            POSTGRE_URL, poolclass=MeteredAsyncPool, pool_size=1, max_overflow=0
+        )
+        pool = engine.pool
+        try:
+            async with engine.connect():
+                pass
+            async with engine.connect():
+                assert pool.exhausted()
+                waiter = asyncio.create_task(engine.connect().start())
+                while pool.waiters == 0:
+                    await asyncio.sleep(0.01)
+                await asyncio.sleep(0.05)
+            await (await waiter).close()
+            metrics = pool.metrics()
+            assert metrics["db_pool_checkouts_total"] == 3
+            assert metrics["db_pool_waits_total"] == 1
+            assert metrics["db_pool_waiters"] == 0
+            assert metrics["db_pool_wait_seconds_max"] >= 0.05
+        finally:
+            await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_cache_pool_metrics(self, async_app_client):
+        """Тест переиспользования соединений пула Redis"""
+        response = await async_app_client.get(self.url)
+        metrics = dict(line.split(" ") for line in response.text.splitlines())
+        created = float(metrics["redis_pool_created_connections"])
+        # После всех запросов соединения не закрываются, а остаются в пуле
+        assert created > 0
+        assert created <= float(metrics["redis_pool_max_connections"])
+        assert float(metrics["redis_pool_in_use_connections"]) == 0
+        assert float(metrics["redis_pool_idle_connections"]) == created
+        assert float(metrics["redis_pool_checkouts_total"]) >= created
+
+    @pytest.mark.asyncio
+    async def test_cache_memory_report(self, async_app_client):
+        """Тест TTL записей кеша и отчета по памяти в разрезе семейств ключей"""
+        response = await async_app_client.post(
+            "http://test/api/v1/menus", json=MENU_DATA
+        )
+        menu_id = response.json()["id"]
+        await async_app_client.get("http://test/api/v1/menus")
+        # Запись кеша живет не дольше TTL с учетом разброса
+        ttl = await cache_redis.pttl(CacheMenu.cache_key())
+        assert 0 < ttl <= CacheMenu.ttl * 1000 * (1 + CACHE_TTL_JITTER)
+        response = await async_app_client.get(self.url + "/cache_memory")
+        assert response.status_code == 200
+        report = response.json()
+        assert report["families"]["menu"]["keys"] >= 1
+        assert report["families"]["menu"]["bytes"] > 0
+        assert "maxmemory_policy" in report
+        await async_app_client.delete(f"http://test/api/v1/menus/{menu_id}")
@@ -0,0 +1,59 @@
+import pytest
+from restaurant_app.cache_module import CacheSubMenu, pages_key
+from settings.settings import LIST_PAGE_SIZE_MAX, cache_redis
+
+MENU_DATA = {"title": "Paged menu", "description": "Paged menu description"}
+SUB_MENU_DATA = {"title": "Paged submenu", "description": "Paged submenu"}
+
+
+class TestGroupPagination:
+    """Класс тестирования постраничной выдачи списков по курсору"""
+
+    def setup_class(self):
+        self.url = "http://test/api/v1/menus"
+
+    async def read_all(self, client, url, limit):
+        """Обход списка страницами, after_id - id последнего элемента"""
+        ids, after_id = [], 0
+        while True:
+            response = await client.get(
+                url, params={"after_id": after_id, "limit": limit}
+            )
+            assert response.status_code == 200
+            page = response.json()
+            assert len(page) <= limit
+            if not page:
+                return ids
+            ids.extend(item["id"] for item in page)
+            after_id = page[-1]["id"]
+
+    @pytest.mark.asyncio
+    async def test_pages_cover_list(self, async_app_client):
+        """Тест: страницы покрывают весь список по порядку без повторов"""
+        response = await async_app_client.post(self.url, json=MENU_DATA)
+        menu_id = response.json()["id"]
+        sub_menus_url = f"{self.url}/{menu_id}/submenus"
+        created = []
+        for _ in range(5):
+            response = await async_app_client.post(sub_menus_url, json=SUB_MENU_DATA)
+            created.append(response.json()["id"])
+        assert await self.read_all(async_app_client, sub_menus_url, 2) == created
+        # Страницы закешированы под своими ключами и учтены в множестве списка
+        page = CacheSubMenu.cache_key(menu_id, None, created[1], 2)
+        assert await cache_redis.exists(page)
+        assert await cache_redis.sismember(
+            pages_key(CacheSubMenu.cache_key(menu_id)), page
+        )
+        # Новое подменю инвалидирует все страницы списка
+        response = await async_app_client.post(sub_menus_url, json=SUB_MENU_DATA)
+        created.append(response.json()["id"])
+        assert not await cache_redis.exists(page)
+        assert await self.read_all(async_app_client, sub_menus_url, 2) == created
+        await async_app_client.delete(f"{self.url}/{menu_id}")
+
+    @pytest.mark.asyncio
+    async def test_limit_is_validated(self, async_app_client):
+        """Тест: размер страницы ограничен"""
+        for limit in (0, LIST_PAGE_SIZE_MAX + 1):
+            response = await async_app_client.get(self.url, params={"limit": limit})
+            assert response.status_code == 422
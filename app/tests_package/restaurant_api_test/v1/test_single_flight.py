@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+from restaurant_app.cache_module import CacheMenu
+from restaurant_app.crud import CrudMenu
+from settings.settings import cache_redis
+
+DATA = {"title": "Single flight menu", "description": "Single flight description"}
+
+
+class TestGroupSingleFlight:
+    """Класс тестирования защиты от одновременного пересчета кеша"""
+
+    def setup_class(self):
+        self.url = "http://test/api/v1/menus"
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_hit_db_once(self, async_app_client, monkeypatch):
+        """Тест: одновременные промахи по одному ключу делают один запрос в БД"""
+        response = await async_app_client.post(self.url, json=DATA)
+        menu_id = response.json()["id"]
+        calls = []
+        get_menu_db = CrudMenu.get_menu_db
+
+        async def counted_get_menu_db(*args, **kwargs):
+            calls.append(args)
+            await asyncio.sleep(0.05)
+            return await get_menu_db(*args, **kwargs)
+
+        monkeypatch.setattr(CrudMenu, "get_menu_db", counted_get_menu_db)
+        responses = await asyncio.gather(
+            *(async_app_client.get(self.url) for _ in range(20))
+        )
+        assert len(calls) == 1
+        assert all(response.status_code == 200 for response in responses)
+        assert len({response.content for response in responses}) == 1
+        await async_app_client.delete(f"{self.url}/{menu_id}")
+
+    @pytest.mark.asyncio
+    async def test_wait_for_other_worker(self, async_app_client, monkeypatch):
+        """Тест: при чужой блокировке запрос ждет запись в кеше, а не идет в БД"""
+        response = await async_app_client.post(self.url, json=DATA)
+        menu_id = response.json()["id"]
+        key = CacheMenu.cache_key(menu_id)
+        await cache_redis.set(f"lock_{key}", "other_worker", px=5000)
+
+        async def fail_get_menu_db(*args, **kwargs):
+            raise AssertionError("БД не должна вызываться")
+
+        async def other_worker():
+            await asyncio.sleep(0.1)
+            await cache_redis.set(key, b'{"id": "from other worker"}')
+            await cache_redis.delete(f"lock_{key}")
+
+        monkeypatch.setattr(CrudMenu, "get_menu_db", fail_get_menu_db)
+        response, _ = await asyncio.gather(
+            async_app_client.get(f"{self.url}/{menu_id}"), other_worker()
+        )
+        assert response.json() == {"id": "from other worker"}
+        monkeypatch.undo()
+        await async_app_client.delete(f"{self.url}/{menu_id}")
@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+import pytest
+from restaurant_app.cache_module import CacheMenu
+from restaurant_app.crud import CrudMenu
+
+DATA = {"title": "Stale menu", "description": "Stale menu description"}
+NEW_DATA = {"title": "Fresh menu", "description": "Fresh menu description"}
+DB_DELAY = 0.5
+
+
+class TestGroupStaleWhileRevalidate:
+    """Класс тестирования режима stale-while-revalidate"""
+
+    def setup_class(self):
+        self.url = "http://test/api/v1/menus"
+
+    @pytest.mark.asyncio
+    async def test_readers_do_not_wait_db_after_write(
+        self, async_app_client, monkeypatch
+    ):
+        """Тест: после записи читатели сразу получают устаревший список"""
+        monkeypatch.setattr(CacheMenu, "max_stale", 30)
+        response = await async_app_client.post(self.url, json=DATA)
+        old_menu_id = response.json()["id"]
+        # Прогреваем кеш списка меню
+        await async_app_client.get(self.url)
+        # Запись помечает список устаревшим, но не удаляет его
+        response = await async_app_client.post(self.url, json=NEW_DATA)
+        new_menu_id = response.json()["id"]
+        get_menu_db = CrudMenu.get_menu_db
+
+        async def slow_get_menu_db(*args, **kwargs):
+            await asyncio.sleep(DB_DELAY)
+            return await get_menu_db(*args, **kwargs)
+
+        monkeypatch.setattr(CrudMenu, "get_menu_db", slow_get_menu_db)
+        for _ in range(5):
+            start = time.perf_counter()
+            response = await async_app_client.get(self.url)
+            # Ответ не ждет медленную БД
+            assert time.perf_counter() - start < DB_DELAY / 2
+            assert response.status_code == 200
+            assert new_menu_id not in [menu["id"] for menu in response.json()]
+        # Фоновый пересчет заменяет устаревшую запись свежей
+        await asyncio.sleep(DB_DELAY * 2)
+        start = time.perf_counter()
+        response = await async_app_client.get(self.url)
+        assert time.perf_counter() - start < DB_DELAY / 2
+        assert new_menu_id in [menu["id"] for menu in response.json()]
+        monkeypatch.undo()
+        await async_app_client.delete(f"{self.url}/{old_menu_id}")
+        await async_app_client.delete(f"{self.url}/{new_menu_id}")
+
+    @pytest.mark.asyncio
+    async def test_deleted_entry_is_dropped(self, async_app_client, monkeypatch):
+        """Тест: устаревшая запись удаленного меню не отдается после пересчета"""
+        monkeypatch.setattr(CacheMenu, "max_stale", 30)
+        response = await async_app_client.post(self.url, json=DATA)
+        menu_id = response.json()["id"]
+        await async_app_client.get(f"{self.url}/{menu_id}")
+        await async_app_client.delete(f"{self.url}/{menu_id}")
+        # Первый запрос получает устаревшую запись и запускает пересчет
+        response = await async_app_client.get(f"{self.url}/{menu_id}")
+        assert response.status_code == 200
+        await asyncio.sleep(0.1)
+        response = await async_app_client.get(f"{self.url}/{menu_id}")
+        assert response.status_code == 404
@@ -0,0 +1,129 @@
+import asyncio
+
+import orjson
+import pytest
+from restaurant_app.cache_module import XLSX_STATUS_CHANNEL, CacheXLSX
+from restaurant_app.task_status import RESYNC, TaskStatusHub, task_status_hub
+from restaurant_app.tasks import publish_status
+from settings.settings import cache_redis
+
+
+def read_events(body: bytes) -> list[dict]:
+    """Функция разбора потока SSE в список статусов"""
+    return [
+        orjson.loads(event.removeprefix(b"data: "))
+        for event in body.split(b"\n\n")
+        if event.startswith(b"data: ")
+    ]
+
+
+class TestGroupTaskStatus:
+    """Класс тестирования потока статусов задачи генерации .xlsx"""
+
+    def setup_class(self):
+        self.url = "http://test/api/v1/status"
+
+    @pytest.mark.asyncio
+    async def test_unknown_task(self, async_app_client):
+        """Тест: поток статусов неизвестной задачи - 404"""
+        response = await async_app_client.get(f"{self.url}/unknown-task/events")
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_status_events(self, async_app_client):
+        """
+        Тест: ожидающие клиенты получают статусы от воркера по одной подписке
+        процесса, поток заканчивается на SUCCESS со ссылкой для скачивания
+        """
+        task_id = "test-task-status"
+        await CacheXLSX.publish_status(cache_redis, task_id, "PENDING")
+        clients = [
+            asyncio.create_task(async_app_client.get(f"{self.url}/{task_id}/events"))
+            for _ in range(3)
+        ]
+        while task_status_hub.waiters(task_id) < len(clients):
+            await asyncio.sleep(0.01)
+        publish_status(task_id, "STARTED")
+        publish_status(task_id, "PROGRESS", rows=10000)
+        publish_status(task_id, "SUCCESS")
+        for response in await asyncio.gather(*clients):
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            events = read_events(response.content)
+            assert [event["status"] for event in events] == [
+                "PENDING",
+                "STARTED",
+                "PROGRESS",
+                "SUCCESS",
+            ]
+            assert events[2]["rows"] == 10000
+            assert events[3]["download_link"].endswith(f"/download/{task_id}")
+        assert task_status_hub.waiters(task_id) == 0
+        # Завершенная задача отдает последний статус и сразу закрывает поток
+        response = await async_app_client.get(f"{self.url}/{task_id}/events")
+        assert [event["status"] for event in read_events(response.content)] == [
+            "SUCCESS"
+        ]
+
+    @pytest.mark.asyncio
+    async def test_listener_survives_bad_messages(self, monkeypatch):
+        """
+        Тест: сообщения не в формате статуса пропускаются, а завершившаяся
+        подписка будит клиентов (RESYNC) и запускается снова
+        """
+        hub = TaskStatusHub()
+        queue: asyncio.Queue = asyncio.Queue()
+        await hub.start(cache_redis)
+        hub._waiters["test-task-listener"] = {queue}
+        listener = hub._listener
+        try:
+            await cache_redis.publish(XLSX_STATUS_CHANNEL, b"not json")
+            await cache_redis.publish(XLSX_STATUS_CHANNEL, b'{"status": "STARTED"}')
+            publish_status("test-task-listener", "STARTED")
+            status = await asyncio.wait_for(queue.get(), 5)
+            assert status["status"] == "STARTED"
+            assert not listener.done()
+
+            def fail_parse(message):
+                raise RuntimeError("listener failure")
+
+            monkeypatch.setattr(hub, "_parse", fail_parse)
+            publish_status("test-task-listener", "PROGRESS", rows=10000)
+            assert await asyncio.wait_for(queue.get(), 5) is RESYNC
+            assert listener.done()
+            monkeypatch.undo()
+            await hub.start(cache_redis)
+            assert hub._listener is not listener
+            # После подписки клиенты перечитывают статус
+            assert await asyncio.wait_for(queue.get(), 5) is RESYNC
+            publish_status("test-task-listener", "SUCCESS")
+            status = await asyncio.wait_for(queue.get(), 5)
+            assert status["status"] == "SUCCESS"
+        finally:
+            await hub.stop()
+
+    @pytest.mark.asyncio
+    async def test_status_events_unavailable(self, async_app_client, monkeypatch):
+        """Тест: подписка не оформлена - 503 до начала потока"""
+
+        async def fail_start(asyn_cache):
+            raise asyncio.TimeoutError
+
+        monkeypatch.setattr(task_status_hub, "start", fail_start)
+        await CacheXLSX.publish_status(cache_redis, "test-task-503", "PENDING")
+        response = await async_app_client.get(f"{self.url}/test-task-503/events")
+        assert response.status_code == 503
+
+    @pytest.mark.asyncio
+    async def test_status_task_from_redis(self, async_app_client):
+        """Тест: опрос статуса читает статус, опубликованный воркером"""
+        task_id = "test-task-status-poll"
+        response = await async_app_client.get(f"{self.url}/{task_id}")
+        assert response.json() == {"status task": "PENDING"}
+        publish_status(task_id, "PROGRESS", rows=10000)
+        response = await async_app_client.get(f"{self.url}/{task_id}")
+        assert response.json() == {"status task": "PROGRESS"}
+        publish_status(task_id, "SUCCESS")
+        response = await async_app_client.get(f"{self.url}/{task_id}")
+        assert response.json()["status task"] == "SUCCESS"
+        assert response.json()["Download link"].endswith(f"/download/{task_id}")
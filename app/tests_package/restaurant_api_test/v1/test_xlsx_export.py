@@ -0,0 +1,197 @@
+import os
+import zipfile
+from xml.etree import ElementTree
+
+import pytest
+from restaurant_app import service, tasks
+from restaurant_app.cache_module import CacheXLSX
+from restaurant_app.models import menus
+from restaurant_app.tasks import create_xlsx, start_create_xlsx, worker_runtime
+from settings.settings import cache_redis, engine
+
+NS = {"x": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+MENU_DATA = {"title": "Xlsx menu", "description": "Xlsx menu description"}
+EMPTY_MENU_DATA = {"title": "Xlsx empty menu", "description": "Xlsx empty menu"}
+SUB_MENU_DATA = {"title": "Xlsx submenu", "description": "Xlsx submenu"}
+DISH_DATA = {"title": "Xlsx dish", "description": "Xlsx dish", "price": "7.5"}
+
+
+def read_sheet(path: str) -> dict[int, dict[str, str]]:
+    """Функция чтения листа .xlsx: номер строки -> {столбец: значение}"""
+    with zipfile.ZipFile(path) as xlsx:
+        root = ElementTree.fromstring(xlsx.read("xl/worksheets/sheet1.xml"))
+    sheet = {}
+    for row in root.iterfind(".//x:row", NS):
+        cells = {}
+        for cell in row.iterfind("x:c", NS):
+            value = cell.find("x:is/x:t", NS)
+            if value is None:
+                value = cell.find("x:v", NS)
+            cells[cell.get("r").rstrip("0123456789")] = value.text
+        sheet[int(row.get("r"))] = cells
+    return sheet
+
+
+class TestGroupXlsxExport:
+    """Класс тестирования генерации .xlsx файла"""
+
+    def setup_class(self):
+        self.url = "http://test/api/v1/menus"
+        self.xlsx_url = "http://test/api/v1/create_xlsx"
+
+    @pytest.mark.asyncio
+    async def test_create_xlsx(self, async_app_client):
+        """Тест: меню, подменю и блюда выгружаются по порядку с нумерацией"""
+        response = await async_app_client.post(self.url, json=MENU_DATA)
+        menu_id = response.json()["id"]
+        sub_menu_ids = []
+        for num in (1, 2):
+            response = await async_app_client.post(
+                f"{self.url}/{menu_id}/submenus",
+                json={**SUB_MENU_DATA, "title": f"Xlsx submenu {num}"},
+            )
+            sub_menu_ids.append(response.json()["id"])
+        for num in (1, 2):
+            await async_app_client.post(
+                f"{self.url}/{menu_id}/submenus/{sub_menu_ids[0]}/dishes",
+                json={**DISH_DATA, "title": f"Xlsx dish {num}"},
+            )
+        response = await async_app_client.post(self.url, json=EMPTY_MENU_DATA)
+        empty_menu_id = response.json()["id"]
+        await create_xlsx("test_xlsx_export")
+        path = "storage/test_xlsx_export.xlsx"
+        try:
+            sheet = read_sheet(path)
+        finally:
+            os.remove(path)
+            await async_app_client.delete(f"{self.url}/{menu_id}")
+            await async_app_client.delete(f"{self.url}/{empty_menu_id}")
+        row = next(num for num, cells in sheet.items() if cells.get("B") == "Xlsx menu")
+        num_menu = int(sheet[row]["A"])
+        assert sheet[row]["C"] == MENU_DATA["description"]
+        assert sheet[row + 1] == {"B": "1", "C": "Xlsx submenu 1", "D": "Xlsx submenu"}
+        assert sheet[row + 2] == {
+            "C": "1",
+            "D": "Xlsx dish 1",
+            "E": "Xlsx dish",
+            "F": "7.50",
+        }
+        assert sheet[row + 3]["D"] == "Xlsx dish 2"
+        assert sheet[row + 4] == {"B": "2", "C": "Xlsx submenu 2", "D": "Xlsx submenu"}
+        # Следующее меню - следующая строка, нумерация меню сквозная
+        assert sheet[row + 5] == {
+            "A": str(num_menu + 1),
+            "B": EMPTY_MENU_DATA["title"],
+            "C": EMPTY_MENU_DATA["description"],
+        }
+
+    @pytest.mark.asyncio
+    async def test_create_xlsx_null_description(self, async_app_client, monkeypatch):
+        """
+        Тест: меню без описания (NULL) дает пустую ячейку и не затирается
+        следующим меню, при ошибке недописанный файл удаляется
+        """
+        async with engine.begin() as conn:
+            menu_ids = (
+                (
+                    await conn.execute(
+                        menus.insert()
+                        .values(
+                            [
+                                {"title": "Xlsx null menu", "description": None},
+                                EMPTY_MENU_DATA,
+                            ]
+                        )
+                        .returning(menus.c.id)
+                    )
+                )
+                .scalars()
+                .all()
+            )
+        path = "storage/test_xlsx_null.xlsx"
+        try:
+            await create_xlsx("test_xlsx_null")
+            sheet = read_sheet(path)
+            os.remove(path)
+
+            def fail_replace(src, dst):
+                raise OSError("disk full")
+
+            monkeypatch.setattr(tasks.os, "replace", fail_replace)
+            with pytest.raises(OSError):
+                await create_xlsx("test_xlsx_null")
+        finally:
+            for menu_id in menu_ids:
+                await async_app_client.delete(f"{self.url}/{menu_id}")
+        assert not os.path.exists(path)
+        assert not os.path.exists(f"{path}.part")
+        row = next(
+            num for num, cells in sheet.items() if cells.get("B") == "Xlsx null menu"
+        )
+        assert set(sheet[row]) == {"A", "B"}
+        assert sheet[row + 1]["B"] == EMPTY_MENU_DATA["title"]
+        assert int(sheet[row + 1]["A"]) == int(sheet[row]["A"]) + 1
+
+    @pytest.mark.asyncio
+    async def test_export_reused_by_catalog_version(
+        self, async_app_client, monkeypatch
+    ):
+        """
+        Тест: до изменения каталога запросы присоединяются к одной задаче,
+        затем получают готовый файл, после записи в БД ставится новая задача
+        """
+        queued = []
+        monkeypatch.setattr(
+            service.start_create_xlsx,
+            "apply_async",
+            lambda args, task_id: queued.append((args[0], task_id)),
+        )
+        response = await async_app_client.post(self.url, json=MENU_DATA)
+        menu_id = response.json()["id"]
+        responses = [await async_app_client.post(self.xlsx_url) for _ in range(3)]
+        assert [response.status_code for response in responses] == [202] * 3
+        task_ids = {response.json()["task_id"] for response in responses}
+        assert len(queued) == 1
+        assert task_ids == {queued[0][1]}
+        # Воркер построил файл - он отдается без новой задачи
+        name_file, task_id = queued[0]
+        await create_xlsx(name_file)
+        response = await async_app_client.post(self.xlsx_url)
+        assert response.status_code == 200
+        assert response.json()["task_id"] == task_id
+        response = await async_app_client.get(response.json()["download_link"])
+        assert response.status_code == 200
+        assert response.content.startswith(b"PK")
+        # Изменение каталога - новая версия и новая задача
+        await async_app_client.delete(f"{self.url}/{menu_id}")
+        response = await async_app_client.post(self.xlsx_url)
+        assert response.status_code == 202
+        assert len(queued) == 2
+        assert response.json()["task_id"] == queued[1][1] != task_id
+        os.remove(f"storage/{name_file}.xlsx")
+        # Задача в работе (статус воркера не финальный) - новая не ставится
+        await CacheXLSX.publish_status(cache_redis, queued[1][1], "STARTED")
+        response = await async_app_client.post(self.xlsx_url)
+        assert response.status_code == 202
+        assert len(queued) == 2
+        # Задача завершилась без файла - версия переходит к новой задаче
+        await CacheXLSX.publish_status(cache_redis, queued[1][1], "FAILURE")
+        response = await async_app_client.post(self.xlsx_url)
+        assert len(queued) == 3
+        assert response.json()["task_id"] == queued[2][1]
+        assert await CacheXLSX.name_file(cache_redis, queued[2][1]) == queued[2][0]
+
+    def test_worker_runtime_reused_by_tasks(self):
+        """Тест: задачи воркера выполняются в одном event loop с одним соединением пула"""
+        worker_runtime.start()
+        loop, engine = worker_runtime.loop, worker_runtime.engine
+        try:
+            for num in (1, 2):
+                start_create_xlsx(f"test_worker_runtime_{num}")
+                os.remove(f"storage/test_worker_runtime_{num}.xlsx")
+            assert worker_runtime.loop is loop
+            assert engine.pool.checkedin() == 1
+        finally:
+            worker_runtime.stop()
+        assert loop.is_closed()
+        assert worker_runtime.engine is None
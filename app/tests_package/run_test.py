@@ -6,3 +6,44 @@ from tests_package.restaurant_api_test.v1.test_crud_sub_menu import (  # NOQA
     TestGroupSubMenu,
 )
 from tests_package.restaurant_api_test.v1.test_crud_dish import TestGroupDish  # NOQA
+from tests_package.restaurant_api_test.v1.test_metrics import TestGroupMetrics  # NOQA
+from tests_package.restaurant_api_test.v1.test_local_cache import (  # NOQA
+    TestGroupLocalCache,
+)
+from tests_package.restaurant_api_test.v1.test_single_flight import (  # NOQA
+    TestGroupSingleFlight,
+)
+from tests_package.restaurant_api_test.v1.test_stale_while_revalidate import (  # NOQA
+    TestGroupStaleWhileRevalidate,
+)
+from tests_package.restaurant_api_test.v1.test_counters import (  # NOQA
+    TestGroupCounters,
+)
+from tests_package.restaurant_api_test.v1.test_dish_scope import (  # NOQA
+    TestGroupDishScope,
+)
+from tests_package.restaurant_api_test.v1.test_pagination import (  # NOQA
+    TestGroupPagination,
+)
+from tests_package.restaurant_api_test.v1.test_menu_tree import (  # NOQA
+    TestGroupMenuTree,
+)
+from tests_package.restaurant_api_test.v1.test_etag import TestGroupETag  # NOQA
+from tests_package.restaurant_api_test.v1.test_compression import (  # NOQA
+    TestGroupCompression,
+)
+from tests_package.restaurant_api_test.v1.test_bulk import TestGroupBulk  # NOQA
+from tests_package.restaurant_api_test.v1.test_import import TestGroupImport  # NOQA
+from tests_package.restaurant_api_test.v1.test_generate_data import (  # NOQA
+    TestGroupGenerateData,
+)
+from tests_package.restaurant_api_test.v1.test_xlsx_export import (  # NOQA
+    TestGroupXlsxExport,
+)
+from tests_package.restaurant_api_test.v1.test_task_status import (  # NOQA
+    TestGroupTaskStatus,
+)
+from tests_package.restaurant_api_test.v1.test_download import (  # NOQA
+    TestGroupDownload,
+)
+from tests_package.restaurant_api_test.v1.test_export import TestGroupExport  # NOQA